@@ -0,0 +1,95 @@
+"""
+Compare the indexed term matchers with difflib.get_close_matches as the lexicon grows.
+
+Usage:
+    python benchmarks/bench_fuzzy_matcher.py [--sizes 1000 10000 100000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from difflib import get_close_matches
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation.lexicon import CompiledLexicon, FuzzyTermMatcher, compile_lexicon  # noqa: E402
+
+PREFIXES = ['hyper', 'hypo', 'brady', 'tachy', 'poly', 'anti', 'dys', 'hemi', 'macro', 'micro',
+            'peri', 'endo', 'neuro', 'cardio', 'gastro', 'osteo', 'nephro', 'hepato', 'derm', 'my']
+ROOTS = ['card', 'thyro', 'glyc', 'ton', 'pne', 'aden', 'arthr', 'bronch', 'cyst', 'encephal',
+         'lip', 'mening', 'phleb', 'rhin', 'splen', 'tens', 'vas', 'col', 'lymph', 'angi']
+SUFFIXES = ['itis', 'emia', 'algia', 'osis', 'pathy', 'ectomy', 'plasty', 'gram', 'scope', 'tomy',
+            'ia', 'ism', 'oma', 'rrhea', 'uria']
+
+
+def build_lexicon(size, rng):
+    terms = set()
+    while len(terms) < size:
+        term = rng.choice(PREFIXES) + rng.choice(ROOTS) + rng.choice(SUFFIXES)
+        if rng.random() < 0.5:
+            term += rng.choice('aeiou') + rng.choice(ROOTS)
+        terms.add(term)
+    return sorted(terms)
+
+
+def misspell(word, rng):
+    chars = list(word)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        op = rng.random()
+        if op < 0.33:
+            del chars[i]
+        elif op < 0.66:
+            chars[i] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+        else:
+            chars.insert(i, rng.choice('abcdefghijklmnopqrstuvwxyz'))
+    return ''.join(chars) or word
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'terms':>8} {'build s':>9} {'difflib ms/q':>13} {'index ms/q':>11} "
+          f"{'mmap ms/q':>10} {'speedup':>8} {'agree':>7}")
+    for size in args.sizes:
+        lexicon = build_lexicon(size, rng)
+        queries = [misspell(rng.choice(lexicon), rng) for _ in range(args.queries // 2)]
+        queries += [rng.choice(['fever', 'patient', 'daily', 'with', 'pain', 'tablet'])
+                    for _ in range(args.queries - len(queries))]
+
+        start = time.perf_counter()
+        matcher = FuzzyTermMatcher(lexicon)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [get_close_matches(q, lexicon, n=3, cutoff=0.6) for q in queries]
+        difflib_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [matcher.get_close_matches(q, n=3, cutoff=0.6) for q in queries]
+        index_time = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'lexicon.lex')
+            compile_lexicon(lexicon, path)
+            compiled = CompiledLexicon(path)
+            start = time.perf_counter()
+            mapped = [compiled.get_close_matches(q, n=3, cutoff=0.6) for q in queries]
+            mmap_time = time.perf_counter() - start
+            del compiled
+
+        agree = sum(a == e == m for a, e, m in zip(actual, expected, mapped)) / len(queries)
+        print(f"{size:>8} {build:>9.2f} {difflib_time * 1000 / len(queries):>13.3f} "
+              f"{index_time * 1000 / len(queries):>11.3f} {mmap_time * 1000 / len(queries):>10.3f} "
+              f"{difflib_time / index_time:>7.1f}x {agree:>6.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Check history search latency against a large translation fixture.
+
+Seeds a throwaway test database with --rows translations (80% of them for one
+heavy user, the rest spread over other users), then times first-page searches
+for drug names, phrases and misspellings. Run it with the PostgreSQL settings:
+the SQLite fallback scans every row and is only meant for tests.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=project.settings \\
+    python benchmarks/bench_history_search.py [--rows 1000000] [--target-p95-ms 50]
+
+Exits non-zero when the p95 latency misses the target.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from translation.models import Translation  # noqa: E402
+from translation.search import search_translations  # noqa: E402
+from translation.serializers import TranslationListSerializer  # noqa: E402
+
+DRUGS = ['warfarin', 'metformin', 'lisinopril', 'atorvastatin', 'amoxicillin', 'ibuprofen',
+         'omeprazole', 'levothyroxine', 'amlodipine', 'prednisone', 'insulin', 'heparin']
+INSTRUCTIONS = ['Take {drug} {dose} mg {when}', 'Stop {drug} before surgery',
+                'Do not take {drug} with alcohol', 'Increase {drug} to {dose} mg {when}',
+                'Check your blood pressure before taking {drug}']
+WHEN = ['daily', 'twice a day', 'at bedtime', 'with food', 'every morning']
+QUERIES = ['warfarin', 'metformin twice a day', 'stop heparin', 'warfarine', 'atorvastatn',
+           '"with alcohol"', 'bedtime insulin', 'omeprazole']
+BATCH = 5000
+
+
+def seed(rows, users, rng):
+    User = get_user_model()
+    heavy = User.objects.create(username='heavy')
+    others = [User.objects.create(username=f'user{i}') for i in range(users)]
+
+    def make(i):
+        text = rng.choice(INSTRUCTIONS).format(
+            drug=rng.choice(DRUGS), dose=rng.choice([5, 10, 20, 40, 500]), when=rng.choice(WHEN)
+        )
+        return Translation(
+            user=heavy if rng.random() < 0.8 else rng.choice(others),
+            original_text=f'{text} ({i})',
+            translated_text=f'[es] {text}',
+            source_language='en',
+            target_language='es',
+        )
+
+    for start in range(0, rows, BATCH):
+        Translation.objects.bulk_create([make(i) for i in range(start, min(rows, start + BATCH))])
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE translation_translation')
+    return heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--target-p95-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        start = time.perf_counter()
+        user = seed(args.rows, args.users, random.Random(0))
+        print(f"seeded {args.rows} rows on {connection.vendor} in {time.perf_counter() - start:.1f}s")
+
+        fields = TranslationListSerializer.Meta.fields
+        timings = []
+        print(f"{'query':>24} {'p50 ms':>9} {'p95 ms':>9}")
+        for query in QUERIES:
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                list(search_translations(Translation.objects.filter(user=user), query)
+                     .values(*fields, 'rank')[:args.page_size + 1])
+                samples.append(time.perf_counter() - start)
+            samples.sort()
+            timings.extend(samples)
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            print(f"{query:>24} {statistics.median(samples) * 1000:>9.1f} {p95 * 1000:>9.1f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000
+    verdict = 'ok' if p95 <= args.target_p95_ms else 'MISSED'
+    print(f"overall p95 {p95:.1f} ms, target {args.target_p95_ms:.0f} ms: {verdict}")
+    sys.exit(0 if verdict == 'ok' else 1)
+
+
+if __name__ == '__main__':
+    main()
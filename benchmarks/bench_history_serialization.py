@@ -0,0 +1,100 @@
+"""
+Compare serializing a translation history with the nested TranslationSerializer
+and with the compact values()-based TranslationListSerializer.
+
+For each size a user with that many translations is created in a throwaway
+test database; both paths load and render every row to JSON. Reports time,
+queries and payload size.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=project.settings \\
+    python benchmarks/bench_history_serialization.py [--sizes 1000 10000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from translation.models import Translation  # noqa: E402
+from translation.serializers import (  # noqa: E402
+    TranslationListSerializer, TranslationSerializer, UserSerializer
+)
+
+
+def nested(user):
+    rows = Translation.objects.filter(user=user).order_by('-created_at')
+    return JSONRenderer().render(TranslationSerializer(rows, many=True).data)
+
+
+def compact(user):
+    rows = Translation.objects.filter(user=user).order_by('-created_at') \
+        .values(*TranslationListSerializer.Meta.fields)
+    return JSONRenderer().render({
+        'user': UserSerializer(user).data,
+        'results': TranslationListSerializer(rows, many=True).data,
+    })
+
+
+def measure(render, user, repeat):
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    best = None
+    for _ in range(repeat):
+        queries = 0
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            payload = render(user)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, queries, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f"{'rows':>7} {'serializer':>10} {'ms':>9} {'queries':>8} {'bytes':>11}")
+        for size in args.sizes:
+            user = get_user_model().objects.create_user(username=f'bench{size}', password='bench12345')
+            Translation.objects.bulk_create([
+                Translation(
+                    user=user,
+                    original_text=f'The patient reports chest pain, day {i}',
+                    translated_text=f'El paciente refiere dolor torácico, día {i}',
+                    source_language='en',
+                    target_language='es',
+                    medical_terms={'chest pain': 'dolor torácico'},
+                )
+                for i in range(size)
+            ], batch_size=1000)
+            for name, render in (('nested', nested), ('compact', compact)):
+                elapsed, queries, size_bytes = measure(render, user, args.repeat)
+                print(f"{size:>7} {name:>10} {elapsed * 1000:>9.1f} {queries:>8} {size_bytes:>11}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
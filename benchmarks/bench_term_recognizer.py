@@ -0,0 +1,109 @@
+"""
+Measure medical term recognition throughput on long clinical notes.
+
+Builds a synthetic lexicon of single- and multi-word terms, generates notes of
+--note-chars characters mixing terms, misspellings and filler, and reports
+characters per second for the Aho-Corasick recognizer alone and for
+validate_and_suggest before (whitespace split, fuzzy search for every unknown
+word) and after (recognizer, fuzzy search only for leftover words).
+
+Usage:
+    python benchmarks/bench_term_recognizer.py [--sizes 1000 10000 100000] [--notes 20] [--note-chars 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_fuzzy_matcher import build_lexicon, misspell  # noqa: E402
+from translation.lexicon import FuzzyTermMatcher  # noqa: E402
+from translation.recognizer import PhraseRecognizer  # noqa: E402
+
+MODIFIERS = ['acute', 'chronic', 'severe', 'recurrent', 'bilateral', 'primary', 'secondary']
+FILLER = ['patient', 'reports', 'history', 'of', 'with', 'and', 'denies', 'since', 'last', 'week',
+          'the', 'no', 'on', 'exam', 'mild', 'started', 'today', 'daily', 'mg', 'follow', 'up']
+
+
+def build_terms(size, rng):
+    words = build_lexicon(size, rng)
+    phrases = {f'{rng.choice(MODIFIERS)} {word}' for word in rng.sample(words, size // 4)}
+    phrases |= {f'{a} {b}' for a, b in zip(rng.sample(words, size // 8), rng.sample(words, size // 8))}
+    return words + sorted(phrases)
+
+
+def build_note(terms, chars, rng):
+    parts = []
+    length = 0
+    while length < chars:
+        roll = rng.random()
+        if roll < 0.15:
+            part = rng.choice(terms)
+        elif roll < 0.2:
+            part = misspell(rng.choice(terms), rng)
+        else:
+            part = rng.choice(FILLER)
+        if rng.random() < 0.1:
+            part += rng.choice(',.;:')
+        parts.append(part)
+        length += len(part) + 1
+    return ' '.join(parts)
+
+
+def validate_split(matcher, text):
+    """validate_and_suggest as it was: whitespace split, fuzzy search per unknown word"""
+    suggestions = []
+    for word in text.lower().split():
+        if word not in matcher:
+            suggestions.extend(matcher.get_close_matches(word, n=3, cutoff=0.6))
+    return set(suggestions)
+
+
+def validate_recognizer(matcher, recognizer, text):
+    suggestions = []
+    matches, leftovers = recognizer.scan(text)
+    for word in leftovers:
+        if not word.isdigit():
+            suggestions.extend(matcher.get_close_matches(word, n=3, cutoff=0.6))
+    return set(suggestions)
+
+
+def throughput(fn, notes):
+    start = time.perf_counter()
+    for note in notes:
+        fn(note)
+    return sum(len(note) for note in notes) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--notes', type=int, default=20)
+    parser.add_argument('--note-chars', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'terms':>8} {'build s':>9} {'recognize c/s':>14} {'matches/note':>13} "
+          f"{'split+fuzzy c/s':>16} {'recognizer+fuzzy c/s':>21}")
+    for size in args.sizes:
+        terms = build_terms(size, rng)
+        notes = [build_note(terms, args.note_chars, rng) for _ in range(args.notes)]
+        matcher = FuzzyTermMatcher(terms)
+
+        start = time.perf_counter()
+        recognizer = PhraseRecognizer(terms)
+        build = time.perf_counter() - start
+
+        recognize = throughput(recognizer.find, notes)
+        matches = sum(len(recognizer.find(note)) for note in notes) / len(notes)
+        before = throughput(lambda note: validate_split(matcher, note), notes)
+        after = throughput(lambda note: validate_recognizer(matcher, recognizer, note), notes)
+        print(f"{len(terms):>8} {build:>9.2f} {recognize:>14,.0f} {matches:>13.0f} "
+              f"{before:>16,.0f} {after:>21,.0f}")
+
+
+if __name__ == '__main__':
+    main()
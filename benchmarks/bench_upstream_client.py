@@ -0,0 +1,53 @@
+"""
+Measure the per-request latency saved by the pooled upstream client.
+
+Runs the same sequence of MyMemory-style GETs against a local fake server,
+once with a bare requests.get per call and once through UpstreamClient.
+
+Usage:
+    python benchmarks/bench_upstream_client.py [--requests 500] [--latency 0.0]
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation.testing import FakeMyMemoryServer  # noqa: E402
+from translation.upstream import UpstreamClient  # noqa: E402
+
+
+def run(get, url, count):
+    start = time.perf_counter()
+    for i in range(count):
+        get(url, params={'q': f'Take twice daily {i}', 'langpair': 'en|es'}).json()
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Server-side latency per request in seconds')
+    args = parser.parse_args()
+
+    with FakeMyMemoryServer(latency=args.latency) as server:
+        bare = run(lambda url, params: requests.get(url, params=params, timeout=10), server.url, args.requests)
+        bare_connections = server.connections
+
+        client = UpstreamClient()
+        pooled = run(client.get, server.url, args.requests)
+        client.close()
+        pooled_connections = server.connections - bare_connections
+
+    print(f"{'client':>8} {'ms/request':>11} {'connections':>12}")
+    print(f"{'bare':>8} {bare * 1000:>11.3f} {bare_connections:>12}")
+    print(f"{'pooled':>8} {pooled * 1000:>11.3f} {pooled_connections:>12}")
+    print(f"saved {(bare - pooled) * 1000:.3f} ms per request")
+
+
+if __name__ == '__main__':
+    main()
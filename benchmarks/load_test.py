@@ -0,0 +1,341 @@
+"""
+End-to-end load test of the API against a fake MyMemory server.
+
+Seeds a throwaway test database with --users users (one shared password),
+--history-rows translations each and a --lexicon-terms medical lexicon,
+then runs --clients concurrent in-process clients for --duration seconds. Each
+client picks an endpoint per request by the --mix weights:
+
+    translate  POST /translate/, a --fresh share of new texts (upstream calls),
+               the rest from a small set of repeated texts (cache hits)
+    history    GET /translations/, then the next page through its cursor
+    search     GET /translations/search/?q=<drug>
+    login      POST /auth/login/ (password hashing dominates)
+    profile    GET /auth/profile/
+
+Throughput and p50/p95/p99 latency are printed per endpoint and written as
+JSON to --output (default benchmarks/results/), tagged with the git commit.
+With --baseline, the run is compared with an earlier results file and the
+script exits non-zero when an endpoint's p95 grew by more than
+--max-regression.
+
+Run it against the PostgreSQL settings; SQLite serializes the writes and
+reports "database table is locked" under concurrent clients.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=project.settings \\
+    python benchmarks/load_test.py [--clients 16] [--duration 30] [--latency 0.1] [--error-rate 0.01]
+        [--mix translate=5,history=3,search=1,login=0.5,profile=1] [--output results.json]
+        [--baseline previous.json]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from bench_fuzzy_matcher import build_lexicon  # noqa: E402
+from bench_history_search import DRUGS, INSTRUCTIONS, WHEN  # noqa: E402
+from translation import upstream  # noqa: E402
+from translation.cache import detection_cache, translation_cache  # noqa: E402
+from translation.lexicon import FuzzyTermMatcher, load_source_terms  # noqa: E402
+from translation.models import Translation  # noqa: E402
+from translation.testing import FakeMyMemoryServer  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+PASSWORD = 'loadtest123'
+DEFAULT_MIX = 'translate=5,history=3,search=1,login=0.5,profile=1'
+RUN = int(time.time())
+BATCH = 5000
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}, expected one of {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def instruction(rng):
+    return rng.choice(INSTRUCTIONS).format(
+        drug=rng.choice(DRUGS), dose=rng.choice([5, 10, 20, 40, 500]), when=rng.choice(WHEN)
+    )
+
+
+def seed(users, history, rng):
+    User = get_user_model()
+    password = make_password(PASSWORD)  # hashed once, shared by every user
+    User.objects.bulk_create([User(username=f'load{i}', password=password) for i in range(users)])
+    accounts = list(User.objects.filter(username__startswith='load').order_by('id'))
+    tokens = Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in accounts])
+
+    rows = (Translation(
+        user=user,
+        original_text=text,
+        translated_text=f'[es] {text}',
+        source_language='en',
+        target_language='es',
+        is_favorite=rng.random() < 0.1,
+    ) for user in accounts for text in (instruction(rng) for _ in range(history)))
+    while True:
+        batch = [row for _, row in zip(range(BATCH), rows)]
+        if not batch:
+            break
+        Translation.objects.bulk_create(batch)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE translation_translation')
+    return [(user.username, token.key) for user, token in zip(accounts, tokens)]
+
+
+class Session:
+    """One simulated client: a Django test client and a user's credentials"""
+
+    def __init__(self, username, token, rng, fresh, hot_texts):
+        self.client = Client()
+        self.username = username
+        self.headers = {'Authorization': f'Token {token}'}
+        self.rng = rng
+        self.fresh = fresh
+        self.hot_texts = hot_texts
+        self.sent = 0
+
+    def translate(self):
+        self.sent += 1
+        if self.rng.random() < self.fresh:
+            # Unique per run so neither the cache nor the translation memory answers
+            text = f'{instruction(self.rng)} ({self.username} {RUN}-{self.sent})'
+        else:
+            text = self.rng.choice(self.hot_texts)
+        response = self.client.post('/translate/', {'text': text, 'source_lang': 'en', 'target_lang': 'es'},
+                                    content_type='application/json', headers=self.headers)
+        return response.status_code
+
+    def history(self):
+        response = self.client.get('/translations/', headers=self.headers)
+        if response.status_code == 200 and response.json().get('next'):
+            response = self.client.get(response.json()['next'], headers=self.headers)
+        return response.status_code
+
+    def search(self):
+        return self.client.get('/translations/search/', {'q': self.rng.choice(DRUGS)},
+                               headers=self.headers).status_code
+
+    def login(self):
+        return self.client.post('/auth/login/', {'username': self.username, 'password': PASSWORD},
+                                content_type='application/json').status_code
+
+    def profile(self):
+        return self.client.get('/auth/profile/', headers=self.headers).status_code
+
+
+ENDPOINTS = ['translate', 'history', 'search', 'login', 'profile']
+
+
+def run(sessions, mix, duration, warmup):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = defaultdict(list)  # endpoint -> [(seconds, ok)]
+    lock = threading.Lock()
+    start_line = threading.Barrier(len(sessions) + 1)
+
+    def client(session):
+        for name in names:
+            for _ in range(warmup):
+                getattr(session, name)()
+        local = defaultdict(list)
+        start_line.wait()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            name = session.rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                ok = getattr(session, name)() < 400
+            except Exception as e:
+                print(f"{name} failed: {str(e)}")
+                ok = False
+            local[name].append((time.perf_counter() - start, ok))
+        with lock:
+            for name, values in local.items():
+                samples[name].extend(values)
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(session,)) for session in sessions]
+    for thread in threads:
+        thread.start()
+    start_line.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, samples
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of sorted values"""
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values))) - 1))]
+
+
+def summarize(elapsed, samples):
+    endpoints = {}
+    for name, values in sorted(samples.items()):
+        latencies = sorted(seconds for seconds, _ in values)
+        endpoints[name] = {
+            'requests': len(values),
+            'errors': sum(1 for _, ok in values if not ok),
+            'throughput_rps': round(len(values) / elapsed, 2),
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2),
+        }
+    return endpoints
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(endpoints, elapsed):
+    total = sum(endpoint['requests'] for endpoint in endpoints.values())
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+    print(f"{'endpoint':>10} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, endpoint in endpoints.items():
+        print(f"{name:>10} {endpoint['requests']:>9} {endpoint['throughput_rps']:>8.1f} {endpoint['p50_ms']:>9.1f} "
+              f"{endpoint['p95_ms']:>9.1f} {endpoint['p99_ms']:>9.1f} {endpoint['errors']:>7}")
+
+
+def compare(endpoints, baseline, max_regression):
+    """Print p95 and throughput changes against a baseline run. Returns the regressed endpoints."""
+    print(f"against {baseline.get('commit') or 'baseline'} ({baseline['timestamp']}):")
+    print(f"{'endpoint':>10} {'p95 ms':>20} {'change':>8} {'req/s':>18}")
+    regressed = []
+    for name, endpoint in endpoints.items():
+        before = baseline['endpoints'].get(name)
+        if not before:
+            continue
+        change = endpoint['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0.0
+        if change > max_regression:
+            regressed.append(name)
+        print(f"{name:>10} {before['p95_ms']:>8.1f} -> {endpoint['p95_ms']:<8.1f} {change:>+8.0%} "
+              f"{before['throughput_rps']:>7.1f} -> {endpoint['throughput_rps']:<7.1f}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per endpoint and client')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help=f'Endpoint weights (default {DEFAULT_MIX})')
+    parser.add_argument('--fresh', type=float, default=0.3,
+                        help='Share of translate requests with new text')
+    parser.add_argument('--latency', type=float, default=0.1, help='MyMemory latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Random extra MyMemory latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.01, help='Share of failing MyMemory calls')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--history-rows', type=int, default=500, help='Translations seeded per user')
+    parser.add_argument('--lexicon-terms', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None,
+                        help='Results file (default benchmarks/results/load_test-<commit>-<time>.json)')
+    parser.add_argument('--baseline', default=None, help='Earlier results file to compare with')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Largest tolerated p95 growth against --baseline (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    commit = git_commit()
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    translation_cache.clear()
+    detection_cache.clear()
+    try:
+        start = time.perf_counter()
+        accounts = seed(args.users, args.history_rows, rng)
+        terms = load_source_terms() + build_lexicon(args.lexicon_terms, rng)
+        lexicon = FuzzyTermMatcher(terms)
+        print(f"seeded {args.users} users, {args.users * args.history_rows} translations and "
+              f"{len(lexicon)} lexicon terms on {connection.vendor} in {time.perf_counter() - start:.1f}s")
+
+        hot_texts = [instruction(rng) for _ in range(20)]
+        sessions = [
+            Session(*accounts[i % len(accounts)], random.Random(args.seed + i), args.fresh, hot_texts)
+            for i in range(args.clients)
+        ]
+        with FakeMyMemoryServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                seed=args.seed) as server, \
+                patch('translation.lexicon.LanguageLexicons.get', return_value=lexicon):
+            settings.MYMEMORY_URL = server.url
+            settings.UPSTREAM_HTTP = {**settings.UPSTREAM_HTTP, 'POOL_SIZE': max(10, args.clients)}
+            upstream.reset_client()
+            elapsed, samples = run(sessions, args.mix, args.duration, args.warmup)
+            upstream_calls = server.requests
+            guards = upstream.stats()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    endpoints = summarize(elapsed, samples)
+    results = {
+        'benchmark': 'load_test',
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'database': connection.vendor,
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'elapsed_s': round(elapsed, 2),
+        'upstream': {'requests': upstream_calls, **guards},
+        'endpoints': endpoints,
+    }
+
+    print(f"{args.clients} clients, {args.duration:.0f}s, upstream latency {args.latency * 1000:.0f} ms "
+          f"+ up to {args.jitter * 1000:.0f} ms, error rate {args.error_rate:.0%}, "
+          f"{upstream_calls} upstream calls")
+    report(endpoints, elapsed)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"load_test-{commit or 'nocommit'}-{RUN}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressed = compare(endpoints, json.load(f), args.max_regression)
+        if regressed:
+            print(f"p95 regressed by more than {args.max_regression:.0%}: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Compare translate throughput of the sync WSGI view and the async ASGI view.
+
+A WSGI deployment with N sync workers can wait on at most N MyMemory calls at
+once; the async view waits on all of them from one worker. Both paths are
+driven in-process against a fake MyMemory server with the given latency:
+/translate/ through N concurrent sync clients, /translate/async/ through
+--concurrency requests gathered on one event loop.
+
+Run it against the PostgreSQL settings; SQLite serializes the writes of
+both paths and reports "database table is locked" under the threaded load.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=project.settings \\
+    python benchmarks/load_test_async.py [--requests 200] [--latency 0.2] [--workers 4] [--concurrency 50]
+        [--pool-size N]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from translation.cache import detection_cache, translation_cache  # noqa: E402
+from translation.testing import FakeMyMemoryServer  # noqa: E402
+
+
+RUN = int(time.time())
+
+
+def payload(prefix, i):
+    # Distinct texts so neither the cache nor the translation memory answers
+    return {'text': f'{prefix} {RUN}-{i}: take two tablets daily', 'source_lang': 'en', 'target_lang': 'es'}
+
+
+def run_wsgi(count, workers, headers):
+    def one(i):
+        start = time.perf_counter()
+        response = Client().post('/translate/', payload('wsgi', i),
+                                 content_type='application/json', headers=headers)
+        return response.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(one, range(count)))
+    return time.perf_counter() - start, results
+
+
+async def run_asgi(count, concurrency, headers):
+    client = AsyncClient()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with limit:
+            start = time.perf_counter()
+            response = await client.post('/translate/async/', payload('asgi', i),
+                                         content_type='application/json', headers=headers)
+            return response.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(count)))
+    return time.perf_counter() - start, results
+
+
+def report(name, elapsed, results):
+    latencies = sorted(latency for _, latency in results)
+    errors = sum(1 for status, _ in results if status != 200)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:>6} {len(results) / elapsed:>10.1f} {statistics.median(latencies) * 1000:>9.1f} "
+          f"{p95 * 1000:>9.1f} {errors:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.2,
+                        help='MyMemory latency per request in seconds')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Sync workers of the WSGI deployment')
+    parser.add_argument('--concurrency', type=int, default=50,
+                        help='Requests in flight against the async view')
+    parser.add_argument('--pool-size', type=int, default=None,
+                        help='Upstream connection pool size (default: --concurrency)')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    translation_cache.clear()
+    detection_cache.clear()
+    try:
+        user = get_user_model().objects.create_user(username='loadtest', password='loadtest123')
+        headers = {'Authorization': f'Token {Token.objects.create(user=user).key}'}
+
+        with FakeMyMemoryServer(latency=args.latency) as server:
+            settings.MYMEMORY_URL = server.url
+            settings.UPSTREAM_HTTP = {**settings.UPSTREAM_HTTP, 'POOL_SIZE': args.pool_size or args.concurrency}
+            wsgi = run_wsgi(args.requests, args.workers, headers)
+            asgi = asyncio.run(run_asgi(args.requests, args.concurrency, headers))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"{args.requests} requests, upstream latency {args.latency * 1000:.0f} ms, "
+          f"{args.workers} WSGI workers, {args.concurrency} in flight on ASGI")
+    print(f"{'path':>6} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    report('wsgi', *wsgi)
+    report('asgi', *asgi)
+
+
+if __name__ == '__main__':
+    main()
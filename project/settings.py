@@ -46,7 +46,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'translation.middleware.MetricsMiddleware',
+    'translation.middleware.AsyncWhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -116,7 +117,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # Rest Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'translation.authentication.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -124,6 +125,44 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Translation history (GET /translations/): keyset pages of PAGE_SIZE rows,
+# clients may ask for up to MAX_PAGE_SIZE with ?page_size=
+HISTORY_PAGINATION = {
+    'PAGE_SIZE': config('HISTORY_PAGE_SIZE', default=50, cast=int),
+    'MAX_PAGE_SIZE': config('HISTORY_MAX_PAGE_SIZE', default=200, cast=int),
+}
+
+# History export (GET /translations/export/, manage.py export_translations):
+# rows are fetched CHUNK_SIZE at a time through a server-side cursor
+TRANSLATION_EXPORT = {
+    'CHUNK_SIZE': config('EXPORT_CHUNK_SIZE', default=2000, cast=int),
+}
+
+# Bulk favorite/unfavorite/delete (POST /translations/bulk/<action>/):
+# at most MAX_IDS ids per request; filters are not limited
+TRANSLATION_BULK = {
+    'MAX_IDS': config('TRANSLATION_BULK_MAX_IDS', default=1000, cast=int),
+}
+
+# History search (GET /translations/search/): ranked pages of PAGE_SIZE rows,
+# at most MAX_PAGES deep
+TRANSLATION_SEARCH = {
+    'PAGE_SIZE': config('SEARCH_PAGE_SIZE', default=20, cast=int),
+    'MAX_PAGE_SIZE': config('SEARCH_MAX_PAGE_SIZE', default=100, cast=int),
+    'MAX_PAGES': config('SEARCH_MAX_PAGES', default=50, cast=int),
+}
+
+# Write-behind for translation records: when ENABLED, each worker buffers
+# new rows and bulk-inserts them once MAX_RECORDS are waiting, every
+# FLUSH_INTERVAL seconds and at shutdown. A worker that is killed outright
+# loses its buffer (at most MAX_RECORDS rows / FLUSH_INTERVAL seconds), and
+# created_at is the time of the flush.
+WRITE_BEHIND = {
+    'ENABLED': config('WRITE_BEHIND_ENABLED', default=False, cast=bool),
+    'MAX_RECORDS': config('WRITE_BEHIND_MAX_RECORDS', default=200, cast=int),
+    'FLUSH_INTERVAL': config('WRITE_BEHIND_FLUSH_INTERVAL', default=1.0, cast=float),
+}
+
 # Custom user model
 AUTH_USER_MODEL = 'translation.User'
 
@@ -159,6 +198,153 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Add environment variables
 OPENAI_API_KEY = config('OPENAI_API_KEY')
 
+# MyMemory translation API and the pooled HTTP client used to reach it
+MYMEMORY_URL = config('MYMEMORY_URL', default='https://api.mymemory.translated.net/get')
+UPSTREAM_HTTP = {
+    'POOL_SIZE': config('UPSTREAM_POOL_SIZE', default=10, cast=int),
+    'CONNECT_TIMEOUT': config('UPSTREAM_CONNECT_TIMEOUT', default=3.05, cast=float),
+    'READ_TIMEOUT': config('UPSTREAM_READ_TIMEOUT', default=10.0, cast=float),
+    'MAX_RETRIES': config('UPSTREAM_MAX_RETRIES', default=2, cast=int),
+    'BACKOFF': config('UPSTREAM_BACKOFF', default=0.2, cast=float),
+    'BACKOFF_MAX': config('UPSTREAM_BACKOFF_MAX', default=2.0, cast=float),
+}
+
+# Circuit breaker around MyMemory: FAILURE_THRESHOLD consecutive failed (or
+# slower than SLOW_CALL_THRESHOLD seconds) calls open it, and translations
+# that are not cached or stored then fail fast with 503 for RESET_TIMEOUT
+# seconds before HALF_OPEN_CALLS trial calls are let through
+CIRCUIT_BREAKER = {
+    'ENABLED': config('CIRCUIT_BREAKER_ENABLED', default=True, cast=bool),
+    'FAILURE_THRESHOLD': config('CIRCUIT_BREAKER_FAILURE_THRESHOLD', default=5, cast=int),
+    'RESET_TIMEOUT': config('CIRCUIT_BREAKER_RESET_TIMEOUT', default=30.0, cast=float),
+    'HALF_OPEN_CALLS': config('CIRCUIT_BREAKER_HALF_OPEN_CALLS', default=1, cast=int),
+    'SLOW_CALL_THRESHOLD': config('CIRCUIT_BREAKER_SLOW_CALL_THRESHOLD', default=8.0, cast=float),
+}
+
+# Adaptive (AIMD) limit on concurrent MyMemory calls per worker: grows while
+# calls finish within LATENCY_TARGET seconds, shrinks by DECREASE when they
+# fail or run slower. Callers, sync and async, wait up to QUEUE_TIMEOUT for
+# a slot.
+CONCURRENCY_LIMIT = {
+    'ENABLED': config('CONCURRENCY_LIMIT_ENABLED', default=True, cast=bool),
+    'INITIAL': config('CONCURRENCY_LIMIT_INITIAL', default=10, cast=int),
+    'MIN': config('CONCURRENCY_LIMIT_MIN', default=2, cast=int),
+    'MAX': config('CONCURRENCY_LIMIT_MAX', default=50, cast=int),
+    'LATENCY_TARGET': config('CONCURRENCY_LIMIT_LATENCY_TARGET', default=2.0, cast=float),
+    'DECREASE': config('CONCURRENCY_LIMIT_DECREASE', default=0.7, cast=float),
+    'QUEUE_TIMEOUT': config('CONCURRENCY_LIMIT_QUEUE_TIMEOUT', default=1.0, cast=float),
+}
+
+# Translation engine: dotted path of a translation.engines.TranslationEngine
+# subclass and its keyword arguments. GlossaryEngine translates offline from
+# a fixed glossary (tests, benchmarks, CI).
+TRANSLATION_ENGINE = {
+    'BACKEND': config('TRANSLATION_ENGINE', default='translation.engines.MyMemoryEngine'),
+    'OPTIONS': {},
+}
+
+# Metrics: per-stage request timing, in-process histograms and counters
+# served in the Prometheus text format at /metrics/ (one set per worker
+# process), and a Server-Timing header on every response. /metrics/ and the
+# /status/ endpoints are staff only: scrape with a staff user's token
+# (Authorization: Token <key>)
+METRICS = {
+    'ENABLED': config('METRICS_ENABLED', default=False, cast=bool),
+    'SERVER_TIMING': config('METRICS_SERVER_TIMING', default=True, cast=bool),
+}
+
+# Medical lexicons: one per source language, compiled from SOURCE into
+# COMPILED_DIR and memory-mapped on first use. Each worker keeps at most
+# MAX_LANGUAGES loaded (least recently used dropped first); input without a
+# known source language is checked against DEFAULT_LANGUAGE
+MEDICAL_LEXICON = {
+    'SOURCE': config('MEDICAL_LEXICON_SOURCE', default=str(BASE_DIR / 'translation' / 'data' / 'medical_terms.json')),
+    'COMPILED_DIR': config('MEDICAL_LEXICON_COMPILED_DIR', default=str(BASE_DIR / 'translation' / 'data')),
+    'MAX_LANGUAGES': config('MEDICAL_LEXICON_MAX_LANGUAGES', default=4, cast=int),
+    'DEFAULT_LANGUAGE': config('MEDICAL_LEXICON_DEFAULT_LANGUAGE', default='en'),
+}
+
+# Batch translation: request size limit and upstream fan-out per request
+BATCH_TRANSLATION = {
+    'MAX_SEGMENTS': config('BATCH_TRANSLATION_MAX_SEGMENTS', default=200, cast=int),
+    'MAX_WORKERS': config('BATCH_TRANSLATION_MAX_WORKERS', default=8, cast=int),
+}
+
+# Long texts are split into sentence chunks of at most MAX_CHARS characters
+# (or the engine's max_segment_length, if lower) and translated concurrently;
+# chunks also stay within the engine's max_segment_bytes of UTF-8, which
+# MyMemory sets to 500, so non-Latin text is split into shorter chunks
+TEXT_CHUNKING = {
+    'MAX_CHARS': config('TEXT_CHUNKING_MAX_CHARS', default=450, cast=int),
+    'MAX_WORKERS': config('TEXT_CHUNKING_MAX_WORKERS', default=4, cast=int),
+}
+
+# Single-flight: identical upstream calls in flight at the same time share
+# one request, whether they come from sync or async views. SHARED extends this across workers with a lock in the
+# CACHE_ALIAS cache (needs an atomic cache.add, e.g. Redis or Memcached);
+# waiters give up after WAIT_TIMEOUT seconds and call MyMemory themselves.
+SINGLE_FLIGHT = {
+    'ENABLED': config('SINGLE_FLIGHT_ENABLED', default=True, cast=bool),
+    'SHARED': config('SINGLE_FLIGHT_SHARED', default=False, cast=bool),
+    'CACHE_ALIAS': config('SINGLE_FLIGHT_CACHE_ALIAS', default='default'),
+    'LOCK_TTL': config('SINGLE_FLIGHT_LOCK_TTL', default=10, cast=int),
+    'WAIT_TIMEOUT': config('SINGLE_FLIGHT_WAIT_TIMEOUT', default=5.0, cast=float),
+    'POLL_INTERVAL': config('SINGLE_FLIGHT_POLL_INTERVAL', default=0.05, cast=float),
+}
+
+# Language detection: the local detector answers when it is at least this
+# confident, otherwise MyMemory's auto-detection is asked (if enabled)
+LANGUAGE_DETECTION = {
+    'MIN_CONFIDENCE': config('LANGUAGE_DETECTION_MIN_CONFIDENCE', default=0.5, cast=float),
+    'REMOTE_FALLBACK': config('LANGUAGE_DETECTION_REMOTE_FALLBACK', default=True, cast=bool),
+}
+
+# Cache framework: the shared tier of the translation, detection and token
+# caches. The default LocMemCache lives inside each process, so with it every
+# tiered cache is two per-worker tiers: workers do not share translations,
+# and token invalidations do not reach other workers (see AUTH_TOKEN_CACHE).
+# Deployments with more than one worker should point CACHE_BACKEND at a
+# networked backend (Redis, Memcached) to share it. Avoid FileBasedCache
+# here: it lists its whole directory on every set.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='medical-translator'),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=3600, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int),
+        },
+    }
+}
+
+# Per-worker LRU tier in front of the shared cache
+TRANSLATION_CACHE = {
+    'ENABLED': config('TRANSLATION_CACHE_ENABLED', default=True, cast=bool),
+    'LOCAL_MAX_ENTRIES': config('TRANSLATION_CACHE_LOCAL_MAX_ENTRIES', default=2048, cast=int),
+    'LOCAL_TTL': config('TRANSLATION_CACHE_LOCAL_TTL', default=300, cast=int),
+    'SHARED_TTL': config('TRANSLATION_CACHE_SHARED_TTL', default=3600, cast=int),
+    'SHARED_ALIAS': 'default',
+}
+
+# Token authentication caches token -> user resolutions for a short time. A
+# logout or user change drops the entry at once from this worker and the
+# shared tier; other workers' local tiers keep it for at most LOCAL_TTL
+# seconds. The shared tier (SHARED_TTL) is only used with a cache shared
+# between workers: with the per-process LocMemCache it is skipped, since a
+# delete there would not reach the other workers' copies.
+AUTH_TOKEN_CACHE = {
+    'ENABLED': config('AUTH_TOKEN_CACHE_ENABLED', default=True, cast=bool),
+    'LOCAL_MAX_ENTRIES': config('AUTH_TOKEN_CACHE_LOCAL_MAX_ENTRIES', default=10000, cast=int),
+    'LOCAL_TTL': config('AUTH_TOKEN_CACHE_LOCAL_TTL', default=5, cast=int),
+    'SHARED_TTL': config('AUTH_TOKEN_CACHE_SHARED_TTL', default=60, cast=int),
+    'SHARED_ALIAS': 'default',
+}
+
+# Translation memory: reuse earlier translations of the same segment
+TRANSLATION_MEMORY_ENABLED = config('TRANSLATION_MEMORY_ENABLED', default=True, cast=bool)
+TRANSLATION_MEMORY_MAX_AGE_DAYS = config('TRANSLATION_MEMORY_MAX_AGE_DAYS', default=180, cast=int)
+TRANSLATION_MEMORY_MAX_ENTRIES = config('TRANSLATION_MEMORY_MAX_ENTRIES', default=500000, cast=int)
+
 # Security Settings
 SECURE_SSL_REDIRECT = False  # Set to True in production
 SECURE_HSTS_SECONDS = 31536000
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Translation
+from .models import Translation, TranslationMemory
 
 # Register your models here.
-admin.site.register(Translation)
\ No newline at end of file
+admin.site.register(Translation)
+admin.site.register(TranslationMemory)
\ No newline at end of file
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class TranslationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'translation'
+
+    def ready(self):
+        # Connects the signals that keep the token cache in step with logouts
+        # and user changes
+        from . import authentication  # noqa: F401
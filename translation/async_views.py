@@ -0,0 +1,133 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import services, write_behind
+from .authentication import TokenAuthentication
+from .language_detection import adetect_language
+from .medical_utils import MedicalTerminologyValidator
+from .services import TranslationServiceError
+from .upstream import CircuitOpenError, UpstreamError
+
+
+async def authenticate_token(request):
+    """
+    Resolve an 'Authorization: Token <key>' header to an active user, or None.
+    Goes through TokenAuthentication, so warm tokens come from the token cache
+    like they do for the sync views.
+    """
+    keyword, _, key = request.headers.get('Authorization', '').partition(' ')
+    if keyword != 'Token' or not key.strip():
+        return None
+    try:
+        user, token = await sync_to_async(TokenAuthentication().authenticate_credentials)(key.strip())
+    except AuthenticationFailed:
+        return None
+    return user
+
+
+def analyze_terms(text: str, language: str) -> dict:
+    """Medical term analysis of text against the language's lexicon"""
+    return MedicalTerminologyValidator(language).analyze(text)
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of DRF's APIView for the ASGI deployment:
+    token-authenticated, JSON in and out, CSRF exempt like DRF token views.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await authenticate_token(request)
+        if request.user is None:
+            return JsonResponse({
+                'detail': 'Authentication credentials were not provided.'
+            }, status=401)
+        try:
+            request.data = json.loads(request.body or b'{}') \
+                if request.content_type == 'application/json' else request.POST
+        except ValueError:
+            return JsonResponse({'error': 'Malformed JSON'}, status=400)
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncTranslateView(AsyncAPIView):
+    """
+    Async API endpoint for creating a translation. Same contract as
+    TranslateView.post, but waiting on MyMemory does not hold a worker.
+    """
+
+    async def post(self, request):
+        text = request.data.get('text')
+        source_lang = request.data.get('source_lang')
+        target_lang = request.data.get('target_lang')
+
+        if not all([text, target_lang]):
+            return JsonResponse({
+                'error': 'Please provide text and target language'
+            }, status=400)
+
+        try:
+            result = await services.atranslate(text, source_lang, target_lang)
+
+            # Validate medical terms against the source language's lexicon;
+            # fuzzy matching is CPU work, so it runs off the event loop
+            analysis = await sync_to_async(analyze_terms, thread_sensitive=False)(
+                text, result['source_language']
+            )
+            suggestions = analysis['suggestions']
+
+            await sync_to_async(write_behind.record_translation)(
+                user=request.user,
+                original_text=text,
+                translated_text=result['translated_text'],
+                source_language=result['source_language'],
+                target_language=target_lang,
+                medical_terms=analysis
+            )
+
+            data = {
+                'translated_text': result['translated_text'],
+                'detected_language': result['source_language'],
+                'medical_suggestions': suggestions if suggestions else [],
+                'from_cache': result['from_cache'],
+                'from_memory': result['from_memory']
+            }
+            if 'chunks' in result:
+                data['chunks'] = result['chunks']
+            return JsonResponse(data)
+
+        except (UpstreamError, TranslationServiceError) as e:
+            response = JsonResponse({
+                'error': 'Translation service error'
+            }, status=503)
+            if isinstance(e, CircuitOpenError):
+                response['Retry-After'] = str(int(e.retry_after) + 1)
+            return response
+        except Exception as e:
+            return JsonResponse({
+                'error': str(e)
+            }, status=500)
+
+
+class AsyncDetectLanguageView(AsyncAPIView):
+    """
+    Async API endpoint for language detection
+    """
+
+    async def post(self, request):
+        text = request.data.get('text')
+        if not text:
+            return JsonResponse({'error': 'Please provide text'}, status=400)
+
+        language, confidence = await adetect_language(text)
+        return JsonResponse({'language': language, 'confidence': confidence})
@@ -0,0 +1,87 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from rest_framework import authentication
+from rest_framework.authtoken.models import Token
+
+from . import metrics
+from .cache import token_cache
+
+
+# Fields the token cache never stores: secrets, and data authentication
+# does not need. The token key comes from the request instead.
+_UNCACHED_FIELDS = frozenset(['password', 'last_login', 'key'])
+
+
+def token_cache_key(key: str) -> str:
+    # Raw tokens never end up in a cache (a shared backend may persist them)
+    return f"{token_cache.prefix}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
+def _snapshot(instance) -> dict:
+    # Left-out fields load on access, like deferred ones
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in _UNCACHED_FIELDS
+    }
+
+
+def _restore(model, values: dict):
+    # from_db() takes a subset of fields in model field order
+    names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db('default', names, [values[name] for name in names])
+
+
+class TokenAuthentication(authentication.TokenAuthentication):
+    """
+    DRF token authentication, timed as the 'auth' stage.
+
+    Successful token -> user resolutions are kept in the token cache (a
+    per-worker LRU in front of the shared cache, see AUTH_TOKEN_CACHE), so a
+    warm request does no query at all. Entries are field snapshots without
+    the password hash or token key: every request gets its own User and
+    Token instances. Deleting the token (logout) or saving or deleting the
+    user drops the entry from this worker and the shared tier at once;
+    other workers may still accept it from their local tier for up to
+    LOCAL_TTL seconds. A shared tier that is not shared between workers
+    (LocMemCache) is skipped, so that bound holds there too.
+    """
+
+    def authenticate(self, request):
+        with metrics.timed('auth'):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        cached = token_cache.get(cache_key)
+        if cached is not None:
+            user_values, token_values = cached
+            user = _restore(get_user_model(), user_values)
+            token = _restore(Token, {**token_values, 'key': key})
+            token.user = user
+            return user, token
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(cache_key, (_snapshot(user), _snapshot(token)))
+        return user, token
+
+
+def invalidate_token(key: str):
+    token_cache.delete(token_cache_key(key))
+
+
+def _token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+def _user_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+post_delete.connect(_token_deleted, sender=Token, dispatch_uid='token_cache_token_deleted')
+post_save.connect(_user_changed, sender=get_user_model(), dispatch_uid='token_cache_user_changed')
@@ -0,0 +1,218 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .translation_memory import text_hash
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded, thread-safe in-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._data),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+class TieredCache:
+    """
+    Two-tier cache: a per-worker LRU in front of a Django cache shared by all
+    workers. Shared hits are copied into the local tier.
+
+    With require_shared, a shared tier that lives in this process
+    (LocMemCache) is skipped: it would share nothing, and a delete in one
+    worker would not reach the copies other workers keep for shared_ttl.
+    """
+
+    def __init__(self, prefix: str, local_max_entries: int, local_ttl: float,
+                 shared_ttl: float, shared_alias: str = 'default', enabled: bool = True,
+                 require_shared: bool = False):
+        self.prefix = prefix
+        self.enabled = enabled
+        self.require_shared = require_shared
+        self.local = LRUCache(local_max_entries, local_ttl)
+        self.shared_ttl = shared_ttl
+        self.shared_alias = shared_alias
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _shared_tier(self):
+        """The shared cache, or None when it is skipped"""
+        shared = self.shared
+        if self.require_shared and isinstance(shared, LocMemCache):
+            return None
+        return shared
+
+    def make_key(self, text: str, *parts) -> str:
+        return ':'.join([self.prefix, text_hash(text), *parts])
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        shared = self._shared_tier()
+        if shared is None:
+            return default
+
+        try:
+            value = shared.get(key, _MISSING)
+        except Exception as e:
+            # A broken shared tier must never fail the request
+            self.shared_errors += 1
+            print(f"Shared cache error: {str(e)}")
+            return default
+        if value is _MISSING:
+            self.shared_misses += 1
+            return default
+        self.shared_hits += 1
+        self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        self.local.set(key, value)
+        shared = self._shared_tier()
+        if shared is None:
+            return
+        try:
+            shared.set(key, value, self.shared_ttl)
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"Shared cache error: {str(e)}")
+
+    def delete(self, key):
+        self.local.delete(key)
+        shared = self._shared_tier()
+        if shared is None:
+            return
+        try:
+            shared.delete(key)
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"Shared cache error: {str(e)}")
+
+    def clear(self):
+        """Drop the local tier; the shared tier is cleared through Django"""
+        self.local.clear()
+
+    def stats(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'local': self.local.stats(),
+            'shared': {
+                'alias': self.shared_alias,
+                'skipped': self._shared_tier() is None,
+                'hits': self.shared_hits,
+                'misses': self.shared_misses,
+                'errors': self.shared_errors,
+            },
+        }
+
+
+def _build(prefix: str) -> TieredCache:
+    options = settings.TRANSLATION_CACHE
+    return TieredCache(
+        prefix,
+        local_max_entries=options['LOCAL_MAX_ENTRIES'],
+        local_ttl=options['LOCAL_TTL'],
+        shared_ttl=options['SHARED_TTL'],
+        shared_alias=options['SHARED_ALIAS'],
+        enabled=options['ENABLED'],
+    )
+
+
+translation_cache = _build('translation')
+detection_cache = _build('detection')
+
+
+def _build_token_cache() -> TieredCache:
+    options = settings.AUTH_TOKEN_CACHE
+    return TieredCache(
+        'auth-token',
+        local_max_entries=options['LOCAL_MAX_ENTRIES'],
+        local_ttl=options['LOCAL_TTL'],
+        shared_ttl=options['SHARED_TTL'],
+        shared_alias=options['SHARED_ALIAS'],
+        enabled=options['ENABLED'],
+        # A revoked token must not outlive LOCAL_TTL in any worker
+        require_shared=True,
+    )
+
+
+token_cache = _build_token_cache()
+
+
+def stats() -> dict:
+    """Counters for every tiered cache in this worker"""
+    return {
+        'translation': translation_cache.stats(),
+        'detection': detection_cache.stats(),
+        'auth_token': token_cache.stats(),
+    }
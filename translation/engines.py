@@ -0,0 +1,211 @@
+import json
+import os
+import re
+import threading
+from typing import Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .upstream import get_async_client, get_client
+
+GLOSSARY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'glossary.json')
+
+
+class TranslationServiceError(Exception):
+    """The translation service answered, but without a translation"""
+
+
+class TranslationEngine:
+    """
+    Interface of a translation backend.
+
+    Capabilities:
+        supports_batch      translate_batch() translates many segments in one
+                            call (otherwise it loops over translate())
+        supports_detect     detect() asks the provider for the source language
+        max_segment_length  longest text, in characters, one call accepts
+                            (None for no limit); longer texts are chunked
+        max_segment_bytes   longest text, in UTF-8 bytes, one call accepts
+                            (None for no limit); longer texts are chunked
+
+    translate() raises UpstreamError when the provider cannot be reached and
+    TranslationServiceError when it answers without a translation.
+    """
+    name = None
+    supports_batch = False
+    supports_detect = False
+    max_segment_length = None
+    max_segment_bytes = None
+
+    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        raise NotImplementedError
+
+    async def atranslate(self, text: str, source_lang: str, target_lang: str) -> str:
+        return await sync_to_async(self.translate, thread_sensitive=False)(text, source_lang, target_lang)
+
+    def translate_batch(self, texts, source_lang: str, target_lang: str) -> list:
+        return [self.translate(text, source_lang, target_lang) for text in texts]
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        raise NotImplementedError(f"{self.name} engine does not detect languages")
+
+    async def adetect(self, text: str) -> Tuple[str, float]:
+        return await sync_to_async(self.detect, thread_sensitive=False)(text)
+
+    def capabilities(self) -> dict:
+        return {
+            'engine': self.name,
+            'batch': self.supports_batch,
+            'detect': self.supports_detect,
+            'max_segment_length': self.max_segment_length,
+            'max_segment_bytes': self.max_segment_bytes,
+        }
+
+
+class MyMemoryEngine(TranslationEngine):
+    """MyMemory /get API through the pooled, guarded upstream clients"""
+    name = 'mymemory'
+    supports_detect = True
+    # MyMemory rejects queries over 500 bytes of UTF-8; a character takes
+    # one to four, so Arabic or CJK text hits the byte limit first
+    max_segment_length = 500
+    max_segment_bytes = 500
+
+    def __init__(self, url: str = None):
+        self._url = url
+
+    @property
+    def url(self) -> str:
+        return self._url or settings.MYMEMORY_URL
+
+    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        response = get_client().get(self.url, params=self._params(text, source_lang, target_lang))
+        return self._translation(response.json())
+
+    async def atranslate(self, text: str, source_lang: str, target_lang: str) -> str:
+        response = await get_async_client().get(self.url, params=self._params(text, source_lang, target_lang))
+        return self._translation(response.json())
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        response = get_client().get(self.url, params=self._detect_params(text))
+        return self._detection(response.json())
+
+    async def adetect(self, text: str) -> Tuple[str, float]:
+        response = await get_async_client().get(self.url, params=self._detect_params(text))
+        return self._detection(response.json())
+
+    @staticmethod
+    def _params(text: str, source_lang: str, target_lang: str) -> dict:
+        return {
+            'q': text,
+            'langpair': f"{source_lang}|{target_lang}"
+        }
+
+    @staticmethod
+    def _translation(data: dict) -> str:
+        if data['responseStatus'] != 200:
+            raise TranslationServiceError(data.get('responseDetails') or 'Translation service error')
+        return data['responseData']['translatedText']
+
+    @staticmethod
+    def _detect_params(text: str) -> dict:
+        # MyMemory reports the detected language of an auto|xx translation
+        return {
+            'q': text[:100],  # Use first 100 chars for detection
+            'langpair': 'auto|en'  # Target language doesn't matter for detection
+        }
+
+    @staticmethod
+    def _detection(data: dict) -> Tuple[str, float]:
+        if data['responseStatus'] == 200:
+            return data['responseData']['detectedLanguage'], 1.0  # MyMemory doesn't provide confidence score
+        return 'en', 0.0  # Default to English if detection fails
+
+
+class GlossaryEngine(TranslationEngine):
+    """
+    Deterministic offline engine: phrase-by-phrase glossary substitution.
+
+    The longest glossary phrase at each position is replaced (keeping a
+    leading capital); words without an entry are kept as they are. No
+    network, no randomness, so tests, benchmarks and CI get the same output
+    every run. Glossaries map "src|tgt" pairs to {phrase: translation}.
+    """
+    name = 'glossary'
+    supports_batch = True
+
+    _TOKEN = re.compile(r"\w+(?:['’]\w+)*|\s+|[^\w\s]", re.UNICODE)
+
+    def __init__(self, glossary=None, path: str = GLOSSARY_FILE):
+        if glossary is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                glossary = json.load(f)
+        self.glossaries = {}
+        for pair, entries in glossary.items():
+            phrases = {}
+            for phrase, translation in entries.items():
+                phrases[tuple(phrase.lower().split())] = translation
+            longest = max((len(words) for words in phrases), default=0)
+            self.glossaries[pair] = (phrases, longest)
+
+    async def atranslate(self, text: str, source_lang: str, target_lang: str) -> str:
+        return self.translate(text, source_lang, target_lang)
+
+    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        if source_lang == target_lang:
+            return text
+        glossary = self.glossaries.get(f"{source_lang}|{target_lang}")
+        if glossary is None:
+            raise TranslationServiceError(f"No glossary for {source_lang}|{target_lang}")
+        phrases, longest = glossary
+
+        tokens = self._TOKEN.findall(text)
+        words = [i for i, token in enumerate(tokens) if token[0].isalnum() or token[0] == '_']
+        out = []
+        position = 0  # index into tokens
+        w = 0  # index into words
+        while w < len(words):
+            for size in range(min(longest, len(words) - w), 0, -1):
+                span = words[w:w + size]
+                # A phrase only spans words separated by plain whitespace
+                if any(not tokens[j].isspace() for k in range(len(span) - 1)
+                       for j in range(span[k] + 1, span[k + 1])):
+                    continue
+                key = tuple(tokens[i].lower() for i in span)
+                translation = phrases.get(key)
+                if translation is not None:
+                    out.extend(tokens[position:span[0]])
+                    if tokens[span[0]][0].isupper():
+                        translation = translation[:1].upper() + translation[1:]
+                    out.append(translation)
+                    position = span[-1] + 1
+                    w += size
+                    break
+            else:
+                w += 1
+        out.extend(tokens[position:])
+        return ''.join(out)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> TranslationEngine:
+    """Return the process-wide engine configured in TRANSLATION_ENGINE"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                options = settings.TRANSLATION_ENGINE
+                _engine = import_string(options['BACKEND'])(**options.get('OPTIONS', {}))
+    return _engine
+
+
+def reset_engine():
+    """Drop the engine so the next call picks up new settings"""
+    global _engine
+    with _engine_lock:
+        _engine = None
@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+import zlib
+
+from django.conf import settings
+
+from .models import Translation
+
+FIELDS = ('id', 'user__username', 'original_text', 'translated_text', 'source_language',
+          'target_language', 'medical_terms', 'is_favorite', 'created_at')
+COLUMNS = ('id', 'username', 'original_text', 'translated_text', 'source_language',
+           'target_language', 'medical_terms', 'is_favorite', 'created_at')
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/jsonl',
+    'csv': 'text/csv',
+}
+# Rendered rows are handed on in pieces of about this many bytes
+WRITE_SIZE = 64 * 1024
+
+
+def export_queryset(user=None, organization: str = None):
+    """Translations of one user or of every member of an organization, oldest first"""
+    queryset = Translation.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    if organization is not None:
+        queryset = queryset.filter(user__organization=organization)
+    return queryset.order_by('created_at', 'id')
+
+
+def iter_rows(queryset, chunk_size: int = None):
+    """
+    Yield export rows as tuples in COLUMNS order. Rows are fetched chunk_size
+    at a time through a server-side cursor (where the database has them), so
+    memory stays flat however many rows there are.
+    """
+    if chunk_size is None:
+        chunk_size = settings.TRANSLATION_EXPORT['CHUNK_SIZE']
+    for row in queryset.values_list(*FIELDS).iterator(chunk_size=chunk_size):
+        yield row[:-1] + (row[-1].isoformat(),)
+
+
+def _buffered(lines):
+    """Join rendered lines into WRITE_SIZE pieces of UTF-8"""
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= WRITE_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def render_jsonl(rows):
+    """One JSON object per line"""
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    return _buffered(dumps(dict(zip(COLUMNS, row))) + '\n' for row in rows)
+
+
+def render_csv(rows):
+    """CSV with a header row; medical_terms is written as JSON"""
+    def lines():
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(COLUMNS)
+        terms = COLUMNS.index('medical_terms')
+        for row in rows:
+            row = list(row)
+            row[terms] = json.dumps(row[terms], ensure_ascii=False)
+            writer.writerow(row)
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+
+    return _buffered(lines())
+
+
+def gzip_stream(chunks, level: int = 6):
+    """Compress a stream of byte strings into one gzip member on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(queryset, export_format: str = 'jsonl', compress: bool = False, chunk_size: int = None):
+    """Yield the export of queryset as bytes, gzip-compressed if asked"""
+    if export_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    render = render_jsonl if export_format == 'jsonl' else render_csv
+    stream = render(iter_rows(queryset, chunk_size))
+    return gzip_stream(stream) if compress else stream
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+FILTER_KEYS = ('source_lang', 'target_lang', 'favorites', 'created_after', 'created_before')
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+def filter_history(queryset, params):
+    """
+    Apply the history filters (source_lang, target_lang, favorites,
+    created_after, created_before) found in params; raises ValueError for a
+    malformed date
+    """
+    if params.get('source_lang'):
+        queryset = queryset.filter(source_language=params['source_lang'])
+    if params.get('target_lang'):
+        queryset = queryset.filter(target_language=params['target_lang'])
+    if str(params.get('favorites', '')).lower() in TRUE_VALUES:
+        queryset = queryset.filter(is_favorite=True)
+    if params.get('created_after'):
+        queryset = queryset.filter(created_at__gte=parse_date_param(params['created_after']))
+    if params.get('created_before'):
+        # A bare date includes that whole day
+        value = params['created_before']
+        bound = parse_date_param(value)
+        if parse_date(value) is not None:
+            queryset = queryset.filter(created_at__lt=bound + timedelta(days=1))
+        else:
+            queryset = queryset.filter(created_at__lte=bound)
+    return queryset
+
+
+def check_filters(params: dict):
+    """
+    Raise ValueError unless every key of params is a history filter that
+    narrows the selection: no unknown keys, no empty values, favorites only
+    as true. For callers that act on whatever the filters match, where a
+    filter silently ignored would widen the selection.
+    """
+    unknown = sorted(set(params) - set(FILTER_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown filter: {', '.join(unknown)}")
+    for key, value in params.items():
+        if value is None or value == '' or isinstance(value, (bool, list, dict)) and not value:
+            raise ValueError(f"Filter {key} is empty")
+    if 'favorites' in params and str(params['favorites']).lower() not in TRUE_VALUES:
+        raise ValueError("Filter favorites only accepts true")
+    for key in ('created_after', 'created_before'):
+        if key in params:
+            parse_date_param(str(params[key]))
+
+
+def parse_date_param(value: str):
+    """Parse an ISO date or datetime into an aware datetime"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError
+            parsed = datetime(day.year, day.month, day.day)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class HistoryFilterMixin:
+    """
+    Query-parameter filters shared by the history list, search and export
+    """
+
+    def filter_history(self, queryset, params):
+        """Apply the history filters; raises ValueError for a malformed date"""
+        return filter_history(queryset, params)
@@ -1,28 +1,218 @@
-import requests
+import json
+import math
+import os
+import threading
+from bisect import bisect_right
+from collections import Counter
 from typing import Tuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from . import metrics
+from .cache import detection_cache
+from .engines import get_engine
 
-def detect_language(text: str) -> Tuple[str, float]:
+SAMPLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'language_samples.json')
+
+# (first code point, last code point, script)
+_SCRIPT_RANGES = sorted([
+    (0x0041, 0x005A, 'Latin'), (0x0061, 0x007A, 'Latin'),
+    (0x00C0, 0x024F, 'Latin'), (0x1E00, 0x1EFF, 'Latin'),
+    (0x0370, 0x03FF, 'Greek'),
+    (0x0400, 0x04FF, 'Cyrillic'),
+    (0x0590, 0x05FF, 'Hebrew'),
+    (0x0600, 0x06FF, 'Arabic'), (0x0750, 0x077F, 'Arabic'),
+    (0xFB50, 0xFDFF, 'Arabic'), (0xFE70, 0xFEFF, 'Arabic'),
+    (0x0900, 0x097F, 'Devanagari'),
+    (0x0E00, 0x0E7F, 'Thai'),
+    (0x1100, 0x11FF, 'Hangul'), (0x3130, 0x318F, 'Hangul'), (0xAC00, 0xD7AF, 'Hangul'),
+    (0x3040, 0x309F, 'Kana'), (0x30A0, 0x30FF, 'Kana'),
+    (0x3400, 0x4DBF, 'Han'), (0x4E00, 0x9FFF, 'Han'),
+])
+_SCRIPT_STARTS = [start for start, _, _ in _SCRIPT_RANGES]
+
+# Scripts that identify a supported language on their own
+SCRIPT_LANGUAGES = {
+    'Greek': 'el',
+    'Cyrillic': 'ru',
+    'Hebrew': 'he',
+    'Arabic': 'ar',
+    'Devanagari': 'hi',
+    'Thai': 'th',
+    'Hangul': 'ko',
+    'Kana': 'ja',
+    'Han': 'zh',
+}
+
+PROFILE_SIZE = 400
+# Below this many trigrams a Latin-script guess is scaled down
+MIN_TRIGRAMS = 24
+
+
+def script_of(char: str):
+    """Return the script name of a character, or None for digits, punctuation etc."""
+    code_point = ord(char)
+    i = bisect_right(_SCRIPT_STARTS, code_point) - 1
+    if i >= 0 and code_point <= _SCRIPT_RANGES[i][1]:
+        return _SCRIPT_RANGES[i][2]
+    return None
+
+
+def script_histogram(text: str) -> Counter:
+    """Count the letters of text per script"""
+    histogram = Counter()
+    for char in text:
+        script = script_of(char)
+        if script:
+            histogram[script] += 1
+    return histogram
+
+
+def _trigrams(text: str) -> Counter:
+    grams = Counter()
+    for word in text.lower().split():
+        word = ''.join(char for char in word if char.isalpha())
+        if word:
+            padded = f" {word} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramLanguageClassifier:
+    """Character-trigram profile classifier (cosine similarity) for Latin-script languages"""
+
+    def __init__(self, samples: dict, profile_size: int = PROFILE_SIZE):
+        self.profiles = {}
+        for code, text in samples.items():
+            profile = dict(_trigrams(text).most_common(profile_size))
+            norm = math.sqrt(sum(count * count for count in profile.values()))
+            self.profiles[code] = (profile, norm)
+
+    def scores(self, text: str) -> dict:
+        grams = _trigrams(text)
+        norm = math.sqrt(sum(count * count for count in grams.values()))
+        if not norm:
+            return {code: 0.0 for code in self.profiles}
+        return {
+            code: sum(count * profile.get(gram, 0) for gram, count in grams.items()) / (norm * profile_norm)
+            for code, (profile, profile_norm) in self.profiles.items()
+        }
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """
+        Return (language_code, confidence). Confidence is the margin of the
+        best profile over the runner-up, scaled down for very short inputs.
+        """
+        scores = sorted(self.scores(text).items(), key=lambda item: item[1], reverse=True)
+        (best, best_score), (_, second_score) = scores[0], scores[1]
+        if best_score <= 0:
+            return best, 0.0
+        trigram_count = sum(_trigrams(text).values())
+        margin = 1.0 - second_score / best_score
+        return best, min(1.0, margin * 2.5) * min(1.0, trigram_count / MIN_TRIGRAMS)
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> TrigramLanguageClassifier:
+    """Return the process-wide classifier, building the profiles on first use"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                with open(SAMPLES_FILE, 'r', encoding='utf-8') as f:
+                    _classifier = TrigramLanguageClassifier(json.load(f))
+    return _classifier
+
+
+def detect_language_local(text: str) -> Tuple[str, float]:
     """
-    Detect the language of the input text using the Google Cloud Translation API.
+    Detect the language of the input text without any network call.
+    A script histogram settles non-Latin scripts; Latin text goes through the
+    trigram classifier. Returns a tuple of (language_code, confidence_score).
+    """
+    histogram = script_histogram(text)
+    letters = sum(histogram.values())
+    if not letters:
+        return 'en', 0.0
+
+    script, count = histogram.most_common(1)[0]
+    if script in ('Han', 'Kana') and histogram['Kana']:
+        # Japanese mixes kanji with kana; Chinese has no kana at all
+        return 'ja', (histogram['Han'] + histogram['Kana']) / letters
+    if script != 'Latin':
+        return SCRIPT_LANGUAGES[script], count / letters
+
+    language, confidence = get_classifier().classify(text)
+    return language, confidence * count / letters
+
+
+def detect_language_remote(text: str) -> Tuple[str, float]:
+    """
+    Detect the language through the translation engine's auto-detection.
     Returns a tuple of (language_code, confidence_score).
     """
     try:
-        # For demo purposes, we'll use a simpler approach with the MyMemory API's language detection
-        url = "https://api.mymemory.translated.net/get"
-        params = {
-            'q': text[:100],  # Use first 100 chars for detection
-            'langpair': 'auto|en'  # Target language doesn't matter for detection
-        }
-        
-        response = requests.get(url, params=params)
-        data = response.json()
-        
-        if data['responseStatus'] == 200:
-            detected_lang = data['responseData']['detectedLanguage']
-            return detected_lang, 1.0  # MyMemory doesn't provide confidence score
-            
-        return 'en', 0.0  # Default to English if detection fails
-        
+        return get_engine().detect(text)
+    except Exception as e:
+        print(f"Language detection error: {str(e)}")
+        return 'en', 0.0  # Default to English on error
+
+
+async def adetect_language_remote(text: str) -> Tuple[str, float]:
+    """Async variant of detect_language_remote"""
+    try:
+        return await get_engine().adetect(text)
     except Exception as e:
         print(f"Language detection error: {str(e)}")
         return 'en', 0.0  # Default to English on error
+
+
+def _use_remote(options: dict, confidence: float) -> bool:
+    return (confidence < options['MIN_CONFIDENCE'] and options['REMOTE_FALLBACK']
+            and get_engine().supports_detect)
+
+
+def detect_language(text: str) -> Tuple[str, float]:
+    """
+    Detect the language of the input text, locally when the local detector is
+    confident enough and through the translation engine otherwise.
+    Returns a tuple of (language_code, confidence_score).
+    """
+    with metrics.timed('detect'):
+        cache_key = detection_cache.make_key(text[:500])
+        cached = detection_cache.get(cache_key)
+        if cached is not None:
+            return tuple(cached)
+
+        options = settings.LANGUAGE_DETECTION
+        result = detect_language_local(text[:500])
+        if _use_remote(options, result[1]):
+            remote = detect_language_remote(text)
+            if remote[1] > result[1]:
+                result = remote
+
+        if result[1] > 0:
+            detection_cache.set(cache_key, result)
+        return result
+
+
+async def adetect_language(text: str) -> Tuple[str, float]:
+    """Async variant of detect_language; the remote fallback does not block a thread"""
+    with metrics.timed('detect'):
+        cache_key = detection_cache.make_key(text[:500])
+        cached = await sync_to_async(detection_cache.get)(cache_key)
+        if cached is not None:
+            return tuple(cached)
+
+        options = settings.LANGUAGE_DETECTION
+        result = detect_language_local(text[:500])
+        if _use_remote(options, result[1]):
+            remote = await adetect_language_remote(text)
+            if remote[1] > result[1]:
+                result = remote
+
+        if result[1] > 0:
+            await sync_to_async(detection_cache.set)(cache_key, result)
+        return result
@@ -0,0 +1,584 @@
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from difflib import SequenceMatcher
+
+from django.conf import settings
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_SOURCE = os.path.join(DATA_DIR, 'medical_terms.json')
+
+# Compiled file layout, all integers native-endian uint32:
+#   header         magic, version, term count, char key count, longest term length
+#   term_offsets   term_count + 1 byte offsets into the term blob
+#   char_offsets   char_count + 1 byte offsets into the char key blob
+#   term blob      UTF-8 terms, sorted bytewise
+#   char key blob  char keys (see _char_key), sorted bytewise
+#   char bitmaps   one per char key, in key order
+#   length bitmaps one per length, 0 to the longest term's
+# A bitmap (see _bitmap) takes (term_count + 7) // 8 bytes.
+MAGIC = b'MTLX'
+VERSION = 2
+_HEADER = struct.Struct('=4sIIII')
+
+
+def _char_tokens(word: str) -> list:
+    """
+    The characters of word as (character, k) tokens, k counting that
+    character's occurrences: two strings share as many tokens as quick_ratio
+    counts matching characters.
+    """
+    return [(char, k) for char, count in Counter(word).items() for k in range(1, count + 1)]
+
+
+def _char_key(char: str, k: int) -> bytes:
+    # UTF-8 is prefix-free, so the key decodes back to one (char, k)
+    return char.encode('utf-8') + k.to_bytes(4, 'big')
+
+
+def _length_bounds(length: int, threshold: float) -> tuple:
+    """
+    Term lengths that can reach threshold against a word of this length:
+    ratio = 2*M / (len(a) + len(b)) and M <= min(len(a), len(b)). Widened a
+    little, so a term right on the bar is not lost to rounding.
+    """
+    return (max(0.0, threshold * length / (2.0 - threshold) - 1e-9),
+            (2.0 - threshold) * length / threshold + 1e-9)
+
+
+def _bitmap(term_ids, term_count: int) -> bytearray:
+    """A set of term ids as little-endian bits, bit i standing for term i"""
+    bits = bytearray((term_count + 7) // 8)
+    for term_id in term_ids:
+        bits[term_id >> 3] |= 1 << (term_id & 7)
+    return bits
+
+
+def _bit_count_planes(bitmaps) -> list:
+    """
+    Add up bitmaps bitwise: bit i of plane j is bit j of the number of
+    bitmaps holding bit i, so one pass counts every term at once.
+    """
+    planes = []
+    for carry in bitmaps:
+        j = 0
+        while carry:
+            if j == len(planes):
+                planes.append(carry)
+                break
+            planes[j], carry = planes[j] ^ carry, planes[j] & carry
+            j += 1
+    return planes
+
+
+def _bits_equal(planes: list, count: int, among: int) -> int:
+    """The bits of among whose count in planes is exactly count"""
+    if count >> len(planes):
+        return 0
+    for j, plane in enumerate(planes):
+        among &= plane if count >> j & 1 else ~plane
+    return among
+
+
+def _bit_ids(bits: int):
+    """Ids of the set bits, highest first"""
+    digits = bin(bits)
+    top = len(digits) - 1
+    i = digits.find('1', 2)
+    while i != -1:
+        yield top - i
+        i = digits.find('1', i + 1)
+
+
+class TermIndex:
+    """
+    Read-only term list with exact and fuzzy lookups.
+
+    Exact hits are answered without scanning. Fuzzy lookups count, for every
+    term at once, the characters it shares with the word (bitwise over one
+    bitmap per character), and score only the terms whose length and shared
+    characters can still reach the ranking's bar. Scoring uses the same
+    SequenceMatcher cascade and tie-breaking as difflib, so the result is the
+    same top-n list as get_close_matches.
+    """
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, word: str) -> bool:
+        raise NotImplementedError
+
+    def _term(self, term_id: int) -> str:
+        raise NotImplementedError
+
+    def _char_bitmap(self, char: str, k: int) -> int:
+        """Bitmap of the terms holding at least k of char"""
+        raise NotImplementedError
+
+    def _length_bitmap(self, length: int) -> int:
+        """Bitmap of the terms of this many characters"""
+        raise NotImplementedError
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes this index holds"""
+        raise NotImplementedError
+
+    def __getitem__(self, term_id: int) -> str:
+        if not 0 <= term_id < len(self):
+            raise IndexError(term_id)
+        return self._term(term_id)
+
+    def __iter__(self):
+        for term_id in range(len(self)):
+            yield self._term(term_id)
+
+    def get_close_matches(self, word: str, n: int = 3, cutoff: float = 0.6) -> list:
+        """Return up to n terms whose difflib ratio with word is >= cutoff, best first"""
+        if not n > 0:
+            raise ValueError("n must be > 0: %r" % (n,))
+        if not 0.0 <= cutoff <= 1.0:
+            raise ValueError("cutoff must be in [0.0, 1.0]: %r" % (cutoff,))
+        ranking = _Ranking(word, n, cutoff)
+        if not word or cutoff <= 0.0:
+            # Every term qualifies, nothing for the index to prune
+            for term_id in range(len(self)):
+                ranking.add(self._term(term_id))
+            return ranking.result()
+
+        # quick_ratio = 2 * shared characters / (len(a) + len(b)) bounds
+        # ratio, and two strings share as many characters as (char, k)
+        # tokens (see _char_tokens). Count the shared tokens of every term in
+        # the length window, then score terms level by level, most shared
+        # first: the bar rises as the ranking fills, pruning lower levels
+        # and longer terms before any of them is scored.
+        length = len(word)
+        min_len, max_len = _length_bounds(length, cutoff)
+        sizes = {}
+        for size in range(math.ceil(min_len), math.floor(max_len) + 1):
+            bits = self._length_bitmap(size)
+            if bits:
+                sizes[size] = bits
+        window = 0
+        for bits in sizes.values():
+            window |= bits
+        planes = _bit_count_planes(
+            self._char_bitmap(char, k) & window for char, k in _char_tokens(word)
+        )
+        for shared in range(length, 0, -1):
+            # Same arithmetic as quick_ratio, so ties with the bar are kept
+            reachable = 0
+            for size, bits in sizes.items():
+                if 2.0 * shared / (length + size) >= ranking.threshold:
+                    reachable |= bits
+            if not reachable:
+                break
+            for term_id in _bit_ids(_bits_equal(planes, shared, reachable)):
+                ranking.add(self._term(term_id))
+        return ranking.result()
+
+
+class _Ranking:
+    """
+    The best n (score, term) pairs seen so far, kept exactly as heapq.nlargest
+    does in difflib. Once the heap is full its weakest score becomes the bar,
+    so the cheap upper bounds reject most of the remaining terms.
+    """
+
+    def __init__(self, word: str, n: int, cutoff: float):
+        self.n = n
+        self.threshold = cutoff
+        self.best = []
+        self.matcher = SequenceMatcher()
+        self.matcher.set_seq2(word)
+
+    def add(self, term: str):
+        matcher = self.matcher
+        matcher.set_seq1(term)
+        threshold = self.threshold
+        if matcher.real_quick_ratio() >= threshold and \
+           matcher.quick_ratio() >= threshold:
+            score = matcher.ratio()
+            if score >= threshold:
+                if len(self.best) < self.n:
+                    heapq.heappush(self.best, (score, term))
+                else:
+                    heapq.heappushpop(self.best, (score, term))
+                if len(self.best) == self.n:
+                    self.threshold = self.best[0][0]
+
+    def result(self) -> list:
+        return [term for score, term in sorted(self.best, reverse=True)]
+
+
+class FuzzyTermMatcher(TermIndex):
+    """In-memory TermIndex built from any iterable of terms"""
+
+    def __init__(self, terms):
+        self.terms = list(dict.fromkeys(terms))
+        self._exact = frozenset(self.terms)
+        chars = defaultdict(list)
+        sizes = defaultdict(list)
+        for term_id, term in enumerate(self.terms):
+            sizes[len(term)].append(term_id)
+            for token in _char_tokens(term):
+                chars[token].append(term_id)
+        count = len(self.terms)
+        self._chars = {token: int.from_bytes(_bitmap(ids, count), 'little') for token, ids in chars.items()}
+        self._sizes = {size: int.from_bytes(_bitmap(ids, count), 'little') for size, ids in sizes.items()}
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._exact
+
+    def _term(self, term_id: int) -> str:
+        return self.terms[term_id]
+
+    def _char_bitmap(self, char: str, k: int) -> int:
+        return self._chars.get((char, k), 0)
+
+    def _length_bitmap(self, length: int) -> int:
+        return self._sizes.get(length, 0)
+
+    def memory_bytes(self) -> int:
+        # Containers plus the objects they own; small ints are shared
+        size = sys.getsizeof(self.terms) + sys.getsizeof(self._exact)
+        size += sum(sys.getsizeof(term) for term in self.terms)
+        for bitmaps in (self._chars, self._sizes):
+            size += sys.getsizeof(bitmaps)
+            size += sum(sys.getsizeof(key) + sys.getsizeof(bits) for key, bits in bitmaps.items())
+        return size
+
+
+class CompiledLexicon(TermIndex):
+    """
+    TermIndex over a memory-mapped compiled lexicon file.
+
+    The file is mapped read-only, so every worker process that opens it shares
+    the same page-cache pages instead of holding its own list of strings.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+        try:
+            magic, version, term_count, char_count, max_length = _HEADER.unpack_from(buf)
+        except struct.error:
+            raise ValueError(f"{path} is not a compiled lexicon")
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} compiled lexicon")
+
+        pos = _HEADER.size
+
+        def take(count):
+            nonlocal pos
+            end = pos + 4 * count
+            if end > len(buf):
+                raise ValueError(f"{path} is truncated")
+            view = buf[pos:end].cast('I')
+            pos = end
+            return view
+
+        def take_blob(size):
+            nonlocal pos
+            end = pos + size
+            if end > len(buf):
+                raise ValueError(f"{path} is truncated")
+            view = buf[pos:end]
+            pos = end
+            return view
+
+        self._term_count = term_count
+        self._char_count = char_count
+        self._row = (term_count + 7) // 8
+        self._term_offsets = take(term_count + 1)
+        self._char_offsets = take(char_count + 1)
+        self._term_blob = take_blob(self._term_offsets[-1])
+        self._char_blob = take_blob(self._char_offsets[-1])
+        self._char_bitmaps = take_blob(char_count * self._row)
+        self._length_bitmaps = take_blob((max_length + 1) * self._row)
+
+    def __len__(self) -> int:
+        return self._term_count
+
+    def __contains__(self, word: str) -> bool:
+        if not isinstance(word, str):
+            return False
+        return self._find(self._term_blob, self._term_offsets, self._term_count,
+                          word.encode('utf-8')) is not None
+
+    def _term(self, term_id: int) -> str:
+        offsets = self._term_offsets
+        return str(self._term_blob[offsets[term_id]:offsets[term_id + 1]], 'utf-8')
+
+    def memory_bytes(self) -> int:
+        # Mapped, not allocated: the pages, bitmaps included, live in the
+        # page cache, shared by every worker
+        return len(self._mmap)
+
+    def _char_bitmap(self, char: str, k: int) -> int:
+        key_id = self._find(self._char_blob, self._char_offsets, self._char_count, _char_key(char, k))
+        if key_id is None:
+            return 0
+        return int.from_bytes(self._char_bitmaps[key_id * self._row:(key_id + 1) * self._row], 'little')
+
+    def _length_bitmap(self, length: int) -> int:
+        row = self._row
+        return int.from_bytes(self._length_bitmaps[length * row:(length + 1) * row], 'little')
+
+    @staticmethod
+    def _find(blob, offsets, count, key: bytes):
+        """Binary search a sorted string table, returning the entry index or None"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = blob[offsets[mid]:offsets[mid + 1]].tobytes()
+            if entry < key:
+                lo = mid + 1
+            elif entry > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+
+def normalize_language(code) -> str:
+    """Lexicon key of a language code: 'en-US' and 'EN' both read 'en'"""
+    return (code or '').split('-')[0].split('_')[0].strip().lower()
+
+
+def read_source(path: str = DEFAULT_SOURCE):
+    """Parse the JSON lexicon"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def source_terms(data, language: str = None) -> list:
+    """
+    Terms of a parsed JSON lexicon as a flat lower-case list, only those of
+    one language if given. A plain list of terms carries no language and is
+    returned whole.
+    """
+    # The data file groups terms per language: {"en": {"terms": {...}}}
+    if isinstance(data, dict):
+        if language is not None:
+            data = {language: data.get(language, {})}
+        return [
+            term.lower()
+            for entry in data.values()
+            for term in entry.get('terms', {})
+        ]
+    return [term.lower() for term in data]
+
+
+def source_languages(data) -> list:
+    """Languages a parsed JSON lexicon lists, including those without terms"""
+    if not isinstance(data, dict):
+        return []
+    return sorted(data)
+
+
+def load_source_terms(path: str = DEFAULT_SOURCE, language: str = None) -> list:
+    """Read the JSON lexicon and return its terms, see source_terms()"""
+    return source_terms(read_source(path), language)
+
+
+def compiled_path(language: str, directory: str = DATA_DIR) -> str:
+    """Compiled lexicon file of one language"""
+    return os.path.join(directory, f'medical_terms.{language}.lex')
+
+
+def compile_lexicon(terms, path: str) -> int:
+    """
+    Write terms to path in the compiled lexicon format.
+    Returns the number of distinct terms written.
+    """
+    encoded = sorted({term.encode('utf-8') for term in terms})
+
+    term_offsets = array('I', [0])
+    chars = defaultdict(list)
+    sizes = defaultdict(list)
+    for term_id, term in enumerate(encoded):
+        term_offsets.append(term_offsets[-1] + len(term))
+        decoded = term.decode('utf-8')
+        sizes[len(decoded)].append(term_id)
+        for char, k in _char_tokens(decoded):
+            chars[_char_key(char, k)].append(term_id)
+
+    char_keys = sorted(chars)
+    char_offsets = array('I', [0])
+    for key in char_keys:
+        char_offsets.append(char_offsets[-1] + len(key))
+    max_length = max(sizes, default=0)
+
+    # Write to a private temp file and rename it into place, so concurrent
+    # workers never map a half-written lexicon.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(encoded), len(char_keys), max_length))
+            for section in (term_offsets, char_offsets):
+                section.tofile(f)
+            f.write(b''.join(encoded))
+            f.write(b''.join(char_keys))
+            for key in char_keys:
+                f.write(_bitmap(chars[key], len(encoded)))
+            for length in range(max_length + 1):
+                f.write(_bitmap(sizes.get(length, ()), len(encoded)))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return len(encoded)
+
+
+class LanguageLexicons:
+    """
+    Per-language lexicons, each loaded on first use from its compiled file
+    (compiled from the source when needed). At most max_languages are kept;
+    the least recently used one is dropped when another is loaded, and its
+    recognizer goes with it. A language without terms gets an empty lexicon.
+
+    A fresh compiled file is mapped without reading the JSON source; the
+    source is parsed only to compile a missing or stale one. The languages it
+    lists are remembered, so unknown codes do not parse it again.
+    """
+
+    def __init__(self, source: str = DEFAULT_SOURCE, directory: str = DATA_DIR, max_languages: int = 4):
+        self.source = source
+        self.directory = directory
+        self.max_languages = max(1, max_languages)
+        self._lexicons = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes loads, so hits on loaded languages never wait for one
+        self._load_lock = threading.Lock()
+        # (source mtime, languages it lists or None for a plain term list)
+        self._source_languages = (None, None)
+        self.loads = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._lexicons)
+
+    def get(self, language: str) -> TermIndex:
+        language = normalize_language(language)
+        lexicon = self._lookup(language)
+        if lexicon is not None:
+            return lexicon
+        with self._load_lock:
+            # Another thread may have loaded it while this one waited
+            lexicon = self._lookup(language)
+            if lexicon is not None:
+                return lexicon
+            lexicon = self._load(language)
+            with self._lock:
+                self._lexicons[language] = lexicon
+                self.loads += 1
+                while len(self._lexicons) > self.max_languages:
+                    self._lexicons.popitem(last=False)
+                    self.evictions += 1
+            return lexicon
+
+    def _lookup(self, language: str):
+        with self._lock:
+            lexicon = self._lexicons.get(language)
+            if lexicon is not None:
+                self._lexicons.move_to_end(language)
+            return lexicon
+
+    def _load(self, language: str) -> TermIndex:
+        if not language:
+            return FuzzyTermMatcher([])
+        compiled = compiled_path(language, self.directory)
+        try:
+            source_mtime = os.path.getmtime(self.source)
+        except OSError as e:
+            print(f"Could not read medical lexicon source: {str(e)}")
+            return FuzzyTermMatcher([])
+        try:
+            if os.path.getmtime(compiled) >= source_mtime:
+                return CompiledLexicon(compiled)
+        except (OSError, ValueError):
+            pass
+
+        mtime, languages = self._source_languages
+        if mtime == source_mtime and languages is not None and language not in languages:
+            return FuzzyTermMatcher([])
+
+        data = read_source(self.source)
+        languages = frozenset(source_languages(data)) if isinstance(data, dict) else None
+        self._source_languages = (source_mtime, languages)
+        if languages is not None and language not in languages:
+            return FuzzyTermMatcher([])
+
+        # A listed language without terms still gets its (empty) compiled
+        # file, so the next load maps it instead of parsing the source
+        terms = source_terms(data, language)
+        try:
+            compile_lexicon(terms, compiled)
+            return CompiledLexicon(compiled)
+        except OSError as e:
+            print(f"Could not compile medical lexicon, keeping it in memory: {str(e)}")
+            return FuzzyTermMatcher(terms)
+
+    def clear(self):
+        with self._lock:
+            self._lexicons.clear()
+
+    def stats(self) -> dict:
+        # Deferred import: the recognizer module builds on this one
+        from .recognizer import peek_recognizer
+
+        with self._lock:
+            lexicons = list(self._lexicons.items())
+        languages = {}
+        for language, lexicon in lexicons:
+            recognizer = peek_recognizer(lexicon)
+            languages[language] = {
+                'terms': len(lexicon),
+                'storage': 'mapped' if isinstance(lexicon, CompiledLexicon) else 'memory',
+                'lexicon_bytes': lexicon.memory_bytes(),
+                'recognizer_bytes': recognizer.memory_bytes() if recognizer is not None else 0,
+            }
+        return {
+            'loaded': languages,
+            'max_languages': self.max_languages,
+            'loads': self.loads,
+            'evictions': self.evictions,
+        }
+
+
+_language_lexicons = None
+_language_lexicons_lock = threading.Lock()
+
+
+def get_language_lexicons() -> LanguageLexicons:
+    """Return the process-wide per-language lexicons configured by MEDICAL_LEXICON"""
+    global _language_lexicons
+    if _language_lexicons is None:
+        with _language_lexicons_lock:
+            if _language_lexicons is None:
+                options = settings.MEDICAL_LEXICON
+                _language_lexicons = LanguageLexicons(
+                    source=options['SOURCE'],
+                    directory=options['COMPILED_DIR'],
+                    max_languages=options['MAX_LANGUAGES']
+                )
+    return _language_lexicons
+
+
+def reset_language_lexicons():
+    """Drop every loaded language so the next call picks up new settings"""
+    global _language_lexicons
+    with _language_lexicons_lock:
+        _language_lexicons = None
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from translation.lexicon import compile_lexicon, compiled_path, read_source, source_languages, source_terms
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the compiled, memory-mappable medical lexicons from their JSON source'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=settings.MEDICAL_LEXICON['SOURCE'],
+                            help='JSON lexicon to read (default: %(default)s)')
+        parser.add_argument('--language', action='append', dest='languages',
+                            help='Language to compile; repeat for several (default: every language in the source)')
+        parser.add_argument('--output-dir', default=settings.MEDICAL_LEXICON['COMPILED_DIR'],
+                            help='Directory for the per-language lexicons (default: %(default)s)')
+        parser.add_argument('--output',
+                            help='Compile the selected languages together into this one file instead')
+
+    def handle(self, *args, **options):
+        try:
+            data = read_source(options['source'])
+            if options['output']:
+                terms = []
+                for language in options['languages'] or [None]:
+                    terms.extend(source_terms(data, language))
+                count = compile_lexicon(terms, options['output'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"Compiled {count} medical terms into {options['output']}"
+                ))
+                return
+
+            # Languages without terms get an empty lexicon, so loading them
+            # later maps that file instead of parsing the source again
+            for language in options['languages'] or source_languages(data):
+                path = compiled_path(language, options['output_dir'])
+                count = compile_lexicon(source_terms(data, language), path)
+                self.stdout.write(self.style.SUCCESS(f"Compiled {count} {language} medical terms into {path}"))
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not compile medical lexicon: {str(e)}")
@@ -0,0 +1,57 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from translation import export
+from translation.filters import filter_history
+
+
+class Command(BaseCommand):
+    help = 'Stream the translations of a user or an organization to a JSON Lines or CSV file'
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group(required=True)
+        scope.add_argument('--user', help='Username whose translations to export')
+        scope.add_argument('--organization', help='Export every member of this organization')
+        parser.add_argument('--format', choices=export.FORMATS, default='jsonl',
+                            help='Output format (default: %(default)s)')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip')
+        parser.add_argument('--output', default='-', help='File to write (default: standard output)')
+        parser.add_argument('--created-after', help='ISO date or datetime')
+        parser.add_argument('--created-before', help='ISO date or datetime; a bare date includes that day')
+        parser.add_argument('--source-lang')
+        parser.add_argument('--target-lang')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Rows fetched per round trip (default: TRANSLATION_EXPORT CHUNK_SIZE)')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            User = get_user_model()
+            try:
+                queryset = export.export_queryset(user=User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['user']}")
+        else:
+            queryset = export.export_queryset(organization=options['organization'])
+
+        try:
+            queryset = filter_history(queryset, options)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        stream = export.stream_export(queryset, options['format'], options['gzip'], options['chunk_size'])
+        if options['output'] == '-':
+            out = sys.stdout.buffer
+            for chunk in stream:
+                out.write(chunk)
+            out.flush()
+            return
+
+        try:
+            with open(options['output'], 'wb') as f:
+                for chunk in stream:
+                    f.write(chunk)
+        except OSError as e:
+            raise CommandError(f"Could not write {options['output']}: {str(e)}")
+        self.stdout.write(self.style.SUCCESS(f"Exported translations to {options['output']}"))
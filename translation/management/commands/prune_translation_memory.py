@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from translation import translation_memory
+
+
+class Command(BaseCommand):
+    help = 'Evict stale or least recently used translation memory entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-days', type=int, default=settings.TRANSLATION_MEMORY_MAX_AGE_DAYS,
+                            help='Drop entries unused for this many days (default: %(default)s)')
+        parser.add_argument('--max-entries', type=int, default=settings.TRANSLATION_MEMORY_MAX_ENTRIES,
+                            help='Keep at most this many entries (default: %(default)s)')
+
+    def handle(self, *args, **options):
+        evicted = translation_memory.prune(
+            max_age_days=options['max_age_days'],
+            max_entries=options['max_entries']
+        )
+        self.stdout.write(self.style.SUCCESS(f"Evicted {evicted} translation memory entries"))
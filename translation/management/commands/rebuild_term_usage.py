@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from translation import term_usage
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily medical term usage rollup from the stored translations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to rebuild (ISO date; default: the beginning)')
+        parser.add_argument('--until', help='Last day to rebuild, inclusive (ISO date; default: today)')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Translations read per batch (default: %(default)s)')
+        parser.add_argument('--backfill', action='store_true',
+                            help='Analyze rows saved without medical_terms and store the result')
+
+    def handle(self, *args, **options):
+        since = self.parse_day(options['since'])
+        until = self.parse_day(options['until'])
+        if since and until and since > until:
+            raise CommandError('--since must not be after --until')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        read = term_usage.rebuild(since, until, options['batch_size'], options['backfill'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt term usage from {read} translations"))
+
+    def parse_day(self, value):
+        if value is None:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise CommandError(f"Invalid date: {value}")
+        return day
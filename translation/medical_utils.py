@@ -1,37 +1,71 @@
-import json
-import os
-from difflib import get_close_matches
+from django.conf import settings
+
+from . import metrics
+from .lexicon import FuzzyTermMatcher, TermIndex, get_language_lexicons, normalize_language
+from .recognizer import PhraseRecognizer, get_recognizer
+
+__all__ = ['FuzzyTermMatcher', 'MedicalTerminologyValidator', 'PhraseRecognizer']
+
 
 class MedicalTerminologyValidator:
-    def __init__(self):
+    """
+    Thin handle onto the process-wide medical lexicon of one source language
+    (MEDICAL_LEXICON DEFAULT_LANGUAGE if none is given). Creating one is
+    cheap; each language's lexicon is loaded once per process, on first use.
+    """
+
+    def __init__(self, language: str = None):
+        self.language = normalize_language(language) or settings.MEDICAL_LEXICON['DEFAULT_LANGUAGE']
         self.medical_terms = self._load_medical_terms()
+        if isinstance(self.medical_terms, TermIndex):
+            self.matcher = self.medical_terms
+            self.recognizer = get_recognizer(self.medical_terms)
+        else:
+            self.matcher = FuzzyTermMatcher(self.medical_terms)
+            self.recognizer = PhraseRecognizer(self.matcher)
 
     def _load_medical_terms(self):
-        """Load medical terms from JSON file"""
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        terms_file = os.path.join(current_dir, 'data', 'medical_terms.json')
-        
+        """Load medical terms from the compiled lexicon of this language"""
         try:
-            with open(terms_file, 'r') as f:
-                return json.load(f)
+            return get_language_lexicons().get(self.language)
         except Exception as e:
             print(f"Error loading medical terms: {str(e)}")
             return []
 
+    def recognize(self, text: str) -> list:
+        """Return the known terms in text, single- and multi-word, as TermMatch spans"""
+        with metrics.timed('lexicon'):
+            return self.recognizer.find(text)
+
     def validate_and_suggest(self, text: str) -> list:
         """
         Validate medical terms in the text and suggest corrections
         Returns a list of suggestions
         """
-        words = text.lower().split()
+        return self.analyze(text)['suggestions']
+
+    def analyze(self, text: str) -> dict:
+        """
+        Return {'terms': [...], 'suggestions': [...]}: the canonical terms
+        found in the text, in order of first appearance, and the corrections
+        suggested for the other words. This is what Translation.medical_terms
+        stores.
+        """
         suggestions = []
-        
-        for word in words:
-            # Check if word is in medical terms
-            if word not in self.medical_terms:
+
+        with metrics.timed('lexicon'):
+            # Known terms are found in one pass; only the words left over
+            # are fuzzy matched
+            matches, leftovers = self.recognizer.scan(text)
+            for word in leftovers:
+                if word.isdigit():
+                    continue
                 # Find close matches
-                matches = get_close_matches(word, self.medical_terms, n=3, cutoff=0.6)
-                if matches:
-                    suggestions.extend(matches)
-        
-        return list(set(suggestions))  # Remove duplicates
+                close = self.matcher.get_close_matches(word, n=3, cutoff=0.6)
+                if close:
+                    suggestions.extend(close)
+
+        return {
+            'terms': list(dict.fromkeys(match.term for match in matches)),
+            'suggestions': list(set(suggestions)),  # Remove duplicates
+        }
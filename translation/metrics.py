@@ -0,0 +1,236 @@
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Seconds; covers cache hits (sub-millisecond) up to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames, values, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(tuple(labels[name] for name in self.labelnames))
+        return entry[-1] if entry else 0
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, list(entry)) for key, entry in self._values.items())
+        for key, entry in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                yield (f'{self.name}_bucket',
+                       _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"'), cumulative)
+            yield f'{self.name}_bucket', _format_labels(self.labelnames, key, 'le="+Inf"'), entry[-1]
+            yield f'{self.name}_sum', _format_labels(self.labelnames, key), entry[-2]
+            yield f'{self.name}_count', _format_labels(self.labelnames, key), entry[-1]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Registry:
+    """The metrics of one process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by view, method and status',
+    ('view', 'method', 'status')
+)
+STAGE_SECONDS = registry.histogram(
+    'translation_stage_duration_seconds',
+    'Time spent per stage: auth, lookup, detect, lexicon, upstream, db, serialize',
+    ('stage',)
+)
+UPSTREAM_CALLS = registry.counter(
+    'translation_upstream_calls_total', 'MyMemory calls by outcome (ok, error)', ('outcome',)
+)
+LOOKUPS = registry.counter(
+    'translation_lookups_total', 'Stored translation lookups by result (cache, memory, miss)', ('result',)
+)
+TERM_USAGE_ERRORS = registry.counter(
+    'translation_term_usage_errors_total', 'Translations left out of the term usage rollup by a failed update'
+)
+
+# Stage durations of the current request, for its Server-Timing header.
+# Worker threads running in a copy of the request's context add to the same
+# dict, hence the lock.
+_request_stages = ContextVar('request_stages', default=None)
+_request_stages_lock = threading.Lock()
+_NOOP = nullcontext()
+
+
+def enabled() -> bool:
+    return settings.METRICS['ENABLED']
+
+
+class _Stage:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.stage, time.perf_counter() - self.start)
+
+
+def timed(stage: str):
+    """
+    Context manager timing one stage of the current request. With metrics
+    disabled it is a shared no-op, so hot paths pay one settings lookup.
+    """
+    if not settings.METRICS['ENABLED']:
+        return _NOOP
+    return _Stage(stage)
+
+
+def record(stage: str, seconds: float):
+    """Record an already measured stage (callers check enabled())"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    stages = _request_stages.get()
+    if stages is not None:
+        with _request_stages_lock:
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+def start_request():
+    """Start collecting stages for a request; pass the result to finish_request"""
+    return _request_stages.set({}), time.perf_counter()
+
+
+def finish_request(request, response, started):
+    token, start = started
+    elapsed = time.perf_counter() - start
+    stages = _request_stages.get()
+    _request_stages.reset(token)
+
+    match = request.resolver_match
+    REQUEST_SECONDS.observe(
+        elapsed,
+        view=match.url_name if match and match.url_name else 'unmatched',
+        method=request.method,
+        status=response.status_code
+    )
+    if settings.METRICS['SERVER_TIMING']:
+        response['Server-Timing'] = server_timing(stages, elapsed)
+    return response
+
+
+def server_timing(stages: dict, total: float) -> str:
+    """
+    Server-Timing header value. Stages may overlap (upstream runs inside
+    detect), and those run concurrently add up, so they can exceed total.
+    """
+    entries = [f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in stages.items()]
+    entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def render() -> str:
+    return registry.render()
@@ -0,0 +1,67 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that also runs natively under ASGI.
+
+    Stock WhiteNoiseMiddleware is sync-only, which makes Django run every
+    request below it through a single thread under ASGI and serializes the
+    async views. Static files are still served synchronously (in a thread);
+    everything else is passed straight to the async handler.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class MetricsMiddleware:
+    """
+    Time every request: feeds the request latency histogram and, with
+    METRICS['SERVER_TIMING'], adds a Server-Timing header listing the stages
+    the request went through. Does nothing while METRICS is disabled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not metrics.enabled():
+            return self.get_response(request)
+        started = metrics.start_request()
+        response = self.get_response(request)
+        return metrics.finish_request(request, response, started)
+
+    async def __acall__(self, request):
+        if not metrics.enabled():
+            return await self.get_response(request)
+        started = metrics.start_request()
+        response = await self.get_response(request)
+        return metrics.finish_request(request, response, started)
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:01
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('translation', '0003_auto_20250330_2100'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_hash', models.CharField(max_length=64)),
+                ('language_pair', models.CharField(max_length=11)),
+                ('source_text', models.TextField()),
+                ('translated_text', models.TextField()),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='translation_last_us_8628ac_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='translationmemory',
+            constraint=models.UniqueConstraint(fields=('key_hash', 'language_pair'), name='unique_memory_segment'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# PostgreSQL only: a stored, generated tsvector over both texts plus trigram
+# indexes, each led by user_id (btree_gin) so a search only touches the
+# searching user's rows. Other databases use the portable search fallback.
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    """
+    ALTER TABLE translation_translation
+    ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(original_text, '') || ' ' || coalesce(translated_text, ''))
+    ) STORED
+    """,
+    """
+    CREATE INDEX translation_search_vector_idx
+    ON translation_translation USING gin (user_id, search_vector)
+    """,
+    """
+    CREATE INDEX translation_original_trgm_idx
+    ON translation_translation USING gin (user_id, original_text gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX translation_translated_trgm_idx
+    ON translation_translation USING gin (user_id, translated_text gin_trgm_ops)
+    """,
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS translation_translated_trgm_idx",
+    "DROP INDEX IF EXISTS translation_original_trgm_idx",
+    "DROP INDEX IF EXISTS translation_search_vector_idx",
+    "ALTER TABLE translation_translation DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in FORWARD_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in REVERSE_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('translation', '0004_translationmemory'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('translation', '0005_translation_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicalTermUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=200)),
+                ('source_language', models.CharField(max_length=5)),
+                ('target_language', models.CharField(max_length=5)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='translation_day_7b6485_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='medicaltermusage',
+            constraint=models.UniqueConstraint(fields=('source_language', 'target_language', 'day', 'term'), name='unique_term_usage'),
+        ),
+    ]
@@ -35,4 +35,54 @@ class Translation(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.source_language} to {self.target_language} - {self.original_text[:50]}..."
\ No newline at end of file
+        return f"{self.source_language} to {self.target_language} - {self.original_text[:50]}..."
+
+class TranslationMemory(models.Model):
+    """Previously translated segments, reused instead of calling the translation API"""
+    key_hash = models.CharField(max_length=64)
+    language_pair = models.CharField(max_length=11)
+    source_text = models.TextField()
+    translated_text = models.TextField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key_hash', 'language_pair'], name='unique_memory_segment'),
+        ]
+        indexes = [
+            models.Index(fields=['last_used_at']),
+        ]
+
+    @property
+    def source_language(self):
+        return self.language_pair.split('|', 1)[0]
+
+    @property
+    def target_language(self):
+        return self.language_pair.split('|', 1)[1]
+
+    def __str__(self):
+        return f"{self.language_pair} - {self.source_text[:50]}..."
+
+class MedicalTermUsage(models.Model):
+    """Daily count of translations mentioning a medical term, per language pair"""
+    term = models.CharField(max_length=200)
+    source_language = models.CharField(max_length=5)
+    target_language = models.CharField(max_length=5)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index behind "top terms of a pair over a date range"
+            models.UniqueConstraint(fields=['source_language', 'target_language', 'day', 'term'],
+                                    name='unique_term_usage'),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.source_language}|{self.target_language} {self.day} {self.term}: {self.count}"
@@ -0,0 +1,194 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over (created_at, id), newest first.
+
+    A page is fetched with "created_at, id below the cursor ORDER BY
+    created_at DESC, id DESC LIMIT size + 1", which the (user, -created_at)
+    index answers directly, so a page deep in the history costs the same as
+    the first one. Cursors are opaque; clients follow the next/previous links.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        options = settings.HISTORY_PAGINATION
+        self.default_page_size = options['PAGE_SIZE']
+        self.max_page_size = options['MAX_PAGE_SIZE']
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.default_page_size
+        return min(max(size, 1), self.max_page_size)
+
+    @staticmethod
+    def position(item):
+        """(created_at, id) of a model instance or a values() row"""
+        if isinstance(item, dict):
+            return item['created_at'], item['id']
+        return item.created_at, item.id
+
+    def encode_cursor(self, item, reverse: bool) -> str:
+        created_at, item_id = self.position(item)
+        position = {'t': created_at.isoformat(), 'i': item_id}
+        if reverse:
+            position['r'] = 1
+        raw = json.dumps(position, separators=(',', ':')).encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        """Return (created_at, id, reverse) for the request's cursor, or None"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            position = json.loads(raw)
+            created_at = parse_datetime(position['t'])
+            item_id = int(position['i'])
+            if created_at is None:
+                raise ValueError(position['t'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, item_id, bool(position.get('r'))
+
+    def page_queryset(self, queryset, cursor, page_size: int):
+        """
+        Return the unevaluated queryset for one page plus one look-ahead row.
+        Forward pages run newest first; reverse pages oldest first from the
+        cursor and are flipped after fetching.
+        """
+        if cursor is None:
+            return queryset.order_by('-created_at', '-id')[:page_size + 1]
+        created_at, item_id, reverse = cursor
+        # The plain range on created_at lets the index bound the scan; the OR
+        # only breaks ties between rows created in the same microsecond.
+        if reverse:
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=item_id),
+                created_at__gte=created_at
+            ).order_by('created_at', 'id')
+        else:
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=item_id),
+                created_at__lte=created_at
+            ).order_by('-created_at', '-id')
+        return queryset[:page_size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[2]
+
+        rows = list(self.page_queryset(queryset, cursor, page_size))
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        cursor = self.encode_cursor(self.page[-1], reverse=False)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        cursor = self.encode_cursor(self.page[0], reverse=True)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class SearchPagination(BasePagination):
+    """
+    Page-number pagination for ranked search results.
+
+    Rank order has no stable seek key, so pages are offsets; one look-ahead
+    row tells whether a next page exists without a COUNT over the matches.
+    """
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    invalid_page_message = 'Invalid page'
+
+    def __init__(self):
+        options = settings.TRANSLATION_SEARCH
+        self.default_page_size = options['PAGE_SIZE']
+        self.max_page_size = options['MAX_PAGE_SIZE']
+        self.max_pages = options['MAX_PAGES']
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.default_page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_page_number(self, request) -> int:
+        try:
+            number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if not 1 <= number <= self.max_pages:
+            raise NotFound(self.invalid_page_message)
+        return number
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        self.number = self.get_page_number(request)
+        offset = (self.number - 1) * page_size
+
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size and self.number < self.max_pages
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.number == 1:
+            return None
+        if self.number == 2:
+            return remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(self.base_url, self.page_query_param, self.number - 1)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
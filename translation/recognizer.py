@@ -0,0 +1,148 @@
+import re
+import sys
+import threading
+import weakref
+from array import array
+from collections import deque, namedtuple
+
+# Words, with inner apostrophes kept ("crohn's"); hyphens and punctuation
+# separate tokens, so "beta-blocker" and "beta blocker" read the same
+_TOKEN = re.compile(r"\w+(?:['’]\w+)*", re.UNICODE)
+
+TermMatch = namedtuple('TermMatch', 'start end term')
+
+# Shared by every leaf node once the automaton is built; never written to
+_NO_CHILDREN = {}
+
+
+def normalize_token(token: str) -> str:
+    return token.lower().replace('’', "'")
+
+
+def tokenize(text: str) -> list:
+    """Return the normalized tokens of text"""
+    return [normalize_token(token) for token in _TOKEN.findall(text)]
+
+
+class PhraseRecognizer:
+    """
+    Aho-Corasick automaton over normalized tokens.
+
+    Built once from a term list; find() then reports every single- and
+    multi-word term occurring in a text in one left-to-right pass over its
+    tokens, however many terms there are. Matches carry character spans and
+    the canonical (lexicon) spelling of the term. Terms that normalize to
+    the same tokens keep the first spelling seen.
+    """
+
+    def __init__(self, terms):
+        self.terms = []
+        self._lengths = array('I')  # tokens per term
+        self._vocabulary = {}  # token -> token id
+        self._goto = [{}]  # node -> {token id: node}
+        self._fail = array('I', [0])
+        self._output = [()]  # node -> ids of the terms ending there
+        for term in terms:
+            self._add(term)
+        self._link()
+        # Most nodes are leaves; one shared empty mapping instead of a dict each
+        self._goto = [children or _NO_CHILDREN for children in self._goto]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _add(self, term: str):
+        tokens = tokenize(term)
+        if not tokens:
+            return
+        node = 0
+        for token in tokens:
+            token_id = self._vocabulary.setdefault(token, len(self._vocabulary))
+            child = self._goto[node].get(token_id)
+            if child is None:
+                child = self._goto[node][token_id] = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = child
+        if not self._output[node]:
+            self._output[node] = (len(self.terms),)
+            self.terms.append(term)
+            self._lengths.append(len(tokens))
+
+    def _link(self):
+        # Breadth-first, so a node's failure target is final before its children need it
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token_id, child in self._goto[node].items():
+                queue.append(child)
+                target = self._fail[node]
+                while target and token_id not in self._goto[target]:
+                    target = self._fail[target]
+                target = self._goto[target].get(token_id, 0)
+                self._fail[child] = target if target != child else 0
+                if self._output[self._fail[child]]:
+                    self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the automaton (terms included)"""
+        size = sys.getsizeof(self.terms) + sum(sys.getsizeof(term) for term in self.terms)
+        size += sys.getsizeof(self._lengths) + sys.getsizeof(self._fail)
+        size += sys.getsizeof(self._vocabulary) + sum(sys.getsizeof(token) for token in self._vocabulary)
+        size += sys.getsizeof(self._goto) + sum(
+            sys.getsizeof(children) for children in self._goto if children is not _NO_CHILDREN
+        )
+        size += sys.getsizeof(self._output) + sum(sys.getsizeof(output) for output in self._output if output)
+        return size
+
+    def scan(self, text: str) -> tuple:
+        """
+        Return (matches, leftovers): every TermMatch in text ordered by end,
+        longest first at the same end, and the normalized tokens no match
+        covers.
+        """
+        vocabulary, goto, fail, output = self._vocabulary, self._goto, self._fail, self._output
+        tokens = list(_TOKEN.finditer(text))
+        words = [normalize_token(token.group()) for token in tokens]
+        covered = [False] * len(tokens)
+        matches = []
+        node = 0
+        for i, word in enumerate(words):
+            token_id = vocabulary.get(word)
+            if token_id is None:
+                node = 0  # no term contains this token
+                continue
+            while node and token_id not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token_id, 0)
+            for term_id in output[node]:
+                first = i - self._lengths[term_id] + 1
+                matches.append(TermMatch(tokens[first].start(), tokens[i].end(), self.terms[term_id]))
+                covered[first:i + 1] = [True] * (i + 1 - first)
+        leftovers = [word for word, hit in zip(words, covered) if not hit]
+        return matches, leftovers
+
+    def find(self, text: str) -> list:
+        """Every TermMatch in text (overlapping matches included)"""
+        return self.scan(text)[0]
+
+
+_recognizers = weakref.WeakKeyDictionary()
+_recognizers_lock = threading.Lock()
+
+
+def get_recognizer(lexicon) -> PhraseRecognizer:
+    """Return the recognizer of a lexicon (TermIndex), building it on first use"""
+    recognizer = _recognizers.get(lexicon)
+    if recognizer is None:
+        with _recognizers_lock:
+            recognizer = _recognizers.get(lexicon)
+            if recognizer is None:
+                recognizer = _recognizers[lexicon] = PhraseRecognizer(lexicon)
+    return recognizer
+
+
+def peek_recognizer(lexicon):
+    """The recognizer of a lexicon if it has been built, else None"""
+    return _recognizers.get(lexicon)
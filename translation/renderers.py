@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON: one object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return self.event(data)
+
+    @staticmethod
+    def event(data, event=None) -> str:
+        if event is not None:
+            data = {'event': event, **data}
+        return json.dumps(data, ensure_ascii=False) + '\n'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Server-Sent Events; plain responses (errors) become a single 'error' event"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return self.event(data, 'error')
+
+    @staticmethod
+    def event(data, event=None) -> str:
+        lines = []
+        if event is not None:
+            lines.append(f"event: {event}")
+        lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+        return '\n'.join(lines) + '\n\n'
+
+
+class JSONLinesRenderer(NDJSONRenderer):
+    """JSON Lines, for exports; plain responses (errors) become a single line"""
+    media_type = 'application/jsonl'
+    format = 'jsonl'
+
+
+class CSVRenderer(BaseRenderer):
+    """CSV, for exports; plain responses (errors) become a header and one row"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(data.keys())
+        writer.writerow(data.values())
+        return out.getvalue()
@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker.
+
+    Closed: calls go through; failure_threshold consecutive failures open the
+    circuit. Open: calls are refused for reset_timeout seconds. Half-open: up
+    to half_open_calls trial calls go through; a success closes the circuit,
+    a failure opens it again. Calls slower than slow_call_threshold seconds
+    count as failures.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_calls: int = 1, slow_call_threshold: float = None,
+                 clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = max(1, half_open_calls)
+        self.slow_call_threshold = slow_call_threshold
+        self.clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejected = 0
+
+    def _current_state(self) -> str:
+        # Called with the lock held; an expired open circuit turns half-open
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trials = 0
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a trial call through"""
+        with self._lock:
+            if self._current_state() != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self.clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Return True if a call may go ahead now; every allowed call must be recorded"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool, elapsed: float = 0.0):
+        """Record the outcome of an allowed call"""
+        if ok and self.slow_call_threshold is not None and elapsed > self.slow_call_threshold:
+            ok = False
+        with self._lock:
+            state = self._current_state()
+            if ok:
+                self._failures = 0
+                if state == self.HALF_OPEN:
+                    self._state = self.CLOSED
+                return
+            self._failures += 1
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    self.trips += 1
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'retry_after': round(max(0.0, self.reset_timeout - (self.clock() - self._opened_at)), 2)
+                if state == self.OPEN else 0.0,
+                'trips': self.trips,
+                'rejected': self.rejected,
+            }
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    AIMD limit on concurrent calls.
+
+    Every call that succeeds within latency_target seconds raises the limit
+    by 1/limit (about +1 per limit's worth of calls); a failed or slower
+    call multiplies it by decrease, at most once per latency_target so one
+    slow burst is not punished once per call. acquire() waits up to
+    queue_timeout for a free slot; acquire_async() does the same without
+    blocking the event loop. Sync and async callers share the slots.
+    """
+
+    def __init__(self, initial: int = 10, min_limit: int = 1, max_limit: int = 50,
+                 latency_target: float = 1.0, decrease: float = 0.7,
+                 queue_timeout: float = 0.0, clock=time.monotonic):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.queue_timeout = queue_timeout
+        self.clock = clock
+        self.in_flight = 0
+        self._last_decrease = None
+        self._condition = threading.Condition()
+        self._async_waiters = []  # (loop, future) of suspended acquire_async() calls
+        self.rejected = 0
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Take a slot, waiting up to timeout (default queue_timeout) seconds"""
+        if timeout is None:
+            timeout = self.queue_timeout
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.in_flight < int(self.limit), timeout=timeout):
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    async def acquire_async(self, timeout: float = None) -> bool:
+        """acquire() for coroutines: waits on a future, not on the thread"""
+        if timeout is None:
+            timeout = self.queue_timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            with self._condition:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.rejected += 1
+                    return False
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._condition:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+
+    def _wake(self):
+        # Called with the condition held; every waiter re-checks for a slot
+        self._condition.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                pass  # its loop has closed
+
+    def cancel(self):
+        """Return a slot whose call never started"""
+        with self._condition:
+            self.in_flight -= 1
+            self._wake()
+
+    def release(self, ok: bool, elapsed: float):
+        """Return a slot and adjust the limit from the call's outcome"""
+        with self._condition:
+            self.in_flight -= 1
+            if ok and elapsed <= self.latency_target:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            else:
+                now = self.clock()
+                if self._last_decrease is None or now - self._last_decrease >= self.latency_target:
+                    self.limit = max(self.min_limit, self.limit * self.decrease)
+                    self._last_decrease = now
+            self._wake()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'latency_target': self.latency_target,
+                'rejected': self.rejected,
+            }
+
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
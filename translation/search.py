@@ -0,0 +1,62 @@
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+# Ranked search over original_text and translated_text.
+#
+# On PostgreSQL the query runs against the stored search_vector column and
+# the trigram indexes created in migration 0005: full-text matches via
+# websearch_to_tsquery, plus word-similarity matches so a misspelled drug
+# name still finds the row. Elsewhere (SQLite in tests) every query word
+# has to appear in one of the texts and rows are ranked by how many do.
+
+_MATCH_SQL = (
+    "(search_vector @@ websearch_to_tsquery('simple', %s)"
+    " OR original_text %%> %s OR translated_text %%> %s)"
+)
+_RANK_SQL = (
+    "(ts_rank(search_vector, websearch_to_tsquery('simple', %s))"
+    " + greatest(word_similarity(%s, original_text), word_similarity(%s, translated_text)))"
+)
+
+
+def search_terms(query: str) -> list:
+    return query.lower().split()
+
+
+def search_translations(queryset, query: str):
+    """
+    Filter a Translation queryset to the rows matching query, annotated with
+    a 'rank' and ordered best match first (newest first among equals).
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset = _search_postgres(queryset, query)
+    else:
+        queryset = _search_portable(queryset, query)
+    return queryset.order_by('-rank', '-created_at', '-id')
+
+
+def _search_postgres(queryset, query: str):
+    params = (query, query, query)
+    return queryset.filter(
+        RawSQL(_MATCH_SQL, params, output_field=BooleanField())
+    ).annotate(
+        rank=RawSQL(_RANK_SQL, params, output_field=FloatField())
+    )
+
+
+def _search_portable(queryset, query: str):
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none().annotate(rank=Value(0, output_field=IntegerField()))
+
+    rank = Value(0, output_field=IntegerField())
+    for term in terms:
+        queryset = queryset.filter(Q(original_text__icontains=term) | Q(translated_text__icontains=term))
+        for field in ('original_text', 'translated_text'):
+            rank = rank + Case(
+                When(**{f'{field}__icontains': term}, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField()
+            )
+    return queryset.annotate(rank=rank)
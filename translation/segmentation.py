@@ -0,0 +1,148 @@
+import re
+
+# Abbreviations whose trailing period does not end a sentence
+ABBREVIATIONS = frozenset([
+    'dr', 'mr', 'mrs', 'ms', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'approx',
+    'no', 'fig', 'dept', 'inc', 'min', 'max', 'mg', 'mcg', 'ml', 'kg', 'hr', 'hrs',
+    'tab', 'tabs', 'cap', 'caps', 'inj', 'susp', 'sol', 'oint', 'disp', 'sig',
+    'q', 'qd', 'bid', 'tid', 'qid', 'qhs', 'prn', 'po', 'iv', 'im', 'sc', 'sq',
+    'pt', 'pts', 'dx', 'hx', 'rx', 'sx', 'tx', 'fx', 'yo', 'wt', 'ht',
+])
+
+# Sentence-final punctuation, optional closing quotes/brackets, then whitespace
+_BOUNDARY = re.compile(r'[.!?…]+[\"\'”’)\]]*(\s+)')
+# Dotted initialisms such as "b.i.d." or "e.g."
+_INITIALISM = re.compile(r'(?:\b[a-z]\.){2,}$', re.IGNORECASE)
+_PARAGRAPH = re.compile(r'(\s*\n\s*)')
+
+
+def _ends_with_abbreviation(sentence: str) -> bool:
+    if not sentence.endswith('.'):
+        return False
+    if _INITIALISM.search(sentence):
+        return True
+    words = sentence[:-1].rsplit(None, 1)
+    if not words:
+        return False
+    word = words[-1].lower().lstrip('(["\'')
+    return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+
+def split_sentences(paragraph: str) -> list:
+    """
+    Split a paragraph into (sentence, trailing_whitespace) pairs.
+    Joining every pair gives back the paragraph unchanged.
+    """
+    pieces = []
+    start = 0
+    for match in _BOUNDARY.finditer(paragraph):
+        sentence = paragraph[start:match.start(1)]
+        if _ends_with_abbreviation(sentence):
+            continue
+        nxt = paragraph[match.end():match.end() + 1]
+        if nxt and nxt.islower():
+            # "... 5 mg. daily" - a lower-case continuation is not a new sentence
+            continue
+        pieces.append((sentence, match.group(1)))
+        start = match.end()
+    rest = paragraph[start:]
+    if rest.strip():
+        stripped = rest.rstrip()
+        pieces.append((stripped, rest[len(stripped):]))
+    elif rest and pieces:
+        pieces[-1] = (pieces[-1][0], pieces[-1][1] + rest)
+    elif rest:
+        pieces.append(('', rest))
+    return pieces
+
+
+def _fits(text: str, max_chars: int, max_bytes: int = None) -> bool:
+    """Whether text is within max_chars characters and max_bytes UTF-8 bytes"""
+    if len(text) > max_chars:
+        return False
+    return max_bytes is None or len(text) * 4 <= max_bytes or len(text.encode('utf-8')) <= max_bytes
+
+
+def _prefix_length(word: str, max_chars: int, max_bytes: int = None) -> int:
+    """Characters of word that fit both limits, at least one"""
+    end = min(len(word), max_chars)
+    if max_bytes is not None:
+        size = 0
+        for i, char in enumerate(word[:end]):
+            size += len(char.encode('utf-8'))
+            if size > max_bytes:
+                return max(i, 1)
+    return end
+
+
+def _split_oversized(sentence: str, max_chars: int, max_bytes: int = None) -> list:
+    """Split a sentence over the limits at whitespace into (chunk, whitespace) pairs"""
+    pieces = []
+    for word, space in re.findall(r'(\S+)(\s*)', sentence):
+        while not _fits(word, max_chars, max_bytes):
+            end = _prefix_length(word, max_chars, max_bytes)
+            pieces.append((word[:end], ''))
+            word = word[end:]
+        if pieces and pieces[-1][1] and _fits(pieces[-1][0] + pieces[-1][1] + word, max_chars, max_bytes):
+            chunk, gap = pieces[-1]
+            pieces[-1] = (chunk + gap + word, space)
+        else:
+            pieces.append((word, space))
+    return pieces
+
+
+def split_text(text: str, max_chars: int, max_bytes: int = None) -> tuple:
+    """
+    Split text into translatable chunks of at most max_chars characters and,
+    if given, at most max_bytes bytes of UTF-8 (providers such as MyMemory
+    limit the encoded query, which non-Latin scripts fill 2-4x faster).
+
+    Sentences are kept whole where possible and packed together within a
+    line; line and paragraph breaks always end a chunk. Returns
+    (chunks, separators) with len(separators) == len(chunks) + 1, such that
+    separators[0] + chunks[0] + separators[1] + ... + separators[-1] == text.
+    """
+    if max_chars < 1:
+        raise ValueError("max_chars must be >= 1")
+    if max_bytes is not None and max_bytes < 4:
+        # Any single character must fit
+        raise ValueError("max_bytes must be >= 4")
+
+    chunks = []
+    separators = ['']
+    for i, part in enumerate(_PARAGRAPH.split(text)):
+        if i % 2:
+            # Line or paragraph break: always a separator
+            separators[-1] += part
+            continue
+        stripped = part.lstrip()
+        separators[-1] += part[:len(part) - len(stripped)]
+        current = None
+        for sentence, space in split_sentences(stripped):
+            if not sentence.strip():
+                separators[-1] += sentence + space
+                continue
+            if _fits(sentence, max_chars, max_bytes):
+                pieces = [(sentence, space)]
+            else:
+                pieces = _split_oversized(sentence, max_chars, max_bytes)
+                pieces[-1] = (pieces[-1][0], pieces[-1][1] + space)
+            for piece, gap in pieces:
+                if current is not None and \
+                   _fits(chunks[-1] + separators[-1] + piece, max_chars, max_bytes):
+                    chunks[-1] += separators[-1] + piece
+                    separators[-1] = gap
+                else:
+                    chunks.append(piece)
+                    separators.append(gap)
+                current = piece
+    return chunks, separators
+
+
+def join_chunks(chunks, separators) -> str:
+    """Reassemble (translated) chunks with the separators from split_text"""
+    parts = [separators[0]]
+    for chunk, separator in zip(chunks, separators[1:]):
+        parts.append(chunk)
+        parts.append(separator)
+    return ''.join(parts)
@@ -43,4 +43,25 @@ class TranslationSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Translation
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+_datetime_field = serializers.DateTimeField()
+
+class TranslationListSerializer(serializers.ModelSerializer):
+    """
+    Compact read-only representation for history lists.
+
+    Rows come from .values(*Meta.fields), so no model instances are built;
+    the user is left out (the list belongs to one user) as are medical_terms.
+    """
+    class Meta:
+        model = Translation
+        fields = ('id', 'original_text', 'translated_text', 'source_language',
+                  'target_language', 'is_favorite', 'created_at')
+        read_only_fields = fields
+
+    def to_representation(self, row):
+        # Every column but created_at is already JSON-ready
+        data = dict(row)
+        data['created_at'] = _datetime_field.to_representation(row['created_at'])
+        return data
@@ -0,0 +1,345 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import metrics, translation_memory
+from .cache import translation_cache
+from .engines import TranslationServiceError, get_engine
+from .language_detection import adetect_language, detect_language
+from .segmentation import join_chunks, split_text
+from .singleflight import upstream_flight
+
+
+def is_auto(source_lang) -> bool:
+    return not source_lang or source_lang == 'auto'
+
+
+def _cache_key(text: str, source_lang, target_lang: str) -> str:
+    requested = 'auto' if is_auto(source_lang) else source_lang
+    return translation_cache.make_key(text, f"{requested}|{target_lang}")
+
+
+def lookup(text: str, source_lang, target_lang: str):
+    """
+    Return a stored translation of text from the cache or the translation
+    memory, or None. Result dicts carry translated_text, source_language,
+    from_cache and from_memory.
+    """
+    with metrics.timed('lookup'):
+        result = _lookup(text, source_lang, target_lang)
+    if metrics.enabled():
+        metrics.LOOKUPS.inc(result='miss' if result is None else 'cache' if result['from_cache'] else 'memory')
+    return result
+
+
+def _lookup(text: str, source_lang, target_lang: str):
+    cache_key = _cache_key(text, source_lang, target_lang)
+    cached = translation_cache.get(cache_key)
+    if cached:
+        return {**cached, 'from_cache': True, 'from_memory': False}
+
+    entry = translation_memory.lookup(
+        text, None if is_auto(source_lang) else source_lang, target_lang
+    )
+    if entry is None:
+        return None
+    result = {
+        'translated_text': entry.translated_text,
+        'source_language': entry.source_language,
+    }
+    translation_cache.set(cache_key, result)
+    return {**result, 'from_cache': False, 'from_memory': True}
+
+
+def fetch(text: str, source_lang, target_lang: str) -> dict:
+    """
+    Translate text with the configured engine, detecting the source language
+    if needed.
+    Does no database work, so it is safe to run from worker threads.
+    Concurrent fetches of the same normalized text and language pair share
+    one upstream call (see SINGLE_FLIGHT).
+    Raises UpstreamError or TranslationServiceError.
+    """
+    if not settings.SINGLE_FLIGHT['ENABLED']:
+        return _fetch(text, source_lang, target_lang)
+    return upstream_flight.do(_flight_key(text, source_lang, target_lang), _fetch, text, source_lang, target_lang)
+
+
+def _flight_key(text: str, source_lang, target_lang: str) -> str:
+    requested = 'auto' if is_auto(source_lang) else source_lang
+    return f"{translation_memory.text_hash(text)}:{requested}|{target_lang}"
+
+
+def _fetch(text: str, source_lang, target_lang: str) -> dict:
+    # Auto-detect source language if not provided
+    if is_auto(source_lang):
+        source_lang, confidence = detect_language(text)
+
+    return _result(get_engine().translate(text, source_lang, target_lang), source_lang)
+
+
+async def afetch(text: str, source_lang, target_lang: str) -> dict:
+    """Async variant of fetch; shares its flights with fetch"""
+    if not settings.SINGLE_FLIGHT['ENABLED']:
+        return await _afetch(text, source_lang, target_lang)
+    return await upstream_flight.ado(
+        _flight_key(text, source_lang, target_lang), _afetch, text, source_lang, target_lang
+    )
+
+
+async def _afetch(text: str, source_lang, target_lang: str) -> dict:
+    if is_auto(source_lang):
+        source_lang, confidence = await adetect_language(text)
+
+    return _result(await get_engine().atranslate(text, source_lang, target_lang), source_lang)
+
+
+def _result(translated_text: str, source_lang: str) -> dict:
+    return {
+        'translated_text': translated_text,
+        'source_language': source_lang,
+        'from_cache': False,
+        'from_memory': False,
+    }
+
+
+def remember(text: str, requested_source, target_lang: str, result: dict):
+    """Store a fresh upstream result in the translation memory and the cache"""
+    translation_memory.store(text, result['source_language'], target_lang, result['translated_text'])
+    translation_cache.set(_cache_key(text, requested_source, target_lang), {
+        'translated_text': result['translated_text'],
+        'source_language': result['source_language'],
+    })
+
+
+def max_chars() -> int:
+    """Longest text, in characters, translated in one engine call; longer texts are chunked"""
+    limit = settings.TEXT_CHUNKING['MAX_CHARS']
+    engine_limit = get_engine().max_segment_length
+    return min(limit, engine_limit) if engine_limit else limit
+
+
+def max_bytes():
+    """Longest text, in UTF-8 bytes, the engine takes in one call (None for no limit)"""
+    return get_engine().max_segment_bytes
+
+
+def needs_chunking(text: str) -> bool:
+    """Whether text is over either limit of one engine call"""
+    limit = max_bytes()
+    if len(text) > max_chars():
+        return True
+    return limit is not None and len(text) * 4 > limit and len(text.encode('utf-8')) > limit
+
+
+def split_for_engine(text: str) -> tuple:
+    """split_text() within the limits of one engine call"""
+    return split_text(text, max_chars(), max_bytes())
+
+
+def translate(text: str, source_lang, target_lang: str) -> dict:
+    """
+    Translate one text, reusing stored translations where possible.
+    Texts over the limits of one engine call are split into sentence
+    chunks that are translated concurrently and reassembled; their result
+    carries a 'chunks' report with per-chunk timings.
+    """
+    result = lookup(text, source_lang, target_lang)
+    if result is None:
+        if needs_chunking(text):
+            result = _translate_chunked(text, source_lang, target_lang)
+        else:
+            result = fetch(text, source_lang, target_lang)
+        remember(text, source_lang, target_lang, result)
+    return result
+
+
+def _translate_chunked(text: str, source_lang, target_lang: str) -> dict:
+    options = settings.TEXT_CHUNKING
+    start = time.perf_counter()
+
+    # Detect once on the whole text so every chunk uses the same pair
+    if is_auto(source_lang):
+        source_lang, confidence = detect_language(text)
+
+    chunks, separators = split_for_engine(text)
+    results = translate_many(
+        [(chunk, source_lang, target_lang) for chunk in chunks],
+        max_workers=options['MAX_WORKERS']
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+    return {
+        'translated_text': join_chunks([result['translated_text'] for result in results], separators),
+        'source_language': source_lang,
+        'from_cache': False,
+        'from_memory': False,
+        'chunks': {
+            'count': len(chunks),
+            'max_chars': max_chars(),
+            'max_bytes': max_bytes(),
+            'total_ms': round((time.perf_counter() - start) * 1000, 2),
+            'chunk_ms': [result.get('elapsed_ms', 0.0) for result in results],
+            'chunk_chars': [len(chunk) for chunk in chunks],
+        },
+    }
+
+
+async def atranslate(text: str, source_lang, target_lang: str) -> dict:
+    """
+    Async variant of translate. Upstream calls use the async client; cache,
+    translation memory and ORM work run through sync_to_async.
+    """
+    result = await sync_to_async(lookup)(text, source_lang, target_lang)
+    if result is None:
+        if needs_chunking(text):
+            result = await _atranslate_chunked(text, source_lang, target_lang)
+        else:
+            result = await afetch(text, source_lang, target_lang)
+        await sync_to_async(remember)(text, source_lang, target_lang, result)
+    return result
+
+
+async def _atranslate_chunked(text: str, source_lang, target_lang: str) -> dict:
+    options = settings.TEXT_CHUNKING
+    start = time.perf_counter()
+
+    # Detect once on the whole text so every chunk uses the same pair
+    if is_auto(source_lang):
+        source_lang, confidence = await adetect_language(text)
+
+    chunks, separators = split_for_engine(text)
+    limit = asyncio.Semaphore(max(1, options['MAX_WORKERS']))
+
+    async def translate_chunk(chunk):
+        async with limit:
+            chunk_start = time.perf_counter()
+            result = await atranslate(chunk, source_lang, target_lang)
+            return result, round((time.perf_counter() - chunk_start) * 1000, 2)
+
+    results = await asyncio.gather(*(translate_chunk(chunk) for chunk in chunks))
+
+    return {
+        'translated_text': join_chunks([result['translated_text'] for result, _ in results], separators),
+        'source_language': source_lang,
+        'from_cache': False,
+        'from_memory': False,
+        'chunks': {
+            'count': len(chunks),
+            'max_chars': max_chars(),
+            'max_bytes': max_bytes(),
+            'total_ms': round((time.perf_counter() - start) * 1000, 2),
+            'chunk_ms': [elapsed for _, elapsed in results],
+            'chunk_chars': [len(chunk) for chunk in chunks],
+        },
+    }
+
+
+def iter_translations(segments, max_workers: int = None):
+    """
+    Translate (text, source_lang, target_lang) segments, yielding
+    (index, result) pairs as soon as each one is ready. result is a result
+    dict or the exception raised for that segment.
+
+    Identical segments are translated once. Stored translations are looked up
+    first; the remaining upstream calls run concurrently on a bounded thread
+    pool while all database work stays on the consuming thread. Engines that
+    support batches get one translate_batch call per language pair instead.
+    """
+    if max_workers is None:
+        max_workers = settings.BATCH_TRANSLATION['MAX_WORKERS']
+
+    stored = {}
+    pending = {}
+    for index, segment in enumerate(segments):
+        text, source, target = segment
+        key = (translation_memory.text_hash(text), 'auto' if is_auto(source) else source, target)
+        if key in stored:
+            yield index, stored[key]
+        elif key in pending:
+            pending[key][1].append(index)
+        else:
+            found = lookup(text, source, target)
+            if found is None:
+                pending[key] = (segment, [index])
+            else:
+                stored[key] = found
+                yield index, found
+
+    if not pending:
+        return
+    engine = get_engine()
+    if engine.supports_batch:
+        yield from _iter_batched(engine, pending.values())
+        return
+
+    def fetch_one(segment):
+        start = time.perf_counter()
+        try:
+            result = fetch(*segment)
+        except Exception as e:
+            return e
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending))))
+    try:
+        # Each call runs in a copy of this context, so its upstream and
+        # detect time reach the request's Server-Timing
+        futures = {
+            pool.submit(contextvars.copy_context().run, fetch_one, segment): (segment, indices)
+            for segment, indices in pending.values()
+        }
+        for future in as_completed(futures):
+            (text, source, target), indices = futures[future]
+            result = future.result()
+            if not isinstance(result, Exception):
+                remember(text, source, target, result)
+            for index in indices:
+                yield index, result
+    finally:
+        # A consumer that stops early (client went away) cancels queued calls
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_batched(engine, pending):
+    """Translate pending (segment, indices) entries with one engine call per language pair"""
+    groups = {}
+    for (text, source, target), indices in pending:
+        pair = (detect_language(text)[0] if is_auto(source) else source, target)
+        groups.setdefault(pair, []).append((text, source, indices))
+
+    for (source_lang, target_lang), entries in groups.items():
+        start = time.perf_counter()
+        try:
+            translated = engine.translate_batch([text for text, _, _ in entries], source_lang, target_lang)
+        except Exception as e:
+            translated = [e] * len(entries)
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        for (text, source, indices), translated_text in zip(entries, translated):
+            if isinstance(translated_text, Exception):
+                result = translated_text
+            else:
+                result = _result(translated_text, source_lang)
+                result['elapsed_ms'] = elapsed_ms
+                remember(text, source, target_lang, result)
+            for index in indices:
+                yield index, result
+
+
+def translate_many(segments, max_workers: int = None) -> list:
+    """
+    Translate (text, source_lang, target_lang) segments concurrently.
+    Returns one result dict, or the exception raised for it, per segment in
+    input order. See iter_translations.
+    """
+    results = [None] * len(segments)
+    for index, result in iter_translations(segments, max_workers):
+        results[index] = result
+    return results
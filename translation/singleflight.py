@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one.
+
+    The first caller of a key (the leader) runs the function; callers that
+    arrive while it is running wait for it and get a copy of its result or
+    its exception. do() and ado() share the flights, so threads and event
+    loops of one process wait on the same call. With shared=True, leaders of
+    different worker processes also coordinate through a short-lived lock in
+    a Django cache: only the worker holding the lock calls out, the others
+    poll the cache for the result it publishes and call out themselves if it
+    never appears.
+    """
+
+    def __init__(self, shared: bool = False, cache_alias: str = 'default', lock_ttl: int = 10,
+                 wait_timeout: float = 5.0, poll_interval: float = 0.05, prefix: str = 'singleflight'):
+        self.shared = shared
+        self.cache_alias = cache_alias
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.originated = 0
+        self.coalesced = 0
+        self.coalesced_shared = 0
+
+    def do(self, key: str, fn, *args, **kwargs):
+        call, leader = self._join(key)
+        if not leader:
+            return self._copy(call.result())
+
+        try:
+            if self.shared:
+                result = self._do_shared(key, fn, *args, **kwargs)
+            else:
+                result = self._originate(fn, *args, **kwargs)
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result)
+        return result
+
+    async def ado(self, key: str, fn, *args, **kwargs):
+        """Async variant of do: fn is a coroutine function, waiting does not block the event loop"""
+        call, leader = self._join(key)
+        if not leader:
+            return self._copy(await asyncio.wrap_future(call))
+
+        try:
+            if self.shared:
+                result = await self._ado_shared(key, fn, *args, **kwargs)
+            else:
+                result = await self._aoriginate(fn, *args, **kwargs)
+        except BaseException as e:
+            # Cancellation too: waiters must never be left hanging
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result)
+        return result
+
+    def _join(self, key: str) -> tuple:
+        """(call, leader): the call in flight for key, or a new one the caller leads"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = Future()
+            # Running: a waiter giving up cannot cancel it for the others
+            call.set_running_or_notify_cancel()
+            return call, True
+
+    def _finish(self, key: str, call: Future, result=None, error: BaseException = None):
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            call.set_exception(error)
+        else:
+            call.set_result(result)
+
+    def _originate(self, fn, *args, **kwargs):
+        with self._lock:
+            self.originated += 1
+        return fn(*args, **kwargs)
+
+    async def _aoriginate(self, fn, *args, **kwargs):
+        with self._lock:
+            self.originated += 1
+        return await fn(*args, **kwargs)
+
+    def _do_shared(self, key: str, fn, *args, **kwargs):
+        cache = caches[self.cache_alias]
+        lock_key = f"{self.prefix}:lock:{key}"
+        result_key = f"{self.prefix}:result:{key}"
+        try:
+            owner = uuid.uuid4().hex
+            acquired = cache.add(lock_key, owner, timeout=self.lock_ttl)
+        except Exception as e:
+            print(f"Single-flight lock error: {str(e)}")
+            return self._originate(fn, *args, **kwargs)
+
+        if acquired:
+            try:
+                result = self._originate(fn, *args, **kwargs)
+                try:
+                    cache.set(result_key, result, timeout=self.lock_ttl)
+                except Exception as e:
+                    print(f"Single-flight publish error: {str(e)}")
+                return result
+            finally:
+                try:
+                    if cache.get(lock_key) == owner:
+                        cache.delete(lock_key)
+                except Exception:
+                    pass
+
+        # Another worker is calling out: wait for what it publishes
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            try:
+                result = cache.get(result_key)
+                if result is not None:
+                    with self._lock:
+                        self.coalesced_shared += 1
+                    return result
+                if cache.get(lock_key) is None and cache.get(result_key) is None:
+                    break  # the other worker failed
+            except Exception:
+                break
+            time.sleep(self.poll_interval)
+        return self._originate(fn, *args, **kwargs)
+
+    async def _ado_shared(self, key: str, fn, *args, **kwargs):
+        # Same protocol as _do_shared, through the cache's async API
+        cache = caches[self.cache_alias]
+        lock_key = f"{self.prefix}:lock:{key}"
+        result_key = f"{self.prefix}:result:{key}"
+        try:
+            owner = uuid.uuid4().hex
+            acquired = await cache.aadd(lock_key, owner, timeout=self.lock_ttl)
+        except Exception as e:
+            print(f"Single-flight lock error: {str(e)}")
+            return await self._aoriginate(fn, *args, **kwargs)
+
+        if acquired:
+            try:
+                result = await self._aoriginate(fn, *args, **kwargs)
+                try:
+                    await cache.aset(result_key, result, timeout=self.lock_ttl)
+                except Exception as e:
+                    print(f"Single-flight publish error: {str(e)}")
+                return result
+            finally:
+                try:
+                    if await cache.aget(lock_key) == owner:
+                        await cache.adelete(lock_key)
+                except Exception:
+                    pass
+
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            try:
+                result = await cache.aget(result_key)
+                if result is not None:
+                    with self._lock:
+                        self.coalesced_shared += 1
+                    return result
+                if await cache.aget(lock_key) is None and await cache.aget(result_key) is None:
+                    break  # the other worker failed
+            except Exception:
+                break
+            await asyncio.sleep(self.poll_interval)
+        return await self._aoriginate(fn, *args, **kwargs)
+
+    @staticmethod
+    def _copy(result):
+        # Callers may annotate their result (elapsed_ms etc.)
+        return dict(result) if isinstance(result, dict) else result
+
+    def stats(self) -> dict:
+        return {
+            'shared': self.shared,
+            'in_flight': len(self._calls),
+            'originated': self.originated,
+            'coalesced': self.coalesced,
+            'coalesced_shared': self.coalesced_shared,
+        }
+
+
+def _build_upstream_flight() -> SingleFlight:
+    options = settings.SINGLE_FLIGHT
+    return SingleFlight(
+        shared=options['SHARED'],
+        cache_alias=options['CACHE_ALIAS'],
+        lock_ttl=options['LOCK_TTL'],
+        wait_timeout=options['WAIT_TIMEOUT'],
+        poll_interval=options['POLL_INTERVAL'],
+        prefix='translation-flight'
+    )
+
+
+upstream_flight = _build_upstream_flight()
+
+
+def stats() -> dict:
+    return upstream_flight.stats()
@@ -0,0 +1,163 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import metrics
+from .medical_utils import MedicalTerminologyValidator
+from .models import MedicalTermUsage, Translation
+
+
+def usage_counts(translations) -> Counter:
+    """Count (term, source_language, target_language, day) over saved translations"""
+    counts = Counter()
+    for translation in translations:
+        terms = (translation.medical_terms or {}).get('terms')
+        if not terms:
+            continue
+        day = timezone.localdate(translation.created_at) if settings.USE_TZ else translation.created_at.date()
+        for term in terms:
+            counts[(term, translation.source_language, translation.target_language, day)] += 1
+    return counts
+
+
+def add_counts(counts: Counter, batch_size: int = 500):
+    """Add counts to the rollup with one upsert statement per batch_size rows"""
+    if not counts:
+        return
+    table = connection.ops.quote_name(MedicalTermUsage._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(column) for column in
+                        ('term', 'source_language', 'target_language', 'day', 'count'))
+    key = ', '.join(connection.ops.quote_name(column) for column in
+                    ('source_language', 'target_language', 'day', 'term'))
+    count = connection.ops.quote_name('count')
+    items = list(counts.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            # INSERT ... ON CONFLICT works on both PostgreSQL and SQLite (3.24+)
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(batch))} "
+                f"ON CONFLICT ({key}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}",
+                [value for (term, source, target, day), n in batch for value in (term, source, target, day, n)]
+            )
+
+
+def record_usage(translations):
+    """
+    Add freshly saved translations to the rollup. Call it in the transaction
+    that saved them (see save_translations), so a concurrent rebuild counts
+    each translation once. The rollup is derived data (rebuild_term_usage
+    recomputes it), so a failure is reported and counted, not raised; it
+    runs in a savepoint and leaves the caller's transaction usable.
+    """
+    translations = list(translations)
+    try:
+        with transaction.atomic():
+            add_counts(usage_counts(translations))
+    except Exception as e:
+        if metrics.enabled():
+            metrics.TERM_USAGE_ERRORS.inc(len(translations))
+        print(f"Term usage update failed, {len(translations)} translations not counted: {str(e)}")
+
+
+def save_translations(translations) -> list:
+    """bulk_create translations and add them to the rollup in one transaction"""
+    with transaction.atomic():
+        saved = Translation.objects.bulk_create(translations)
+        record_usage(saved)
+    return saved
+
+
+def _lock_usage():
+    """
+    Block rollup writers until the current transaction ends. Writers add
+    usage in the transaction that saves their translations, so afterwards
+    every translation visible to this one is already counted, and one
+    committed later is counted by its own writer. SQLite takes its
+    database-wide write lock at the first write, which does the same.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"LOCK TABLE {connection.ops.quote_name(MedicalTermUsage._meta.db_table)} "
+                f"IN SHARE ROW EXCLUSIVE MODE"
+            )
+
+
+def rebuild(since=None, until=None, batch_size: int = 2000, backfill: bool = False) -> int:
+    """
+    Recompute the rollup for days since..until (dates, both inclusive, None
+    for open ends) from the stored translations, batch_size rows at a time.
+    With backfill, rows saved before medical_terms was populated are analyzed
+    and updated first. Returns the number of translations read.
+
+    The delete and the recount run in one transaction that holds off rollup
+    writers: readers see the old rollup until it commits, and translations
+    saved meanwhile are counted once, by their writer, after it.
+    """
+    usage = MedicalTermUsage.objects.all()
+    translations = Translation.objects.all()
+    if since is not None:
+        usage = usage.filter(day__gte=since)
+        translations = translations.filter(created_at__gte=_start_of(since))
+    if until is not None:
+        usage = usage.filter(day__lte=until)
+        translations = translations.filter(created_at__lt=_start_of(until + timedelta(days=1)))
+
+    with transaction.atomic():
+        _lock_usage()
+        usage.delete()
+        last_id = translations.order_by('-id').values_list('id', flat=True).first()
+        if last_id is None:
+            return 0
+
+        validators = {} if backfill else None  # one per source language
+        rows = translations.filter(id__lte=last_id).order_by('id').only(
+            'id', 'original_text', 'source_language', 'target_language', 'created_at', 'medical_terms'
+        ).iterator(chunk_size=batch_size)
+
+        read = 0
+        batch = []
+        for translation in rows:
+            batch.append(translation)
+            if len(batch) >= batch_size:
+                read += _rebuild_batch(batch, validators)
+                batch = []
+        if batch:
+            read += _rebuild_batch(batch, validators)
+    return read
+
+
+def _rebuild_batch(batch, validators) -> int:
+    if validators is not None:
+        stale = [translation for translation in batch if not translation.medical_terms]
+        for translation in stale:
+            validator = validators.get(translation.source_language)
+            if validator is None:
+                validator = validators[translation.source_language] = \
+                    MedicalTerminologyValidator(translation.source_language)
+            translation.medical_terms = validator.analyze(translation.original_text)
+        Translation.objects.bulk_update(stale, ['medical_terms'])
+    add_counts(usage_counts(batch))
+    return len(batch)
+
+
+def _start_of(day):
+    start = datetime(day.year, day.month, day.day)
+    return timezone.make_aware(start) if settings.USE_TZ else start
+
+
+def top_terms(source_lang: str, target_lang: str, since, until=None, limit: int = 20) -> list:
+    """Most mentioned terms of a language pair between two days (inclusive)"""
+    usage = MedicalTermUsage.objects.filter(
+        source_language=source_lang, target_language=target_lang, day__gte=since
+    )
+    if until is not None:
+        usage = usage.filter(day__lte=until)
+    return list(
+        usage.values('term').annotate(total=Sum('count')).order_by('-total', 'term')[:limit]
+    )
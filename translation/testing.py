@@ -0,0 +1,121 @@
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _MyMemoryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        text = query.get('q', [''])[0]
+        source, _, target = query.get('langpair', ['|'])[0].partition('|')
+
+        with server.lock:
+            server.requests += 1
+            server.longest_query = max(server.longest_query, len(text.encode('utf-8')))
+            fail = server.fail_next > 0 or server.random.random() < server.error_rate
+            if server.fail_next > 0:
+                server.fail_next -= 1
+            latency = server.latency + (server.random.uniform(0, server.jitter) if server.jitter else 0.0)
+        if latency:
+            time.sleep(latency)
+
+        if fail:
+            self._send(503, {'responseStatus': 503, 'responseDetails': 'Injected failure'})
+            return
+        detected = server.detected_language if source == 'auto' else source
+        self._send(200, {
+            'responseStatus': 200,
+            'responseData': {
+                'translatedText': server.translate(text, detected, target),
+                'detectedLanguage': detected,
+                'match': 1,
+            },
+        })
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeMyMemoryServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the MyMemory /get API, for tests and benchmarks.
+
+    Translations are deterministic ("[es] text"). Latency (plus up to jitter
+    seconds of random extra latency), a random error rate and a number of
+    forced failures can be injected; request and connection counts and the
+    longest query, in UTF-8 bytes, are recorded.
+
+        with FakeMyMemoryServer(latency=0.05) as server:
+            settings.MYMEMORY_URL = server.url
+    """
+    daemon_threads = True
+    # Load tests open many connections at once; the default backlog of 5
+    # would stall the overflow on SYN retransmits
+    request_queue_size = 128
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0,
+                 detected_language: str = 'en', seed: int = 0, jitter: float = 0.0):
+        super().__init__(('127.0.0.1', 0), _MyMemoryHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.detected_language = detected_language
+        self.fail_next = 0
+        self.requests = 0
+        self.connections = 0
+        self.longest_query = 0
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/get"
+
+    @staticmethod
+    def translate(text: str, source: str, target: str) -> str:
+        return f"[{target}] {text}"
+
+    def handle_error(self, request, client_address):
+        # Clients that time out on purpose hang up mid-response
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -1,14 +1,70 @@
-from django.test import TestCase, Client
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, Client, AsyncClient, override_settings
+from django.core.management import call_command
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
 from django.urls import reverse
 from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import Translation
-from .medical_utils import MedicalTerminologyValidator
-from unittest.mock import patch
+from .models import MedicalTermUsage, Translation, TranslationMemory
+from . import metrics, services, term_usage, translation_memory, write_behind
+from .engines import GlossaryEngine, MyMemoryEngine, TranslationServiceError, get_engine, reset_engine
+from .cache import LRUCache, TieredCache, translation_cache, detection_cache, token_cache
+from .authentication import TokenAuthentication, token_cache_key
+from .medical_utils import MedicalTerminologyValidator, FuzzyTermMatcher
+from .recognizer import PhraseRecognizer, TermMatch, get_recognizer
+from .language_detection import detect_language, detect_language_local
+from .lexicon import CompiledLexicon, LanguageLexicons, compile_lexicon, compiled_path
+from .testing import FakeMyMemoryServer
+from .resilience import AdaptiveConcurrencyLimit, CircuitBreaker
+from .upstream import AsyncUpstreamClient, CircuitOpenError, UpstreamClient, UpstreamError, reset_client
+from .segmentation import split_text, join_chunks
+from .singleflight import SingleFlight
+from .write_behind import WriteBehindBuffer
+from difflib import get_close_matches
+from unittest.mock import MagicMock, patch
+from datetime import timedelta
+from django.utils import timezone
+import asyncio
+import csv
+import gzip
+import io
+import time
+import json
+import os
+import random
+import tempfile
+import threading
 
 User = get_user_model()
 
+# The suite clears the default cache; keep it off any configured shared one
+_private_cache = override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'medical-translator-tests',
+    }
+})
+
+
+def setUpModule():
+    _private_cache.enable()
+
+
+def tearDownModule():
+    _private_cache.disable()
+
+def clear_caches():
+    cache.clear()
+    translation_cache.clear()
+    detection_cache.clear()
+    token_cache.clear()
+    # Fresh upstream client, circuit breaker and concurrency limit
+    reset_client()
+    reset_engine()
+
 class AuthenticationTests(APITestCase):
     def setUp(self):
         self.client = Client()
@@ -38,6 +94,74 @@ class AuthenticationTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue('token' in response.data)
 
+class TokenCacheTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.profile_url = reverse('profile')
+
+    def test_warm_cache_needs_no_auth_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.profile_url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'testuser')
+
+    def test_shared_tier_serves_other_workers(self):
+        # A cache every worker can reach; LocMemCache would be skipped
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tmpdir.name,
+        }}):
+            self.client.get(self.profile_url)
+            token_cache.local.clear()
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(self.profile_url).status_code, status.HTTP_200_OK)
+
+    def test_process_local_shared_tier_is_skipped(self):
+        self.client.get(self.profile_url)
+        cache_key = token_cache_key(self.token.key)
+        self.assertIsNotNone(token_cache.get(cache_key))
+        self.assertIsNone(caches['default'].get(cache_key))
+        self.assertTrue(token_cache.stats()['shared']['skipped'])
+        token_cache.local.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.profile_url).status_code, status.HTTP_200_OK)
+
+    def test_cached_entries_hold_no_secrets(self):
+        self.client.get(self.profile_url)
+        user_values, token_values = token_cache.get(token_cache_key(self.token.key))
+        self.assertNotIn('password', user_values)
+        self.assertNotIn('key', token_values)
+        self.assertNotIn(self.token.key, repr(token_values))
+        user, token = TokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertEqual(token.key, self.token.key)
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_logout_invalidates(self):
+        self.client.get(self.profile_url)
+        self.assertEqual(self.client.post(reverse('logout')).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.profile_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_changes_invalidate(self):
+        self.client.get(self.profile_url)
+        self.client.put(self.profile_url, {'first_name': 'Ana'})
+        self.assertEqual(self.client.get(self.profile_url).data['first_name'], 'Ana')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.profile_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unknown_token_is_not_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + 'x' * 40)
+        self.assertEqual(self.client.get(self.profile_url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(token_cache.local), 0)
+
 class TranslationTests(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -47,8 +171,9 @@ class TranslationTests(APITestCase):
         )
         self.client.force_authenticate(user=self.user)
         self.translate_url = reverse('translate')
+        clear_caches()
 
-    @patch('translation.views.requests.get')
+    @patch('translation.upstream.UpstreamClient.get')
     def test_translation_creation(self, mock_get):
         # Mock MyMemory API response
         mock_get.return_value.json.return_value = {
@@ -82,6 +207,1522 @@ class TranslationTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(len(response.data) > 0)
 
+class TranslationMemoryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.translate_url = reverse('translate')
+        clear_caches()
+
+    @patch('translation.upstream.UpstreamClient.get')
+    def test_repeated_segment_skips_upstream(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            'responseStatus': 200,
+            'responseData': {'translatedText': 'Tomar dos veces al día'}
+        }
+        data = {'text': 'Take twice daily', 'source_lang': 'en', 'target_lang': 'es'}
+
+        first = self.client.post(self.translate_url, data)
+        clear_caches()
+        second = self.client.post(self.translate_url, {**data, 'text': '  Take  twice daily '})
+
+        self.assertFalse(first.data['from_memory'])
+        self.assertTrue(second.data['from_memory'])
+        self.assertEqual(second.data['translated_text'], 'Tomar dos veces al día')
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(Translation.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(TranslationMemory.objects.get().hit_count, 1)
+
+    @patch('translation.upstream.UpstreamClient.get')
+    def test_line_breaks_are_not_shared(self, mock_get):
+        def upstream(url, params):
+            response = MagicMock()
+            response.json.return_value = {
+                'responseStatus': 200,
+                'responseData': {'translatedText': params['q'].upper()}
+            }
+            return response
+        mock_get.side_effect = upstream
+
+        texts = ['Take twice daily.\n\nAvoid alcohol.', 'Take twice daily. Avoid alcohol.',
+                 'Take twice daily.\nAvoid alcohol.']
+        for text in texts:
+            response = self.client.post(self.translate_url, {
+                'text': text, 'source_lang': 'en', 'target_lang': 'es'
+            })
+            self.assertFalse(response.data['from_memory'])
+            self.assertFalse(response.data['from_cache'])
+            self.assertEqual(response.data['translated_text'], text.upper())
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(sorted(TranslationMemory.objects.values_list('source_text', flat=True)),
+                         sorted(texts))
+        self.assertEqual(translation_memory.normalize_text(' Take  twice\t daily. \n Avoid alcohol. '),
+                         'Take twice daily.\nAvoid alcohol.')
+
+    @patch('translation.services.detect_language')
+    @patch('translation.upstream.UpstreamClient.get')
+    def test_auto_detect_hit_skips_detection(self, mock_get, mock_detect):
+        translation_memory.store('Any allergies?', 'en', 'es', '¿Alguna alergia?')
+        response = self.client.post(self.translate_url, {
+            'text': 'Any allergies?', 'source_lang': 'auto', 'target_lang': 'es'
+        })
+        self.assertTrue(response.data['from_memory'])
+        self.assertEqual(response.data['detected_language'], 'en')
+        mock_detect.assert_not_called()
+        mock_get.assert_not_called()
+
+    def test_prune(self):
+        translation_memory.store('old', 'en', 'es', 'viejo')
+        translation_memory.store('recent', 'en', 'es', 'reciente')
+        translation_memory.store('newest', 'en', 'es', 'más nuevo')
+        TranslationMemory.objects.filter(source_text='old').update(
+            last_used_at=timezone.now() - timedelta(days=400)
+        )
+        TranslationMemory.objects.filter(source_text='recent').update(
+            last_used_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(translation_memory.prune(max_age_days=365, max_entries=1), 2)
+        self.assertEqual(list(TranslationMemory.objects.values_list('source_text', flat=True)), ['newest'])
+
+class CacheTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.translate_url = reverse('translate')
+        clear_caches()
+
+    def test_lru_eviction_and_ttl(self):
+        lru = LRUCache(max_entries=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+        lru.set('d', 4, ttl=-1)
+        self.assertIsNone(lru.get('d'))
+        self.assertEqual(lru.stats()['evictions'], 2)
+        self.assertEqual(lru.stats()['expirations'], 1)
+
+    def test_suite_uses_a_private_cache(self):
+        # clear_caches() must never wipe a real shared cache
+        self.assertIsInstance(caches['default'], LocMemCache)
+        self.assertEqual(settings.CACHES['default']['LOCATION'], 'medical-translator-tests')
+
+    def test_shared_tier_fills_local_tier(self):
+        tiered = TieredCache('test', local_max_entries=10, local_ttl=60, shared_ttl=60)
+        key = tiered.make_key('Hello', 'en|es')
+        cache.set(key, 'Hola')
+        self.assertEqual(tiered.get(key), 'Hola')
+        self.assertEqual(tiered.get(key), 'Hola')
+        stats = tiered.stats()
+        self.assertEqual(stats['shared']['hits'], 1)
+        self.assertEqual(stats['local']['hits'], 1)
+
+    @patch('translation.upstream.UpstreamClient.get')
+    def test_repeated_request_served_from_cache(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            'responseStatus': 200,
+            'responseData': {'translatedText': 'Hola'}
+        }
+        data = {'text': 'Hello', 'source_lang': 'en', 'target_lang': 'es'}
+        self.client.post(self.translate_url, data)
+        response = self.client.post(self.translate_url, data)
+        self.assertTrue(response.data['from_cache'])
+        self.assertEqual(response.data['translated_text'], 'Hola')
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('translation.upstream.UpstreamClient.get')
+    def test_detection_is_cached(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            'responseStatus': 200,
+            'responseData': {'detectedLanguage': 'en'}
+        }
+        self.assertEqual(detect_language('Any allergies?'), ('en', 1.0))
+        self.assertEqual(detect_language('Any allergies?'), ('en', 1.0))
+        self.assertEqual(mock_get.call_count, 1)
+
+class LanguageDetectionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_local_detection(self):
+        samples = {
+            'en': 'I have a headache and fever since yesterday',
+            'es': '¿Le duele el pecho cuando respira?',
+            'fr': 'Avez-vous mal à la poitrine quand vous respirez?',
+            'de': 'Ich habe seit gestern Kopfschmerzen und Fieber',
+            'it': 'Ho mal di testa e febbre da ieri',
+            'pt': 'Você sente dor no peito quando respira?',
+            'ar': 'هل لديك حساسية من أي دواء؟',
+            'ru': 'У вас есть аллергия на лекарства?',
+            'zh': '你对药物过敏吗？',
+            'ja': '薬のアレルギーはありますか？',
+            'ko': '약에 알레르기가 있습니까?',
+        }
+        for language, text in samples.items():
+            detected, confidence = detect_language_local(text)
+            self.assertEqual(detected, language, msg=text)
+            self.assertGreater(confidence, 0.5, msg=text)
+
+    def test_no_letters(self):
+        self.assertEqual(detect_language_local('120/80 - 37.5'), ('en', 0.0))
+
+    @patch('translation.upstream.UpstreamClient.get')
+    def test_confident_detection_stays_local(self, mock_get):
+        language, confidence = detect_language('Do you have pain in your chest when you breathe?')
+        self.assertEqual(language, 'en')
+        self.assertGreater(confidence, 0.9)
+        mock_get.assert_not_called()
+
+    @patch('translation.upstream.UpstreamClient.get')
+    def test_falls_back_to_local_guess_when_remote_fails(self, mock_get):
+        mock_get.side_effect = UpstreamError('down')
+        language, confidence = detect_language('Hello')
+        self.assertEqual(language, 'en')
+        self.assertEqual(mock_get.call_count, 1)
+
+class UpstreamClientTests(APITestCase):
+    def setUp(self):
+        self.server = FakeMyMemoryServer().start()
+        self.addCleanup(self.server.stop)
+        self.client_ = UpstreamClient(pool_size=2, read_timeout=0.5, max_retries=2, backoff=0.001)
+        self.addCleanup(self.client_.close)
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            response = self.client_.get(self.server.url, params={'q': 'Hello', 'langpair': 'en|es'})
+            self.assertEqual(response.json()['responseData']['translatedText'], '[es] Hello')
+        self.assertEqual(self.server.requests, 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_retries_server_errors(self):
+        self.server.fail_next = 2
+        response = self.client_.get(self.server.url, params={'q': 'Hello', 'langpair': 'en|es'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.fail_next = 3
+        with self.assertRaises(UpstreamError):
+            self.client_.get(self.server.url, params={'q': 'Hello', 'langpair': 'en|es'})
+        self.assertEqual(self.server.requests, 3)
+
+    def test_read_timeout(self):
+        self.server.latency = 1.0
+        client = UpstreamClient(read_timeout=0.1, max_retries=0)
+        self.addCleanup(client.close)
+        with self.assertRaises(UpstreamError):
+            client.get(self.server.url, params={'q': 'Hello', 'langpair': 'en|es'})
+
+    def test_translate_view_uses_upstream(self):
+        user = User.objects.create_user(username='testuser', password='testpass123', email='test@example.com')
+        self.client.force_authenticate(user=user)
+        clear_caches()
+        with override_settings(MYMEMORY_URL=self.server.url):
+            response = self.client.post(reverse('translate'), {
+                'text': 'Take with food', 'source_lang': 'auto', 'target_lang': 'es'
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['translated_text'], '[es] Take with food')
+        self.assertEqual(response.data['detected_language'], 'en')
+
+    def test_translate_view_reports_upstream_failure(self):
+        user = User.objects.create_user(username='testuser', password='testpass123', email='test@example.com')
+        self.client.force_authenticate(user=user)
+        clear_caches()
+        self.server.error_rate = 1.0
+        with override_settings(MYMEMORY_URL=self.server.url):
+            with patch('translation.upstream.time.sleep'):
+                response = self.client.post(reverse('translate'), {
+                    'text': 'Take with food', 'source_lang': 'en', 'target_lang': 'es'
+                })
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def run_concurrently(self, count, fn):
+        results = [None] * count
+        errors = [None] * count
+
+        def worker(i):
+            try:
+                results[i] = fn()
+            except Exception as e:
+                errors[i] = e
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_calls_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'translated_text': 'Hola'}
+
+        results, errors = self.run_concurrently(5, lambda: flight.do('key', slow))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(errors, [None] * 5)
+        self.assertEqual([r['translated_text'] for r in results], ['Hola'] * 5)
+        self.assertEqual(len({id(r) for r in results}), 5)
+        self.assertEqual(flight.stats()['originated'], 1)
+        self.assertEqual(flight.stats()['coalesced'], 4)
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+    def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+
+        def failing():
+            time.sleep(0.1)
+            raise UpstreamError('down')
+
+        results, errors = self.run_concurrently(3, lambda: flight.do('key', failing))
+        self.assertTrue(all(isinstance(e, UpstreamError) for e in errors))
+        # The next call is a fresh flight
+        self.assertEqual(flight.do('key', lambda: 'ok'), 'ok')
+
+    def test_shared_lock_across_workers(self):
+        # Two SingleFlight instances stand in for two worker processes
+        first = SingleFlight(shared=True, poll_interval=0.01)
+        second = SingleFlight(shared=True, poll_interval=0.01)
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'translated_text': 'Hola'}
+
+        leader = threading.Thread(target=first.do, args=('key', slow))
+        leader.start()
+        time.sleep(0.05)
+        result = second.do('key', slow)
+        leader.join()
+        self.assertEqual(result['translated_text'], 'Hola')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second.stats()['coalesced_shared'], 1)
+
+    def test_identical_fetches_hit_upstream_once(self):
+        server = FakeMyMemoryServer(latency=0.2).start()
+        self.addCleanup(server.stop)
+        with override_settings(MYMEMORY_URL=server.url):
+            results, errors = self.run_concurrently(
+                6, lambda: services.fetch('Take  two tablets daily', 'en', 'es')
+            )
+        self.assertEqual(errors, [None] * 6)
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(results[0]['translated_text'], '[es] Take  two tablets daily')
+
+    async def test_async_calls_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.2)
+            return {'translated_text': 'Hola'}
+
+        # A thread joins the same flight through do()
+        thread_results = []
+        thread = threading.Thread(target=lambda: (time.sleep(0.05), thread_results.append(flight.do('key', slow))))
+        thread.start()
+        results = await asyncio.gather(*(flight.ado('key', slow) for _ in range(5)))
+        await asyncio.to_thread(thread.join)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r['translated_text'] for r in results + thread_results], ['Hola'] * 6)
+        self.assertEqual(flight.stats()['coalesced'], 5)
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+    async def test_async_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.1)
+            raise UpstreamError('down')
+
+        results = await asyncio.gather(*(flight.ado('key', failing) for _ in range(3)), return_exceptions=True)
+        self.assertTrue(all(isinstance(e, UpstreamError) for e in results))
+
+        async def ok():
+            return 'ok'
+
+        self.assertEqual(await flight.ado('key', ok), 'ok')
+
+    async def test_identical_async_fetches_hit_upstream_once(self):
+        server = FakeMyMemoryServer(latency=0.2).start()
+        self.addCleanup(server.stop)
+        with override_settings(MYMEMORY_URL=server.url):
+            results = await asyncio.gather(*(
+                services.afetch('Take  two tablets daily', 'en', 'es') for _ in range(6)
+            ))
+        self.assertEqual(server.requests, 1)
+        self.assertEqual([r['translated_text'] for r in results], ['[es] Take  two tablets daily'] * 6)
+
+
+class ResilienceTests(APITestCase):
+    def setUp(self):
+        self.now = 0.0
+        clear_caches()
+
+    def clock(self):
+        return self.now
+
+    def test_breaker_state_machine(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=self.clock)
+        self.assertTrue(breaker.allow())
+        breaker.record(False)
+        self.assertEqual(breaker.state, 'closed')
+        breaker.record(False)
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.retry_after(), 10)
+
+        self.now = 10
+        self.assertEqual(breaker.state, 'half_open')
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # one trial at a time
+        breaker.record(False)
+        self.assertEqual(breaker.state, 'open')
+
+        self.now = 20
+        self.assertTrue(breaker.allow())
+        breaker.record(True)
+        self.assertEqual(breaker.state, 'closed')
+        self.assertEqual(breaker.stats()['trips'], 2)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker(failure_threshold=1, slow_call_threshold=1.0, clock=self.clock)
+        breaker.record(True, elapsed=0.5)
+        self.assertEqual(breaker.state, 'closed')
+        breaker.record(True, elapsed=2.0)
+        self.assertEqual(breaker.state, 'open')
+
+    def test_aimd_limit(self):
+        limiter = AdaptiveConcurrencyLimit(initial=2, min_limit=1, max_limit=4, latency_target=0.5,
+                                           decrease=0.5, clock=self.clock)
+        self.assertTrue(limiter.acquire(0))
+        self.assertTrue(limiter.acquire(0))
+        self.assertFalse(limiter.acquire(0))
+        limiter.release(True, 0.1)
+        limiter.release(True, 0.1)
+        self.assertGreater(limiter.limit, 2)
+
+        for _ in range(50):
+            limiter.acquire(0)
+            limiter.release(True, 0.1)
+        self.assertEqual(limiter.stats()['limit'], 4)
+
+        limiter.acquire(0)
+        limiter.release(False, 0.1)
+        self.assertEqual(limiter.stats()['limit'], 2)
+        # A burst of slow calls only backs off once per latency target
+        limiter.acquire(0)
+        limiter.release(True, 2.0)
+        self.assertEqual(limiter.stats()['limit'], 2)
+        self.now = 1.0
+        limiter.acquire(0)
+        limiter.release(True, 2.0)
+        self.assertEqual(limiter.stats()['limit'], 1)
+
+    def test_async_callers_wait_for_a_slot(self):
+        limiter = AdaptiveConcurrencyLimit(initial=1, min_limit=1, queue_timeout=2.0)
+
+        async def scenario():
+            self.assertTrue(await limiter.acquire_async())
+            waiting = asyncio.ensure_future(limiter.acquire_async())
+            await asyncio.sleep(0.05)
+            self.assertFalse(waiting.done())
+            # Released from another thread, as a sync caller would
+            threading.Thread(target=limiter.release, args=(False, 0.01)).start()
+            self.assertTrue(await asyncio.wait_for(waiting, 1))
+            self.assertFalse(await limiter.acquire_async(timeout=0.05))
+
+        asyncio.run(scenario())
+        self.assertEqual(limiter.stats()['in_flight'], 1)
+        self.assertEqual(limiter.stats()['rejected'], 1)
+
+    def test_async_client_queues_on_a_full_limit(self):
+        server = FakeMyMemoryServer(latency=0.2).start()
+        self.addCleanup(server.stop)
+        limiter = AdaptiveConcurrencyLimit(initial=10, min_limit=2, queue_timeout=1.0)
+
+        async def scenario():
+            client = AsyncUpstreamClient(limiter=limiter)
+            try:
+                return await asyncio.gather(*(
+                    client.get(server.url, params={'q': f'Hello {i}', 'langpair': 'en|es'})
+                    for i in range(30)
+                ))
+            finally:
+                await client.close()
+
+        responses = asyncio.run(scenario())
+        self.assertEqual([response.status_code for response in responses], [200] * 30)
+        self.assertEqual(limiter.stats()['rejected'], 0)
+        self.assertEqual(limiter.stats()['in_flight'], 0)
+
+    def test_client_fails_fast_while_open(self):
+        server = FakeMyMemoryServer(error_rate=1.0).start()
+        self.addCleanup(server.stop)
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=self.clock)
+        client = UpstreamClient(max_retries=0, breaker=breaker)
+        self.addCleanup(client.close)
+        params = {'q': 'Hello', 'langpair': 'en|es'}
+
+        for _ in range(2):
+            with self.assertRaises(UpstreamError):
+                client.get(server.url, params=params)
+        with self.assertRaises(CircuitOpenError):
+            client.get(server.url, params=params)
+        self.assertEqual(server.requests, 2)
+
+        # Upstream recovers; after the reset timeout one trial closes the circuit
+        server.error_rate = 0.0
+        self.now = 10
+        self.assertEqual(client.get(server.url, params=params).status_code, 200)
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_slow_upstream_lowers_the_limit(self):
+        server = FakeMyMemoryServer(latency=0.2).start()
+        self.addCleanup(server.stop)
+        limiter = AdaptiveConcurrencyLimit(initial=8, latency_target=0.1, decrease=0.5)
+        client = UpstreamClient(limiter=limiter)
+        self.addCleanup(client.close)
+        client.get(server.url, params={'q': 'Hello', 'langpair': 'en|es'})
+        self.assertEqual(limiter.stats()['limit'], 4)
+        self.assertEqual(limiter.stats()['in_flight'], 0)
+
+    def test_translate_view_when_open(self):
+        server = FakeMyMemoryServer(error_rate=1.0).start()
+        self.addCleanup(server.stop)
+        breaker_settings = {
+            'ENABLED': True, 'FAILURE_THRESHOLD': 1, 'RESET_TIMEOUT': 30,
+            'HALF_OPEN_CALLS': 1, 'SLOW_CALL_THRESHOLD': 10.0
+        }
+        settings_override = override_settings(MYMEMORY_URL=server.url, CIRCUIT_BREAKER=breaker_settings)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_client()
+        self.addCleanup(reset_client)
+
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=user)
+        translation_memory.store('Take with food', 'en', 'es', 'Tomar con comida')
+        url = reverse('translate')
+
+        with patch('translation.upstream.time.sleep'):
+            response = self.client.post(url, {'text': 'Hello', 'source_lang': 'en', 'target_lang': 'es'})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        requests_before = server.requests
+        response = self.client.post(url, {'text': 'Goodbye', 'source_lang': 'en', 'target_lang': 'es'})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(server.requests, requests_before)
+
+        # Stored translations are still served
+        response = self.client.post(url, {'text': 'Take with food', 'source_lang': 'en', 'target_lang': 'es'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['translated_text'], 'Tomar con comida')
+
+        self.assertEqual(self.client.get(reverse('upstream-status')).status_code, status.HTTP_403_FORBIDDEN)
+        user.is_staff = True
+        user.save()
+        response = self.client.get(reverse('upstream-status'))
+        self.assertEqual(response.data['circuit_breaker']['state'], 'open')
+        self.assertEqual(response.data['circuit_breaker']['rejected'], 1)
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123', is_staff=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        clear_caches()
+        metrics.registry.clear()
+        self.addCleanup(metrics.registry.clear)
+        self.server = FakeMyMemoryServer().start()
+        self.addCleanup(self.server.stop)
+
+    def translate(self, text='Take with food'):
+        return self.client.post(reverse('translate'), {'text': text, 'source_lang': 'auto', 'target_lang': 'es'})
+
+    def test_disabled_by_default(self):
+        self.assertIs(metrics.timed('detect'), metrics.timed('upstream'))
+        with override_settings(MYMEMORY_URL=self.server.url):
+            response = self.translate()
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(metrics.UPSTREAM_CALLS.value(outcome='ok'), 0)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_server_timing_and_counters(self):
+        with override_settings(MYMEMORY_URL=self.server.url, METRICS={'ENABLED': True, 'SERVER_TIMING': True}):
+            response = self.translate()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            stages = [entry.split(';')[0] for entry in response['Server-Timing'].split(', ')]
+            for stage in ('auth', 'lexicon', 'lookup', 'detect', 'upstream', 'db', 'total'):
+                self.assertIn(stage, stages)
+
+            self.translate()
+            history = self.client.get(reverse('translation-list'))
+            self.assertIn('serialize', history['Server-Timing'])
+            body = self.client.get(reverse('metrics')).content.decode()
+
+        self.assertEqual(metrics.UPSTREAM_CALLS.value(outcome='ok'), 1)
+        self.assertEqual(metrics.LOOKUPS.value(result='miss'), 1)
+        self.assertEqual(metrics.LOOKUPS.value(result='cache'), 1)
+        self.assertEqual(metrics.STAGE_SECONDS.count(stage='lexicon'), 2)
+        self.assertIn('translation_lookups_total{result="cache"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{view="translate",method="POST",status="200"} 2', body)
+        self.assertIn('# TYPE translation_stage_duration_seconds histogram', body)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('test_seconds', 'Test', ('stage',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value, stage='x')
+        samples = {(name, labels): value for name, labels, value in histogram.samples()}
+        self.assertEqual(samples[('test_seconds_bucket', '{stage="x",le="0.1"}')], 1)
+        self.assertEqual(samples[('test_seconds_bucket', '{stage="x",le="1.0"}')], 3)
+        self.assertEqual(samples[('test_seconds_bucket', '{stage="x",le="+Inf"}')], 4)
+        self.assertEqual(samples[('test_seconds_count', '{stage="x"}')], 4)
+        self.assertAlmostEqual(samples[('test_seconds_sum', '{stage="x"}')], 4.25)
+
+    def test_status_endpoints_need_staff(self):
+        self.user.is_staff = False
+        self.user.save()
+        with override_settings(METRICS={'ENABLED': True, 'SERVER_TIMING': False}):
+            for name in ('metrics', 'upstream-status', 'lexicon-status'):
+                self.assertEqual(self.client.get(reverse(name)).status_code, status.HTTP_403_FORBIDDEN)
+            self.client.credentials()
+            for name in ('metrics', 'upstream-status', 'lexicon-status'):
+                self.assertEqual(self.client.get(reverse(name)).status_code, status.HTTP_401_UNAUTHORIZED)
+
+class BatchTranslationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.batch_url = reverse('translate-batch')
+        clear_caches()
+        self.server = FakeMyMemoryServer(latency=0.2).start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(MYMEMORY_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_results_in_order_with_deduplication(self):
+        segments = ['Yes', 'No', 'Any allergies?', 'Yes', {'text': 'No', 'target_lang': 'fr'},
+                    'Take with food', 'Yes', 'Shortness of breath']
+        start = time.monotonic()
+        response = self.client.post(self.batch_url, {
+            'segments': segments, 'source_lang': 'en', 'target_lang': 'es'
+        }, format='json')
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['index'] for r in response.data['results']], list(range(len(segments))))
+        self.assertEqual(response.data['results'][0]['translated_text'], '[es] Yes')
+        self.assertEqual(response.data['results'][3]['translated_text'], '[es] Yes')
+        self.assertEqual(response.data['results'][4]['translated_text'], '[fr] No')
+        self.assertEqual(response.data['errors'], 0)
+        # Six distinct segments, fetched concurrently rather than one after another
+        self.assertEqual(self.server.requests, 6)
+        self.assertLess(elapsed, 6 * 0.2)
+        self.assertEqual(Translation.objects.filter(user=self.user).count(), 6)
+
+    def test_per_item_errors(self):
+        self.server.latency = 0
+        response = self.client.post(self.batch_url, {
+            'segments': ['Hello', '', {'text': 'Hi', 'target_lang': None}, 42],
+            'source_lang': 'en', 'target_lang': 'es'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(results[0]['translated_text'], '[es] Hello')
+        self.assertIn('error', results[1])
+        self.assertIn('error', results[2])
+        self.assertIn('error', results[3])
+        self.assertEqual(response.data['errors'], 3)
+
+    def test_upstream_failure_is_reported_per_item(self):
+        self.server.latency = 0
+        self.server.error_rate = 1.0
+        with patch('translation.upstream.time.sleep'):
+            response = self.client.post(self.batch_url, {
+                'segments': ['Hello'], 'source_lang': 'en', 'target_lang': 'es'
+            }, format='json')
+        self.assertEqual(response.data['results'][0]['error'], 'Translation service error')
+        self.assertFalse(Translation.objects.exists())
+
+    def test_rejects_bad_payload(self):
+        response = self.client.post(self.batch_url, {'segments': 'Hello'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+@override_settings(TRANSLATION_ENGINE={'BACKEND': 'translation.engines.GlossaryEngine', 'OPTIONS': {}})
+class TranslationEngineTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        clear_caches()
+        self.addCleanup(reset_engine)
+
+    def test_glossary_prefers_longest_phrase(self):
+        engine = GlossaryEngine()
+        self.assertEqual(engine.translate('Take one tablet twice a day.', 'en', 'es'),
+                         'Tome one tableta dos veces al día.')
+        self.assertEqual(engine.translate('Check your blood pressure', 'en', 'es'),
+                         'Check su presión arterial')
+        self.assertEqual(engine.translate('Hola', 'es', 'es'), 'Hola')
+        with self.assertRaises(TranslationServiceError):
+            engine.translate('Hello', 'en', 'xx')
+
+    def test_capabilities(self):
+        self.assertEqual(GlossaryEngine().capabilities(), {
+            'engine': 'glossary', 'batch': True, 'detect': False,
+            'max_segment_length': None, 'max_segment_bytes': None
+        })
+        self.assertEqual(MyMemoryEngine().capabilities()['max_segment_length'], 500)
+        self.assertEqual(MyMemoryEngine().capabilities()['max_segment_bytes'], 500)
+        with override_settings(MYMEMORY_URL='http://example.invalid/get'):
+            self.assertEqual(MyMemoryEngine().url, 'http://example.invalid/get')
+
+    def test_engine_is_selected_from_settings(self):
+        self.assertIsInstance(get_engine(), GlossaryEngine)
+        reset_engine()
+        with override_settings(TRANSLATION_ENGINE={'BACKEND': 'translation.engines.MyMemoryEngine',
+                                                   'OPTIONS': {'url': 'http://example.invalid/get'}}):
+            self.assertEqual(get_engine().url, 'http://example.invalid/get')
+
+    def test_translate_view_offline(self):
+        with patch('translation.upstream.UpstreamClient.get') as upstream_get:
+            response = self.client.post(reverse('translate'), {
+                'text': 'Take with food', 'source_lang': 'auto', 'target_lang': 'es'
+            })
+        upstream_get.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['translated_text'], 'Tome con comida')
+        self.assertEqual(response.data['detected_language'], 'en')
+
+    def test_batch_uses_one_call_per_pair(self):
+        with patch.object(GlossaryEngine, 'translate_batch', autospec=True,
+                          side_effect=GlossaryEngine.translate_batch) as translate_batch:
+            response = self.client.post(reverse('translate-batch'), {
+                'segments': ['fever', 'cough', {'text': 'fever', 'target_lang': 'fr'}, 'fever'],
+                'source_lang': 'en', 'target_lang': 'es'
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['translated_text'] for r in response.data['results']],
+                         ['fiebre', 'tos', 'fièvre', 'fiebre'])
+        self.assertEqual(translate_batch.call_count, 2)
+
+class SegmentationTests(TestCase):
+    def test_keeps_abbreviations_intact(self):
+        text = "Dr. Smith saw the pt. today. Take 5 mg. daily b.i.d. with food! Any allergies?"
+        chunks, separators = split_text(text, 40)
+        self.assertEqual(chunks, [
+            'Dr. Smith saw the pt. today.',
+            'Take 5 mg. daily b.i.d. with food!',
+            'Any allergies?',
+        ])
+
+    def test_round_trip_preserves_whitespace(self):
+        text = "  First line. Second one!\n\n  Paragraph two: e.g. aspirin.\n- item one\n- item two   "
+        for max_chars in (5, 20, 1000):
+            chunks, separators = split_text(text, max_chars)
+            self.assertEqual(join_chunks(chunks, separators), text)
+            self.assertTrue(all(len(chunk) <= max_chars for chunk in chunks))
+            self.assertTrue(all(chunk == chunk.strip() for chunk in chunks))
+
+    def test_packs_short_sentences(self):
+        chunks, _ = split_text("Yes. No. Maybe.", 100)
+        self.assertEqual(chunks, ['Yes. No. Maybe.'])
+
+    def test_limits_encoded_bytes(self):
+        text = ' '.join(['ارتفاع ضغط الدم المزمن.'] * 40) + ' ' + 'دواء' * 200 + ' 血压。'
+        for max_bytes in (4, 37, 500):
+            chunks, separators = split_text(text, 450, max_bytes)
+            self.assertEqual(join_chunks(chunks, separators), text)
+            self.assertTrue(all(len(chunk.encode('utf-8')) <= max_bytes for chunk in chunks))
+        self.assertGreater(len(split_text(text, 450)[0][0].encode('utf-8')), 500)
+        self.assertEqual(split_text('Take with food.', 450, 500)[0], ['Take with food.'])
+        with self.assertRaises(ValueError):
+            split_text(text, 450, 3)
+
+class LongTextTranslationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.client.force_authenticate(user=self.user)
+        clear_caches()
+        self.server = FakeMyMemoryServer(latency=0.1).start()
+        self.addCleanup(self.server.stop)
+
+    def test_long_text_is_chunked_and_reassembled(self):
+        sentences = [f"Sentence number {i} of the discharge summary." for i in range(12)]
+        text = ' '.join(sentences[:6]) + '\n\n' + ' '.join(sentences[6:])
+        with override_settings(MYMEMORY_URL=self.server.url,
+                               TEXT_CHUNKING={'MAX_CHARS': 100, 'MAX_WORKERS': 8}):
+            start = time.monotonic()
+            response = self.client.post(reverse('translate'), {
+                'text': text, 'source_lang': 'en', 'target_lang': 'es'
+            })
+            elapsed = time.monotonic() - start
+
+        chunks, separators = split_text(text, 100)
+        expected = join_chunks([f"[es] {chunk}" for chunk in chunks], separators)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['translated_text'], expected)
+        self.assertEqual(response.data['chunks']['count'], len(chunks))
+        self.assertEqual(len(response.data['chunks']['chunk_ms']), len(chunks))
+        self.assertEqual(self.server.requests, len(chunks))
+        self.assertLess(elapsed, len(chunks) * 0.1)
+        self.assertEqual(Translation.objects.get(user=self.user).original_text, text)
+
+    def test_chunk_upstream_time_reaches_server_timing(self):
+        text = ' '.join(f"Sentence number {i} of the discharge summary." for i in range(6))
+        with override_settings(MYMEMORY_URL=self.server.url, METRICS={'ENABLED': True, 'SERVER_TIMING': True},
+                               TEXT_CHUNKING={'MAX_CHARS': 100, 'MAX_WORKERS': 4}):
+            response = self.client.post(reverse('translate'), {
+                'text': text, 'source_lang': 'auto', 'target_lang': 'es'
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(response.data['chunks']['count'], 1)
+        stages = dict(entry.split(';dur=') for entry in response['Server-Timing'].split(', '))
+        self.assertIn('detect', stages)
+        # Every chunk waits on the fake server's 0.1s latency
+        self.assertGreaterEqual(float(stages['upstream']), response.data['chunks']['count'] * 100)
+
+    def test_chunks_stay_within_the_engine_byte_limit(self):
+        # 450 Arabic characters are about 800 bytes of UTF-8
+        text = ' '.join(['ارتفاع ضغط الدم المزمن.'] * 20)
+        self.assertLessEqual(len(text), 500)
+        with override_settings(MYMEMORY_URL=self.server.url,
+                               TEXT_CHUNKING={'MAX_CHARS': 450, 'MAX_WORKERS': 8}):
+            response = self.client.post(reverse('translate'), {
+                'text': text, 'source_lang': 'ar', 'target_lang': 'en'
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(response.data['chunks']['count'], 1)
+        self.assertEqual(response.data['chunks']['max_bytes'], 500)
+        self.assertLessEqual(self.server.longest_query, 500)
+
+class StreamingTranslationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.stream_url = reverse('translate-stream')
+        clear_caches()
+        self.server = FakeMyMemoryServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(MYMEMORY_URL=self.server.url,
+                                              TEXT_CHUNKING={'MAX_CHARS': 40, 'MAX_WORKERS': 4})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.text = "Take one tablet daily. Avoid alcohol.\n\nCall us if the pain gets worse."
+
+    def read_ndjson(self, response):
+        body = b''.join(response.streaming_content).decode('utf-8')
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_ndjson_stream(self):
+        response = self.client.post(self.stream_url, {
+            'text': self.text, 'source_lang': 'en', 'target_lang': 'es'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        events = self.read_ndjson(response)
+
+        self.assertEqual(events[0]['event'], 'start')
+        self.assertEqual(events[0]['segments'], 2)
+        segments = sorted((e for e in events if e['event'] == 'segment'), key=lambda e: e['index'])
+        self.assertEqual([e['translated_text'] for e in segments],
+                         ['[es] Take one tablet daily. Avoid alcohol.', '[es] Call us if the pain gets worse.'])
+        self.assertEqual(segments[0]['trailing_whitespace'], '\n\n')
+        done = events[-1]
+        self.assertEqual(done['event'], 'done')
+        translation = Translation.objects.get(id=done['translation_id'])
+        self.assertEqual(translation.original_text, self.text)
+        self.assertEqual(translation.translated_text,
+                         '[es] Take one tablet daily. Avoid alcohol.\n\n[es] Call us if the pain gets worse.')
+
+    def test_sse_stream(self):
+        response = self.client.post(self.stream_url, {
+            'text': 'Hello', 'source_lang': 'en', 'target_lang': 'es'
+        }, HTTP_ACCEPT='text/event-stream')
+        self.assertTrue(response['Content-Type'].startswith('text/event-stream'))
+        body = b''.join(response.streaming_content).decode('utf-8')
+        events = [block.split('\n') for block in body.strip().split('\n\n')]
+        self.assertEqual([block[0] for block in events], ['event: start', 'event: segment', 'event: done'])
+        self.assertEqual(json.loads(events[1][1][len('data: '):])['translated_text'], '[es] Hello')
+
+    def test_segment_errors_are_streamed(self):
+        self.server.error_rate = 1.0
+        with patch('translation.upstream.time.sleep'):
+            response = self.client.post(self.stream_url, {
+                'text': 'Hello', 'source_lang': 'en', 'target_lang': 'es'
+            })
+            events = self.read_ndjson(response)
+        self.assertEqual([e['event'] for e in events], ['start', 'error', 'done'])
+        self.assertIsNone(events[-1]['translation_id'])
+        self.assertFalse(Translation.objects.exists())
+
+class AsyncTranslationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.headers = {'Authorization': f'Token {self.token.key}'}
+        clear_caches()
+        self.server = FakeMyMemoryServer(latency=0.2).start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(MYMEMORY_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    async def test_concurrent_translations(self):
+        client = AsyncClient()
+        # Warm up the lexicon, classifier and connection pool outside the timing
+        await client.post(reverse('translate-async'), {
+            'text': 'Warm up', 'source_lang': 'en', 'target_lang': 'es'
+        }, content_type='application/json', headers=self.headers)
+        start = time.monotonic()
+        responses = await asyncio.gather(*(
+            client.post(reverse('translate-async'), {
+                'text': f'Take {i} tablets daily', 'source_lang': 'en', 'target_lang': 'es'
+            }, content_type='application/json', headers=self.headers)
+            for i in range(10)
+        ))
+        elapsed = time.monotonic() - start
+
+        self.assertEqual([r.status_code for r in responses], [200] * 10)
+        self.assertEqual(responses[3].json()['translated_text'], '[es] Take 3 tablets daily')
+        # Ten upstream calls of 0.2s each overlap instead of queueing
+        self.assertLess(elapsed, 10 * 0.2 / 2)
+        self.assertEqual(await Translation.objects.filter(user=self.user).acount(), 11)
+
+    async def test_analysis_runs_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        threads = []
+
+        def analyze(validator, text):
+            threads.append(threading.get_ident())
+            return {'terms': [], 'suggestions': []}
+
+        with patch.object(MedicalTerminologyValidator, 'analyze', autospec=True, side_effect=analyze):
+            response = await AsyncClient().post(reverse('translate-async'), {
+                'text': 'Hello', 'source_lang': 'en', 'target_lang': 'es'
+            }, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
+    async def test_token_is_resolved_through_the_token_cache(self):
+        client = AsyncClient()
+        for _ in range(2):
+            response = await client.post(reverse('detect-async'), {
+                'text': 'Hello'
+            }, content_type='application/json', headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(token_cache.get(token_cache_key(self.token.key)))
+
+        with patch('rest_framework.authentication.TokenAuthentication.authenticate_credentials') as query:
+            response = await client.post(reverse('detect-async'), {
+                'text': 'Hello'
+            }, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        query.assert_not_called()
+
+        response = await client.post(reverse('detect-async'), {
+            'text': 'Hello'
+        }, content_type='application/json', headers={'Authorization': 'Token nope'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_requires_token(self):
+        response = await AsyncClient().post(reverse('translate-async'), {
+            'text': 'Hello', 'target_lang': 'es'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_detect(self):
+        response = await AsyncClient().post(reverse('detect-async'), {
+            'text': '¿Le duele el pecho cuando respira?'
+        }, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.json()['language'], 'es')
+
+    async def test_upstream_failure(self):
+        self.server.latency = 0
+        self.server.error_rate = 1.0
+        with patch('translation.upstream.asyncio.sleep'):
+            response = await AsyncClient().post(reverse('translate-async'), {
+                'text': 'Hello', 'source_lang': 'en', 'target_lang': 'es'
+            }, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, 503)
+
+
+class TranslationHistoryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('translation-list')
+        start = timezone.now() - timedelta(days=10)
+        self.translations = []
+        for i in range(7):
+            translation = Translation.objects.create(
+                user=self.user,
+                original_text=f'Text {i}',
+                translated_text=f'Texto {i}',
+                source_language='en' if i % 2 else 'fr',
+                target_language='es',
+                is_favorite=i in (1, 4)
+            )
+            # created_at is auto_now_add; spread the rows over a week
+            Translation.objects.filter(id=translation.id).update(created_at=start + timedelta(days=i))
+            self.translations.append(translation.id)
+        self.newest_first = self.translations[::-1]
+
+    def ids(self, response):
+        return [item['id'] for item in response.data['results']]
+
+    def test_pages_follow_next_and_previous(self):
+        response = self.client.get(self.url, {'page_size': 3})
+        self.assertEqual(self.ids(response), self.newest_first[:3])
+        self.assertIsNone(response.data['previous'])
+
+        second = self.client.get(response.data['next'])
+        self.assertEqual(self.ids(second), self.newest_first[3:6])
+        third = self.client.get(second.data['next'])
+        self.assertEqual(self.ids(third), self.newest_first[6:])
+        self.assertIsNone(third.data['next'])
+
+        back = self.client.get(third.data['previous'])
+        self.assertEqual(self.ids(back), self.newest_first[3:6])
+        first = self.client.get(back.data['previous'])
+        self.assertEqual(self.ids(first), self.newest_first[:3])
+        self.assertIsNone(first.data['previous'])
+
+    def test_compact_rows_with_user_in_envelope(self):
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.data['user']['username'], 'testuser')
+        row = response.data['results'][0]
+        self.assertEqual(sorted(row), sorted([
+            'id', 'original_text', 'translated_text', 'source_language',
+            'target_language', 'is_favorite', 'created_at'
+        ]))
+        self.assertEqual(row['translated_text'], 'Texto 6')
+        self.assertTrue(row['created_at'].endswith('Z'))
+
+    def test_rows_with_equal_timestamps(self):
+        Translation.objects.filter(user=self.user).update(created_at=timezone.now())
+        seen = []
+        response = self.client.get(self.url, {'page_size': 2})
+        while True:
+            seen.extend(self.ids(response))
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, sorted(self.translations, reverse=True))
+
+    def test_filters(self):
+        response = self.client.get(self.url, {'source_lang': 'en', 'target_lang': 'es'})
+        self.assertEqual(self.ids(response), [i for i in self.newest_first if (i - self.translations[0]) % 2])
+
+        response = self.client.get(self.url, {'favorites': 'true'})
+        self.assertEqual(self.ids(response), [self.translations[4], self.translations[1]])
+
+        day = timezone.localdate(Translation.objects.get(id=self.translations[2]).created_at).isoformat()
+        response = self.client.get(self.url, {'created_after': day, 'created_before': day})
+        self.assertEqual(self.ids(response), [self.translations[2]])
+
+    def test_invalid_parameters(self):
+        response = self.client.get(self.url, {'created_after': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(HISTORY_PAGINATION={'PAGE_SIZE': 2, 'MAX_PAGE_SIZE': 4})
+    def test_page_size_limits(self):
+        self.assertEqual(len(self.client.get(self.url).data['results']), 2)
+        self.assertEqual(len(self.client.get(self.url, {'page_size': 100}).data['results']), 4)
+
+    def test_deep_page_costs_one_query(self):
+        response = self.client.get(self.url, {'page_size': 1})
+        for _ in range(5):
+            response = self.client.get(response.data['next'])
+        with self.assertNumQueries(1):
+            self.client.get(response.data['next'])
+
+    def test_query_plan_uses_user_created_at_index(self):
+        from django.db import connection
+        from .pagination import KeysetPagination
+
+        if connection.vendor == 'postgresql':
+            # The fixture is tiny; make the planner show its index choice
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        paginator = KeysetPagination()
+        translations = Translation.objects.filter(user=self.user)
+        newest = Translation.objects.get(id=self.newest_first[0])
+        querysets = [
+            translations,
+            translations.filter(is_favorite=True),
+            translations.filter(source_language='en', target_language='es'),
+            translations.filter(created_at__gte=newest.created_at - timedelta(days=3)),
+        ]
+        for queryset in querysets:
+            for cursor in (None, (newest.created_at, newest.id, False), (newest.created_at, newest.id, True)):
+                plan = paginator.page_queryset(queryset, cursor, 10).explain()
+                self.assertIn('translation_user_id_9b32fe_idx', plan)
+                if connection.vendor == 'sqlite':
+                    # Only ties on id may be sorted, never the whole history
+                    self.assertNotIn('SCAN translation_translation', plan)
+                    self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+
+
+class TranslationBulkTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.mine = [
+            Translation.objects.create(
+                user=self.user, original_text=f'Text {i}', translated_text=f'Texto {i}',
+                source_language='en', target_language='es' if i < 3 else 'fr', is_favorite=i == 0
+            )
+            for i in range(5)
+        ]
+        self.theirs = Translation.objects.create(
+            user=self.other, original_text='Text', translated_text='Texto',
+            source_language='en', target_language='es'
+        )
+
+    def test_toggle_favorite_is_one_update(self):
+        url = reverse('translation-favorite', args=[self.mine[1].id])
+        with self.assertNumQueries(1):
+            response = self.client.post(url)
+        self.assertEqual(response.data, {'updated': 1})
+        self.assertTrue(Translation.objects.get(id=self.mine[1].id).is_favorite)
+        self.client.post(url)
+        self.assertFalse(Translation.objects.get(id=self.mine[1].id).is_favorite)
+
+        response = self.client.post(reverse('translation-favorite', args=[self.theirs.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_delete_single(self):
+        response = self.client.delete(reverse('translation-detail', args=[self.theirs.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.delete(reverse('translation-detail', args=[self.mine[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Translation.objects.filter(id=self.mine[0].id).exists())
+
+    def test_bulk_favorite_by_ids(self):
+        ids = [t.id for t in self.mine[:3]] + [self.theirs.id]
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('translation-bulk-favorite'), {'ids': ids}, format='json')
+        # mine[0] was already a favorite and the other user's row is out of scope
+        self.assertEqual(response.data, {'updated': 2})
+        self.assertEqual(Translation.objects.filter(user=self.user, is_favorite=True).count(), 3)
+        self.assertFalse(Translation.objects.get(id=self.theirs.id).is_favorite)
+
+        response = self.client.post(reverse('translation-bulk-unfavorite'), {'ids': ids}, format='json')
+        self.assertEqual(response.data, {'updated': 3})
+
+    def test_bulk_delete_by_filters(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('translation-bulk-delete'),
+                                        {'filters': {'target_lang': 'es'}}, format='json')
+        self.assertEqual(response.data, {'deleted': 3})
+        self.assertEqual(list(Translation.objects.filter(user=self.user).values_list('target_language', flat=True)),
+                         ['fr', 'fr'])
+        self.assertTrue(Translation.objects.filter(id=self.theirs.id).exists())
+
+        response = self.client.post(reverse('translation-bulk-delete'),
+                                    {'ids': [self.mine[3].id], 'filters': {'target_lang': 'es'}}, format='json')
+        self.assertEqual(response.data, {'deleted': 0})
+
+    def test_bulk_validation(self):
+        url = reverse('translation-bulk-delete')
+        for data in ({}, {'filters': {}}, {'ids': []}, {'ids': ['1']}, {'ids': [1], 'filters': []},
+                     {'filters': {'created_after': 'yesterday'}}, {'filters': {'source_lang': ''}},
+                     {'filters': {'favorites': False}}, {'filters': {'source_lang': None}}):
+            self.assertEqual(self.client.post(url, data, format='json').status_code,
+                             status.HTTP_400_BAD_REQUEST, data)
+        with override_settings(TRANSLATION_BULK={'MAX_IDS': 2}):
+            response = self.client.post(url, {'ids': [1, 2, 3]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Translation.objects.count(), 6)
+
+    def test_bulk_rejects_unknown_filter(self):
+        response = self.client.post(reverse('translation-bulk-delete'),
+                                    {'filters': {'favourites': True}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('favourites', response.data['error'])
+        self.assertEqual(Translation.objects.filter(user=self.user).count(), 5)
+
+
+class TranslationSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('translation-search')
+        texts = [
+            ('Take warfarin 5 mg daily', 'Tome warfarina 5 mg al día'),
+            ('Stop warfarin before surgery, take aspirin', 'Suspenda la warfarina antes de la cirugía'),
+            ('Take aspirin with food', 'Tome aspirina con comida'),
+        ]
+        self.ids = [
+            Translation.objects.create(
+                user=self.user, original_text=original, translated_text=translated,
+                source_language='en', target_language='es'
+            ).id
+            for original, translated in texts
+        ]
+        other = User.objects.create_user(username='other', password='testpass123')
+        Translation.objects.create(
+            user=other, original_text='Take warfarin daily', translated_text='Tome warfarina',
+            source_language='en', target_language='es'
+        )
+
+    def test_ranked_results_scoped_to_user(self):
+        response = self.client.get(self.url, {'q': 'warfarin'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual([row['id'] for row in response.data['results']], self.ids[:2])
+
+        # Trigram matching on PostgreSQL may add weaker hits; the row with
+        # both words ranks first everywhere
+        response = self.client.get(self.url, {'q': 'warfarin aspirin'})
+        self.assertEqual(response.data['results'][0]['id'], self.ids[1])
+
+    def test_matches_translated_text_and_filters(self):
+        response = self.client.get(self.url, {'q': 'aspirina'})
+        self.assertEqual(response.data['results'][0]['id'], self.ids[2])
+
+        response = self.client.get(self.url, {'q': 'warfarin', 'target_lang': 'fr'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_pagination(self):
+        response = self.client.get(self.url, {'q': 'take', 'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['previous'])
+        second = self.client.get(response.data['next'])
+        self.assertEqual(len(second.data['results']), 1)
+        self.assertIsNone(second.data['next'])
+        seen = [row['id'] for row in response.data['results'] + second.data['results']]
+        self.assertCountEqual(seen, self.ids)
+
+    def test_requires_query(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'q': 'warfarin', 'page': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TranslationExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123', organization='Clinic')
+        self.colleague = User.objects.create_user(username='colleague', password='testpass123', organization='Clinic')
+        outsider = User.objects.create_user(username='outsider', password='testpass123', organization='Other')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('translation-export')
+        rows = [
+            (self.user, 'Take, with "food"', 'es'),
+            (self.user, 'Fever\nand cough', 'fr'),
+            (self.colleague, 'Headache', 'es'),
+            (outsider, 'Chest pain', 'es'),
+        ]
+        for user, text, target in rows:
+            Translation.objects.create(user=user, original_text=text, translated_text=f'[{target}] {text}',
+                                       source_language='en', target_language=target,
+                                       medical_terms={'fever': 1} if 'Fever' in text else {})
+
+    @staticmethod
+    def content(response):
+        return b''.join(response.streaming_content)
+
+    def test_jsonl_streams_own_rows_oldest_first(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('application/jsonl'))
+        self.assertIn('translations-testuser-', response['Content-Disposition'])
+        rows = [json.loads(line) for line in self.content(response).decode().splitlines()]
+        self.assertEqual([row['original_text'] for row in rows], ['Take, with "food"', 'Fever\nand cough'])
+        self.assertEqual(rows[1]['medical_terms'], {'fever': 1})
+        self.assertEqual(rows[0]['username'], 'testuser')
+
+    def test_csv_gzip_and_filters(self):
+        response = self.client.get(self.url, {'format': 'csv', 'gzip': 'true', 'target_lang': 'fr'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        rows = list(csv.reader(io.StringIO(gzip.decompress(self.content(response)).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'username', 'original_text'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], 'Fever\nand cough')
+        self.assertEqual(json.loads(rows[1][6]), {'fever': 1})
+
+        response = self.client.get(self.url, {'created_after': 'not-a-date'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_organization_scope_needs_staff(self):
+        response = self.client.get(self.url, {'scope': 'organization'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(self.url, {'scope': 'organization'})
+        usernames = [json.loads(line)['username'] for line in self.content(response).decode().splitlines()]
+        self.assertEqual(usernames, ['testuser', 'testuser', 'colleague'])
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'export.jsonl')
+            call_command('export_translations', '--organization', 'Clinic', '--target-lang', 'es',
+                         '--output', path, '--chunk-size', '1', stdout=io.StringIO())
+            with open(path, encoding='utf-8') as f:
+                texts = [json.loads(line)['original_text'] for line in f]
+        self.assertEqual(texts, ['Take, with "food"', 'Headache'])
+
+class TermUsageTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.client.force_authenticate(user=self.user)
+        clear_caches()
+
+    def usage(self, term, source='en', target='es'):
+        row = MedicalTermUsage.objects.filter(term=term, source_language=source, target_language=target).first()
+        return row.count if row else 0
+
+    @patch('translation.upstream.UpstreamClient.get')
+    def test_translation_stores_terms_and_counts_usage(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            'responseStatus': 200,
+            'responseData': {'translatedText': 'Infarto de miocardio'}
+        }
+        data = {'text': 'Myocardial infarction and hypertenson', 'source_lang': 'en', 'target_lang': 'es'}
+        response = self.client.post(reverse('translate'), data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        translation = Translation.objects.get()
+        self.assertIn('myocardial infarction', translation.medical_terms['terms'])
+        self.assertIn('hypertension', translation.medical_terms['suggestions'])
+        self.assertEqual(response.data['medical_suggestions'], translation.medical_terms['suggestions'])
+        self.assertEqual(self.usage('myocardial infarction'), 1)
+
+        self.client.post(reverse('translate'), data)
+        self.assertEqual(self.usage('myocardial infarction'), 2)
+        self.assertEqual(MedicalTermUsage.objects.get(term='myocardial infarction').day, timezone.localdate())
+
+    def test_write_behind_flush_counts_usage(self):
+        with override_settings(WRITE_BEHIND={'ENABLED': True, 'MAX_RECORDS': 50, 'FLUSH_INTERVAL': 60}):
+            write_behind.reset_buffer()
+            self.addCleanup(write_behind.reset_buffer)
+            write_behind.record_translation(
+                user=self.user, original_text='Asthma', translated_text='Asma',
+                source_language='en', target_language='es', medical_terms={'terms': ['asthma'], 'suggestions': []}
+            )
+            self.assertEqual(self.usage('asthma'), 0)
+            write_behind.flush()
+            self.assertEqual(self.usage('asthma'), 1)
+
+    def test_rebuild_with_backfill(self):
+        old = Translation.objects.create(
+            user=self.user, original_text='Asthma and asthma', translated_text='Asma y asma',
+            source_language='en', target_language='es'
+        )
+        Translation.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=3))
+        Translation.objects.create(
+            user=self.user, original_text='Asthma', translated_text='Asthme',
+            source_language='en', target_language='fr', medical_terms={'terms': ['asthma'], 'suggestions': []}
+        )
+        MedicalTermUsage.objects.create(term='stale', source_language='en', target_language='es',
+                                        day=timezone.localdate(), count=5)
+
+        out = io.StringIO()
+        call_command('rebuild_term_usage', '--backfill', '--batch-size', '1', stdout=out)
+        self.assertIn('2 translations', out.getvalue())
+        self.assertEqual(Translation.objects.get(id=old.id).medical_terms['terms'], ['asthma'])
+        self.assertEqual(self.usage('asthma'), 1)
+        self.assertEqual(self.usage('asthma', target='fr'), 1)
+        self.assertFalse(MedicalTermUsage.objects.filter(term='stale').exists())
+
+        # A bounded rebuild leaves other days alone
+        call_command('rebuild_term_usage', '--since', timezone.localdate().isoformat(), stdout=io.StringIO())
+        self.assertEqual(MedicalTermUsage.objects.filter(target_language='es').count(), 1)
+
+    def test_failed_rebuild_keeps_the_old_rollup(self):
+        term_usage.save_translations([Translation(
+            user=self.user, original_text='Asthma', translated_text='Asma',
+            source_language='en', target_language='es', medical_terms={'terms': ['asthma'], 'suggestions': []}
+        )])
+        self.assertEqual(self.usage('asthma'), 1)
+        with patch('translation.term_usage.add_counts', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                term_usage.rebuild()
+        self.assertEqual(self.usage('asthma'), 1)
+
+    def test_failed_usage_update_keeps_the_translations(self):
+        record = Translation(
+            user=self.user, original_text='Asthma', translated_text='Asma',
+            source_language='en', target_language='es', medical_terms={'terms': ['asthma'], 'suggestions': []}
+        )
+        errors = metrics.TERM_USAGE_ERRORS.value()
+        with patch('translation.term_usage.add_counts', side_effect=RuntimeError('db down')), \
+                override_settings(METRICS={'ENABLED': True, 'SERVER_TIMING': False}):
+            term_usage.save_translations([record])
+        self.assertEqual(Translation.objects.count(), 1)
+        self.assertEqual(self.usage('asthma'), 0)
+        self.assertEqual(metrics.TERM_USAGE_ERRORS.value() - errors, 1)
+
+    def test_top_terms(self):
+        today = timezone.localdate()
+        term_usage.add_counts({
+            ('asthma', 'en', 'es', today): 2,
+            ('diabetes', 'en', 'es', today): 3,
+            ('diabetes', 'en', 'es', today - timedelta(days=1)): 1,
+            ('asthma', 'en', 'es', today - timedelta(days=10)): 9,
+            ('hypertension', 'en', 'fr', today): 7,
+        })
+        self.assertEqual(term_usage.top_terms('en', 'es', today - timedelta(days=6), today), [
+            {'term': 'diabetes', 'total': 4}, {'term': 'asthma', 'total': 2}
+        ])
+
+        self.assertEqual(self.client.get(reverse('term-usage'), {'source_lang': 'en', 'target_lang': 'es'})
+                         .status_code, status.HTTP_403_FORBIDDEN)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('term-usage'), {'source_lang': 'en', 'target_lang': 'es', 'days': 1})
+        self.assertEqual(response.data['terms'], [{'term': 'diabetes', 'total': 3}, {'term': 'asthma', 'total': 2}])
+
+
+class WriteBehindTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.client.force_authenticate(user=self.user)
+        clear_caches()
+
+    def record(self, i=0):
+        return Translation(
+            user=self.user, original_text=f'Text {i}', translated_text=f'Texto {i}',
+            source_language='en', target_language='es'
+        )
+
+    def test_flushes_on_size_and_close(self):
+        buffer = WriteBehindBuffer(Translation, max_records=3, flush_interval=60)
+        buffer.add(self.record(0))
+        buffer.add(self.record(1))
+        self.assertEqual(Translation.objects.count(), 0)
+        buffer.add(self.record(2))
+        self.assertEqual(Translation.objects.count(), 3)
+        self.assertEqual(len(buffer), 0)
+
+        buffer.add(self.record(3))
+        buffer.close()
+        self.assertEqual(Translation.objects.count(), 4)
+        self.assertEqual(buffer.stats()['flushes'], 2)
+
+    def test_failed_flush_is_counted(self):
+        buffer = WriteBehindBuffer(Translation, max_records=10, flush_interval=60)
+        buffer.add(self.record())
+        with patch.object(Translation.objects, 'bulk_create', side_effect=Exception('db down')):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.stats()['dropped'], 1)
+        self.assertEqual(len(buffer), 0)
+
+    @patch('translation.upstream.UpstreamClient.get')
+    def test_translate_view_buffers_until_read(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            'responseStatus': 200,
+            'responseData': {'translatedText': 'Hola'}
+        }
+        with override_settings(WRITE_BEHIND={'ENABLED': True, 'MAX_RECORDS': 50, 'FLUSH_INTERVAL': 60}):
+            write_behind.reset_buffer()
+            self.addCleanup(write_behind.reset_buffer)
+            response = self.client.post(reverse('translate'), {
+                'text': 'Hello', 'source_lang': 'en', 'target_lang': 'es'
+            })
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(Translation.objects.count(), 0)
+            self.assertEqual(len(write_behind.get_buffer()), 1)
+
+            # Reading the history writes the user's pending rows first
+            response = self.client.get(reverse('translation-list'))
+            self.assertEqual(len(response.data['results']), 1)
+
+    def test_sync_fallback_returns_saved_row(self):
+        with override_settings(WRITE_BEHIND={'ENABLED': True, 'MAX_RECORDS': 50, 'FLUSH_INTERVAL': 60}):
+            write_behind.reset_buffer()
+            self.addCleanup(write_behind.reset_buffer)
+            translation = write_behind.record_translation(
+                sync=True, user=self.user, original_text='Hello', translated_text='Hola',
+                source_language='en', target_language='es'
+            )
+            self.assertIsNotNone(translation.id)
+            self.assertIsNone(write_behind.record_translation(
+                user=self.user, original_text='Bye', translated_text='Adiós',
+                source_language='en', target_language='es'
+            ))
+            self.assertEqual(Translation.objects.count(), 1)
+
+
+class WriteBehindTimerTests(TransactionTestCase):
+    def test_flushes_on_interval(self):
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        buffer = WriteBehindBuffer(Translation, max_records=100, flush_interval=0.05).start()
+        self.addCleanup(buffer.close)
+        buffer.add(Translation(
+            user=user, original_text='Hello', translated_text='Hola',
+            source_language='en', target_language='es'
+        ))
+        deadline = time.monotonic() + 2
+        while not Translation.objects.exists() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(Translation.objects.count(), 1)
+
+
 class MedicalUtilsTests(TestCase):
     def setUp(self):
         self.validator = MedicalTerminologyValidator()
@@ -105,3 +1746,218 @@ class MedicalUtilsTests(TestCase):
         text = "Hello world"
         suggestions = validator.validate_and_suggest(text)
         self.assertEqual(len(suggestions), 0)  # No suggestions for non-medical terms
+
+    def test_bundled_terms_are_loaded(self):
+        self.assertIn('hypertension', self.validator.medical_terms)
+        self.assertIn('hypertension', self.validator.validate_and_suggest('hypertenson'))
+
+class PhraseRecognizerTests(TestCase):
+    def setUp(self):
+        self.recognizer = PhraseRecognizer([
+            'myocardial infarction', 'infarction', 'hypertension', 'beta-blocker', "crohn's disease",
+            'chronic obstructive pulmonary disease', 'pulmonary disease', 'pulmonary embolism',
+        ])
+
+    def test_spans_and_canonical_terms(self):
+        text = "Hx of Myocardial  Infarction, HYPERTENSION; on beta blocker (Crohn’s disease)."
+        matches = self.recognizer.find(text)
+        self.assertEqual([match.term for match in matches],
+                         ['myocardial infarction', 'infarction', 'hypertension', 'beta-blocker', "crohn's disease"])
+        self.assertEqual(text[matches[0].start:matches[0].end], 'Myocardial  Infarction')
+        self.assertEqual(matches[2], TermMatch(30, 42, 'hypertension'))
+
+    def test_overlaps_and_failure_links(self):
+        matches, leftovers = self.recognizer.scan('chronic obstructive pulmonary embolism and pulmonary disease')
+        self.assertEqual([match.term for match in matches], ['pulmonary embolism', 'pulmonary disease'])
+        self.assertEqual(leftovers, ['chronic', 'obstructive', 'and'])
+
+        matches, leftovers = self.recognizer.scan('Chronic obstructive pulmonary disease')
+        self.assertEqual([match.term for match in matches],
+                         ['chronic obstructive pulmonary disease', 'pulmonary disease'])
+        self.assertEqual(leftovers, [])
+
+    def test_validator_fuzzy_matches_leftovers_only(self):
+        validator = MedicalTerminologyValidator()
+        with patch.object(type(validator.matcher), 'get_close_matches', autospec=True,
+                          return_value=[]) as close_matches:
+            validator.validate_and_suggest('Myocardial infarction, hypertension and 20 hypertenson')
+        self.assertEqual([call.args[1] for call in close_matches.call_args_list], ['and', 'hypertenson'])
+        self.assertEqual([match.term for match in validator.recognize('History of myocardial infarction.')],
+                         ['myocardial infarction'])
+
+class FuzzyTermMatcherTests(TestCase):
+    def setUp(self):
+        self.terms = ['hypertension', 'hypotension', 'hyperthyroidism', 'hypothyroidism',
+                      'tachycardia', 'bradycardia', 'arrhythmia', 'anemia', 'asthma',
+                      'bronchitis', 'gastritis', 'dermatitis', 'nephritis', 'hepatitis']
+        self.matcher = FuzzyTermMatcher(self.terms)
+
+    def test_exact_lookup(self):
+        self.assertIn('asthma', self.matcher)
+        self.assertNotIn('asthm', self.matcher)
+
+    def test_matches_difflib(self):
+        words = ['hypertenshun', 'hypotensoin', 'tachicardia', 'bradykardia', 'anemea',
+                 'astma', 'itis', 'hepatits', 'patient', 'hyper', '', 'x']
+        for word in words:
+            for cutoff in (0.0, 0.6, 0.8):
+                self.assertEqual(
+                    self.matcher.get_close_matches(word, n=3, cutoff=cutoff),
+                    get_close_matches(word, self.terms, n=3, cutoff=cutoff),
+                    msg=f"{word!r} cutoff={cutoff}"
+                )
+
+    def test_matches_difflib_on_random_words(self):
+        # Short words over a small alphabet land on the cutoff and tie often,
+        # and typos of the bundled terms can match without sharing a
+        # trigram ('anemna' and 'pneumonia')
+        rng = random.Random(7)
+        short = FuzzyTermMatcher(''.join(rng.choice('abcxyz') for _ in range(rng.randint(1, 5)))
+                                 for _ in range(300))
+        bundled = MedicalTerminologyValidator().matcher
+        words = [''.join(rng.choice('abcxyz') for _ in range(rng.randint(1, 7))) for _ in range(500)]
+        for term in rng.choices(list(bundled), k=200):
+            chars = list(term)
+            for _ in range(rng.randint(1, 3)):
+                chars[rng.randrange(len(chars))] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+            words.append(''.join(chars))
+        words.append('anemna')
+
+        for matcher in (short, bundled):
+            terms = list(matcher)
+            for word in words:
+                for cutoff in (0.4, 0.6, 0.75):
+                    self.assertEqual(
+                        matcher.get_close_matches(word, n=3, cutoff=cutoff),
+                        get_close_matches(word, terms, n=3, cutoff=cutoff),
+                        msg=f"{word!r} cutoff={cutoff}"
+                    )
+
+class LanguageLexiconTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.source = os.path.join(self.tmpdir.name, 'terms.json')
+        with open(self.source, 'w') as f:
+            json.dump({
+                'en': {'terms': {'Hypertension': '', 'asthma': '', 'myocardial infarction': ''}},
+                'es': {'terms': {'hipertensión': '', 'asma': ''}},
+                'fr': {'terms': {'asthme': ''}},
+                'it': {'terms': {}},
+            }, f)
+        self.lexicons = LanguageLexicons(self.source, self.tmpdir.name, max_languages=2)
+
+    def test_loads_lazily_per_language(self):
+        self.assertEqual(len(self.lexicons), 0)
+        spanish = self.lexicons.get('es-ES')
+        self.assertEqual(sorted(spanish), ['asma', 'hipertensión'])
+        self.assertIsInstance(spanish, CompiledLexicon)
+        self.assertTrue(os.path.exists(compiled_path('es', self.tmpdir.name)))
+        self.assertFalse(os.path.exists(compiled_path('en', self.tmpdir.name)))
+        self.assertIs(self.lexicons.get('ES'), spanish)
+        self.assertEqual(len(self.lexicons.get('de')), 0)
+
+    def test_compiled_lexicons_load_without_parsing_the_source(self):
+        with patch('translation.lexicon.json.load', wraps=json.load) as parse:
+            self.lexicons.get('en')
+            self.assertEqual(parse.call_count, 1)
+            # Codes the source does not list are remembered, not compiled
+            self.assertEqual(len(self.lexicons.get('de')), 0)
+            self.assertEqual(len(self.lexicons.get('xx')), 0)
+            self.assertEqual(parse.call_count, 1)
+            self.assertFalse(os.path.exists(compiled_path('de', self.tmpdir.name)))
+            # A listed language without terms is compiled to an empty file
+            self.assertEqual(len(self.lexicons.get('it')), 0)
+            self.assertEqual(parse.call_count, 2)
+            self.assertTrue(os.path.exists(compiled_path('it', self.tmpdir.name)))
+
+            lexicons = LanguageLexicons(self.source, self.tmpdir.name, max_languages=1)
+            for language in ('en', 'it', 'en'):
+                self.assertIsInstance(lexicons.get(language), CompiledLexicon)
+            self.assertEqual(lexicons.stats()['evictions'], 2)
+            self.assertEqual(parse.call_count, 2)
+
+    def test_least_recently_used_language_is_evicted(self):
+        english = self.lexicons.get('en')
+        self.lexicons.get('es')
+        self.lexicons.get('en')
+        self.lexicons.get('fr')
+        stats = self.lexicons.stats()
+        self.assertEqual(sorted(stats['loaded']), ['en', 'fr'])
+        self.assertEqual(stats['evictions'], 1)
+        self.assertIs(self.lexicons.get('en'), english)
+        self.assertEqual(self.lexicons.stats()['loads'], 3)
+
+    def test_reports_memory_per_language(self):
+        get_recognizer(self.lexicons.get('en'))
+        stats = self.lexicons.stats()['loaded']['en']
+        self.assertEqual(stats['terms'], 3)
+        self.assertEqual(stats['storage'], 'mapped')
+        self.assertEqual(stats['lexicon_bytes'], os.path.getsize(compiled_path('en', self.tmpdir.name)))
+        self.assertGreater(stats['recognizer_bytes'], 0)
+        self.assertGreater(FuzzyTermMatcher(['asthma', 'asma']).memory_bytes(), 0)
+
+    def test_validator_uses_source_language_lexicon(self):
+        english = MedicalTerminologyValidator()
+        self.assertIn('hypertension', english.validate_and_suggest('hypertenson'))
+        spanish = MedicalTerminologyValidator('es')
+        self.assertEqual(spanish.validate_and_suggest('hypertenson'), [])
+        self.assertEqual(spanish.analyze('Myocardial infarction')['terms'], [])
+
+    def test_status_endpoint_and_command(self):
+        MedicalTerminologyValidator('en')
+        response = self.client.get(reverse('lexicon-status'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_login(User.objects.create_user(username='admin', password='adminpass123', is_staff=True))
+        response = self.client.get(reverse('lexicon-status'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('en', response.json()['loaded'])
+
+        output_dir = os.path.join(self.tmpdir.name, 'compiled')
+        os.mkdir(output_dir)
+        call_command('compile_medical_lexicon', source=self.source, output_dir=output_dir,
+                     languages=['fr'], stdout=io.StringIO())
+        self.assertEqual(os.listdir(output_dir), ['medical_terms.fr.lex'])
+        self.assertEqual(list(CompiledLexicon(compiled_path('fr', output_dir))), ['asthme'])
+
+        call_command('compile_medical_lexicon', source=self.source, output_dir=output_dir, stdout=io.StringIO())
+        self.assertEqual(len(os.listdir(output_dir)), 4)
+        self.assertEqual(len(CompiledLexicon(compiled_path('it', output_dir))), 0)
+
+
+class CompiledLexiconTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.terms = ['hypertension', 'hypotension', 'tachycardia', 'bradycardia',
+                      'anemia', 'asthma', 'ménière disease', 'hepatitis']
+        self.path = os.path.join(self.tmpdir.name, 'terms.lex')
+        compile_lexicon(self.terms + ['asthma'], self.path)
+        self.lexicon = CompiledLexicon(self.path)
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.lexicon), len(self.terms))
+        self.assertEqual(sorted(self.lexicon), sorted(self.terms))
+        self.assertIn('ménière disease', self.lexicon)
+        self.assertNotIn('asthm', self.lexicon)
+
+    def test_matches_in_memory_index(self):
+        in_memory = FuzzyTermMatcher(self.terms)
+        for word in ['hypertenshun', 'tachicardia', 'anemea', 'meniere disease', 'hello']:
+            self.assertEqual(self.lexicon.get_close_matches(word),
+                             in_memory.get_close_matches(word))
+
+    def test_rejects_unknown_file(self):
+        bogus = os.path.join(self.tmpdir.name, 'bogus.lex')
+        with open(bogus, 'wb') as f:
+            f.write(b'not a lexicon')
+        with self.assertRaises(ValueError):
+            CompiledLexicon(bogus)
+
+    def test_management_command(self):
+        source = os.path.join(self.tmpdir.name, 'terms.json')
+        output = os.path.join(self.tmpdir.name, 'out.lex')
+        with open(source, 'w') as f:
+            json.dump({'en': {'terms': {'Asthma': '', 'anemia': ''}}}, f)
+        call_command('compile_medical_lexicon', source=source, output=output, stdout=io.StringIO())
+        self.assertEqual(list(CompiledLexicon(output)), ['anemia', 'asthma'])
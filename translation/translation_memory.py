@@ -0,0 +1,110 @@
+import hashlib
+import re
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TranslationMemory
+
+# Whitespace other than line breaks, and the spaces around line breaks
+_SPACES = re.compile(r'[^\S\r\n]+')
+_LINE_BREAK = re.compile(r' ?([\r\n]+) ?')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a segment so trivially different spellings share one entry:
+    NFC, runs of spaces collapsed, ends trimmed. Line breaks are kept, since
+    a stored translation carries the line layout of its text.
+    """
+    text = _SPACES.sub(' ', unicodedata.normalize('NFC', text).strip())
+    return _LINE_BREAK.sub(r'\1', text)
+
+
+def text_hash(text: str) -> str:
+    """Return the hex SHA-256 of the normalized text"""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def language_pair(source_lang: str, target_lang: str) -> str:
+    return f"{source_lang}|{target_lang}"
+
+
+def lookup(text: str, source_lang, target_lang: str):
+    """
+    Return the stored TranslationMemory entry for text, or None.
+    With no source language (auto-detect) any source into target_lang matches.
+    A hit bumps the entry's hit count and last-used time.
+    """
+    if not settings.TRANSLATION_MEMORY_ENABLED:
+        return None
+
+    entries = TranslationMemory.objects.filter(key_hash=text_hash(text))
+    if source_lang:
+        entries = entries.filter(language_pair=language_pair(source_lang, target_lang))
+    else:
+        entries = entries.filter(language_pair__endswith=f"|{target_lang}").order_by('-hit_count')
+    entry = entries.first()
+    if entry is None:
+        return None
+
+    now = timezone.now()
+    TranslationMemory.objects.filter(pk=entry.pk).update(
+        hit_count=F('hit_count') + 1,
+        last_used_at=now
+    )
+    entry.hit_count += 1
+    entry.last_used_at = now
+    return entry
+
+
+def store(text: str, source_lang: str, target_lang: str, translated_text: str):
+    """Record a successful upstream translation, replacing any older entry"""
+    if not settings.TRANSLATION_MEMORY_ENABLED:
+        return None
+
+    try:
+        entry, _ = TranslationMemory.objects.update_or_create(
+            key_hash=text_hash(text),
+            language_pair=language_pair(source_lang, target_lang),
+            defaults={
+                'source_text': text,
+                'translated_text': translated_text,
+                'last_used_at': timezone.now(),
+            }
+        )
+        return entry
+    except IntegrityError:
+        # Another worker stored the same segment first
+        return None
+
+
+def prune(max_age_days=None, max_entries=None) -> int:
+    """
+    Apply the retention policy and return the number of entries evicted.
+    Entries unused for max_age_days are dropped, then the least recently
+    used ones beyond max_entries.
+    """
+    if max_age_days is None:
+        max_age_days = settings.TRANSLATION_MEMORY_MAX_AGE_DAYS
+    if max_entries is None:
+        max_entries = settings.TRANSLATION_MEMORY_MAX_ENTRIES
+
+    evicted = 0
+    if max_age_days:
+        cutoff = timezone.now() - timedelta(days=max_age_days)
+        evicted += TranslationMemory.objects.filter(last_used_at__lt=cutoff).delete()[0]
+
+    if max_entries:
+        # Everything at or below the first entry past the cap goes
+        boundary = list(
+            TranslationMemory.objects.order_by('-last_used_at')
+            .values_list('last_used_at', flat=True)[max_entries:max_entries + 1]
+        )
+        if boundary:
+            evicted += TranslationMemory.objects.filter(last_used_at__lte=boundary[0]).delete()[0]
+    return evicted
@@ -0,0 +1,280 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from . import metrics
+from .resilience import AdaptiveConcurrencyLimit, CircuitBreaker
+
+
+class UpstreamError(Exception):
+    """The upstream service could not be reached or kept failing"""
+
+
+class CircuitOpenError(UpstreamError):
+    """The circuit breaker is open, so the upstream was not called"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream circuit open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimitError(UpstreamError):
+    """Too many upstream calls are already in flight"""
+
+
+class _GuardedClient:
+    """
+    Optional circuit breaker and adaptive concurrency limit around calls.
+    HTTP 429 and calls that end in UpstreamError count as failures.
+    """
+    breaker = None
+    limiter = None
+
+    def _admit(self):
+        if self.limiter is not None and not self.limiter.acquire():
+            raise ConcurrencyLimitError("Too many upstream calls in flight")
+        self._check_breaker()
+
+    async def _aadmit(self):
+        if self.limiter is not None and not await self.limiter.acquire_async():
+            raise ConcurrencyLimitError("Too many upstream calls in flight")
+        self._check_breaker()
+
+    def _check_breaker(self):
+        if self.breaker is not None and not self.breaker.allow():
+            if self.limiter is not None:
+                self.limiter.cancel()
+            raise CircuitOpenError(self.breaker.retry_after())
+
+    def _settle(self, ok: bool, elapsed: float):
+        if metrics.enabled():
+            metrics.record('upstream', elapsed)
+            metrics.UPSTREAM_CALLS.inc(outcome='ok' if ok else 'error')
+        if self.limiter is not None:
+            self.limiter.release(ok, elapsed)
+        if self.breaker is not None:
+            self.breaker.record(ok, elapsed)
+
+
+class UpstreamClient(_GuardedClient):
+    """
+    Keep-alive HTTP client for upstream APIs.
+
+    Connections are pooled per worker process. Every call has connect and
+    read timeouts, and connection errors, timeouts and 5xx responses are
+    retried a bounded number of times with full-jitter exponential backoff.
+    A CircuitBreaker and AdaptiveConcurrencyLimit, when given, make calls
+    fail fast instead of piling up on a struggling upstream.
+    """
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 3.05,
+                 read_timeout: float = 10.0, max_retries: int = 2,
+                 backoff: float = 0.2, backoff_max: float = 2.0,
+                 breaker=None, limiter=None):
+        self.breaker = breaker
+        self.limiter = limiter
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url: str, params=None) -> requests.Response:
+        """GET url, retrying transient failures. Raises UpstreamError when they persist"""
+        self._admit()
+        start = time.monotonic()
+        ok = False
+        try:
+            response = self._get(url, params)
+            ok = response.status_code != 429
+            return response
+        finally:
+            self._settle(ok, time.monotonic() - start)
+
+    def _get(self, url: str, params=None) -> requests.Response:
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code < 500:
+                    return response
+                error = UpstreamError(f"Upstream returned HTTP {response.status_code}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = UpstreamError(f"Upstream request failed: {str(e)}")
+
+            if attempt >= self.max_retries:
+                raise error
+            time.sleep(random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt)))
+            attempt += 1
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncUpstreamClient(_GuardedClient):
+    """
+    asyncio counterpart of UpstreamClient, built on httpx.
+
+    Same pooling, timeouts, retry policy and guards; waiting on the upstream
+    does not hold a worker thread, so one process can have many calls in
+    flight. A full concurrency limit is waited on (up to its queue timeout)
+    by suspending the coroutine.
+    """
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 3.05,
+                 read_timeout: float = 10.0, max_retries: int = 2,
+                 backoff: float = 0.2, backoff_max: float = 2.0,
+                 breaker=None, limiter=None):
+        self.breaker = breaker
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.session = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def get(self, url: str, params=None) -> httpx.Response:
+        """GET url, retrying transient failures. Raises UpstreamError when they persist"""
+        await self._aadmit()
+        start = time.monotonic()
+        ok = False
+        try:
+            response = await self._get(url, params)
+            ok = response.status_code != 429
+            return response
+        finally:
+            self._settle(ok, time.monotonic() - start)
+
+    async def _get(self, url: str, params=None) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self.session.get(url, params=params)
+                if response.status_code < 500:
+                    return response
+                error = UpstreamError(f"Upstream returned HTTP {response.status_code}")
+            except httpx.TransportError as e:
+                error = UpstreamError(f"Upstream request failed: {str(e)}")
+
+            if attempt >= self.max_retries:
+                raise error
+            await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt)))
+            attempt += 1
+
+    async def close(self):
+        await self.session.aclose()
+
+
+def _client_options() -> dict:
+    options = settings.UPSTREAM_HTTP
+    return {
+        'pool_size': options['POOL_SIZE'],
+        'connect_timeout': options['CONNECT_TIMEOUT'],
+        'read_timeout': options['READ_TIMEOUT'],
+        'max_retries': options['MAX_RETRIES'],
+        'backoff': options['BACKOFF'],
+        'backoff_max': options['BACKOFF_MAX'],
+    }
+
+
+def _build_guards() -> tuple:
+    breaker = settings.CIRCUIT_BREAKER
+    limit = settings.CONCURRENCY_LIMIT
+    return (
+        CircuitBreaker(
+            failure_threshold=breaker['FAILURE_THRESHOLD'],
+            reset_timeout=breaker['RESET_TIMEOUT'],
+            half_open_calls=breaker['HALF_OPEN_CALLS'],
+            slow_call_threshold=breaker['SLOW_CALL_THRESHOLD']
+        ) if breaker['ENABLED'] else None,
+        AdaptiveConcurrencyLimit(
+            initial=limit['INITIAL'],
+            min_limit=limit['MIN'],
+            max_limit=limit['MAX'],
+            latency_target=limit['LATENCY_TARGET'],
+            decrease=limit['DECREASE'],
+            queue_timeout=limit['QUEUE_TIMEOUT']
+        ) if limit['ENABLED'] else None,
+    )
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+# One breaker and limit per worker, shared by its sync and async clients
+_guards = None
+_guards_pid = None
+
+
+def _get_guards() -> tuple:
+    global _guards, _guards_pid
+    pid = os.getpid()
+    if _guards is None or _guards_pid != pid:
+        with _client_lock:
+            if _guards is None or _guards_pid != pid:
+                _guards = _build_guards()
+                _guards_pid = pid
+    return _guards
+
+
+def get_client() -> UpstreamClient:
+    """Return this worker's shared client, creating it on first use (and after fork)"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        breaker, limiter = _get_guards()
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = UpstreamClient(**_client_options(), breaker=breaker, limiter=limiter)
+                _client_pid = pid
+    return _client
+
+
+def reset_client():
+    """Drop the shared client and guards so the next call picks up new settings"""
+    global _client, _client_pid, _guards, _guards_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+        _guards = None
+        _guards_pid = None
+        _async_clients.clear()
+
+
+def stats() -> dict:
+    """State of this worker's circuit breaker and concurrency limit"""
+    breaker, limiter = _get_guards()
+    return {
+        'circuit_breaker': breaker.stats() if breaker else None,
+        'concurrency_limit': limiter.stats() if limiter else None,
+    }
+
+
+# httpx clients are bound to the event loop they were first used on
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncUpstreamClient:
+    """Return the shared async client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        breaker, limiter = _get_guards()
+        client = AsyncUpstreamClient(**_client_options(), breaker=breaker, limiter=limiter)
+        _async_clients[loop] = client
+    return client
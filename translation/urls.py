@@ -1,12 +1,22 @@
 from django.urls import path
 from .views import (
     TranslateView,
+    BatchTranslateView,
+    TranslateStreamView,
     TranslationFavoriteView,
+    TranslationBulkView,
+    TranslationSearchView,
+    TranslationExportView,
+    TermUsageView,
+    UpstreamStatusView,
+    LexiconStatusView,
+    MetricsView,
     RegisterView,
     LoginView,
     LogoutView,
     UserProfileView
 )
+from .async_views import AsyncTranslateView, AsyncDetectLanguageView
 
 urlpatterns = [
     # Auth endpoints
@@ -17,7 +27,25 @@ urlpatterns = [
 
     # Translation endpoints
     path('translate/', TranslateView.as_view(), name='translate'),
+    path('translate/stream/', TranslateStreamView.as_view(), name='translate-stream'),
+    path('translate/async/', AsyncTranslateView.as_view(), name='translate-async'),
+    path('detect/async/', AsyncDetectLanguageView.as_view(), name='detect-async'),
+    path('translate/batch/', BatchTranslateView.as_view(), name='translate-batch'),
     path('translations/', TranslateView.as_view(), name='translation-list'),
+    path('translations/search/', TranslationSearchView.as_view(), name='translation-search'),
+    path('translations/export/', TranslationExportView.as_view(), name='translation-export'),
+    path('translations/bulk/favorite/', TranslationBulkView.as_view(bulk_action='favorite'),
+         name='translation-bulk-favorite'),
+    path('translations/bulk/unfavorite/', TranslationBulkView.as_view(bulk_action='unfavorite'),
+         name='translation-bulk-unfavorite'),
+    path('translations/bulk/delete/', TranslationBulkView.as_view(bulk_action='delete'),
+         name='translation-bulk-delete'),
     path('translations/<int:translation_id>/', TranslateView.as_view(), name='translation-detail'),
     path('translations/<int:translation_id>/toggle_favorite/', TranslationFavoriteView.as_view(), name='translation-favorite'),
+    path('terms/usage/', TermUsageView.as_view(), name='term-usage'),
+
+    # Monitoring
+    path('status/upstream/', UpstreamStatusView.as_view(), name='upstream-status'),
+    path('status/lexicons/', LexiconStatusView.as_view(), name='lexicon-status'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
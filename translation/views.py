@@ -1,18 +1,31 @@
+from datetime import timedelta
+
 from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
 from django.core.exceptions import ObjectDoesNotExist
-from django.utils import timezone
-from .serializers import UserSerializer, UserLoginSerializer, TranslationSerializer
+from .serializers import UserSerializer, UserLoginSerializer, TranslationListSerializer
+from .filters import HistoryFilterMixin, check_filters, filter_history
+from .pagination import KeysetPagination, SearchPagination
+from .search import search_translations
 from .models import Translation
 from .medical_utils import MedicalTerminologyValidator
+from .lexicon import get_language_lexicons
+from . import export, metrics, services, singleflight, term_usage, upstream, write_behind
+from .services import TranslationServiceError
+from .upstream import CircuitOpenError, UpstreamError
+from .renderers import CSVRenderer, EventStreamRenderer, JSONLinesRenderer, NDJSONRenderer
+from .segmentation import join_chunks
 from .language_detection import detect_language
-import requests
+from django.conf import settings
+from django.db.models import F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework.renderers import JSONRenderer
 
-# MyMemory Translation API endpoint
-MYMEMORY_URL = "https://api.mymemory.translated.net/get"
 
 class RegisterView(APIView):
     """
@@ -109,21 +122,38 @@ class UserProfileView(APIView):
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class TranslateView(APIView):
+class TranslateView(HistoryFilterMixin, APIView):
     """
     API endpoint for translation operations
     """
     permission_classes = [permissions.IsAuthenticated]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.medical_validator = MedicalTerminologyValidator()
-
     def get(self, request):
-        """Get all translations for the current user"""
-        translations = Translation.objects.filter(user=request.user).order_by('-created_at')
-        serializer = TranslationSerializer(translations, many=True)
-        return Response(serializer.data)
+        """
+        Get the current user's translations, newest first, one page at a time.
+        Optional filters: source_lang, target_lang, favorites=true,
+        created_after and created_before (ISO date or datetime).
+        """
+        # Let users see their own buffered translations
+        write_behind.flush()
+        try:
+            translations = self.filter_history(
+                Translation.objects.filter(user=request.user),
+                request.query_params
+            ).values(*TranslationListSerializer.Meta.fields)
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = KeysetPagination()
+        with metrics.timed('db'):
+            page = paginator.paginate_queryset(translations, request, view=self)
+        with metrics.timed('serialize'):
+            response = paginator.get_paginated_response(TranslationListSerializer(page, many=True).data)
+            # The rows all belong to the current user; send it once
+            response.data['user'] = UserSerializer(request.user).data
+        return response
 
     def post(self, request):
         """Create a new translation"""
@@ -137,47 +167,44 @@ class TranslateView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Auto-detect source language if not provided
-            if not source_lang or source_lang == 'auto':
-                detected_lang, confidence = detect_language(text)
-                source_lang = detected_lang
-
-            # Validate medical terms
-            validator = MedicalTerminologyValidator()
-            suggestions = validator.validate_and_suggest(text)
-
-            # Translate using MyMemory API
-            url = f"https://api.mymemory.translated.net/get"
-            params = {
-                'q': text,
-                'langpair': f"{source_lang}|{target_lang}"
+            # Served from the cache or translation memory when possible
+            result = services.translate(text, source_lang, target_lang)
+            source_lang = result['source_language']
+            translated_text = result['translated_text']
+
+            # Validate medical terms against the source language's lexicon
+            validator = MedicalTerminologyValidator(source_lang)
+            analysis = validator.analyze(text)
+            suggestions = analysis['suggestions']
+
+            # Create translation record (buffered when write-behind is on)
+            write_behind.record_translation(
+                user=request.user,
+                original_text=text,
+                translated_text=translated_text,
+                source_language=source_lang,
+                target_language=target_lang,
+                medical_terms=analysis
+            )
+
+            data = {
+                'translated_text': translated_text,
+                'detected_language': source_lang,
+                'medical_suggestions': suggestions if suggestions else [],
+                'from_cache': result['from_cache'],
+                'from_memory': result['from_memory']
             }
-            
-            response = requests.get(url, params=params)
-            data = response.json()
-            
-            if data['responseStatus'] == 200:
-                translated_text = data['responseData']['translatedText']
-                
-                # Create translation record
-                translation = Translation.objects.create(
-                    user=request.user,
-                    original_text=text,
-                    translated_text=translated_text,
-                    source_language=source_lang,
-                    target_language=target_lang
-                )
-                
-                return Response({
-                    'translated_text': translated_text,
-                    'detected_language': source_lang,
-                    'medical_suggestions': suggestions if suggestions else []
-                })
-            else:
-                return Response({
-                    'error': 'Translation service error'
-                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-                
+            if 'chunks' in result:
+                data['chunks'] = result['chunks']
+            return Response(data)
+
+        except (UpstreamError, TranslationServiceError) as e:
+            response = Response({
+                'error': 'Translation service error'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            if isinstance(e, CircuitOpenError):
+                response['Retry-After'] = str(int(e.retry_after) + 1)
+            return response
         except Exception as e:
             return Response({
                 'error': str(e)
@@ -185,14 +212,291 @@ class TranslateView(APIView):
 
     def delete(self, request, translation_id):
         """Delete a translation"""
-        try:
-            translation = Translation.objects.get(id=translation_id, user=request.user)
-            translation.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except Translation.DoesNotExist:
+        # One DELETE scoped to the user; nothing is fetched first
+        deleted, _ = Translation.objects.filter(id=translation_id, user=request.user).delete()
+        if not deleted:
             return Response({
                 'error': 'Translation not found'
             }, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class TranslationSearchView(HistoryFilterMixin, APIView):
+    """
+    API endpoint for searching the current user's translation history
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """
+        Search original and translated texts for q, best match first.
+        Accepts the same filters as the history list.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({
+                'error': 'Please provide a search query'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        write_behind.flush()
+        try:
+            translations = self.filter_history(
+                Translation.objects.filter(user=request.user),
+                request.query_params
+            )
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        results = search_translations(translations, query) \
+            .values(*TranslationListSerializer.Meta.fields, 'rank')
+        paginator = SearchPagination()
+        with metrics.timed('db'):
+            page = paginator.paginate_queryset(results, request, view=self)
+        with metrics.timed('serialize'):
+            return paginator.get_paginated_response(TranslationListSerializer(page, many=True).data)
+
+class TranslationExportView(HistoryFilterMixin, APIView):
+    """
+    API endpoint streaming translation history for compliance exports
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [JSONLinesRenderer, CSVRenderer]
+
+    def get(self, request):
+        """
+        Stream the current user's translations, oldest first, as JSON Lines
+        (format=jsonl, the default) or CSV (format=csv). scope=organization
+        exports everyone in the user's organization instead (staff only);
+        gzip=true compresses on the fly. Accepts the history list filters.
+        """
+        if request.query_params.get('scope') == 'organization':
+            organization = request.user.organization
+            if not request.user.is_staff or not organization:
+                return Response({
+                    'error': 'Organization exports are limited to staff members of an organization'
+                }, status=status.HTTP_403_FORBIDDEN)
+            queryset, name = export.export_queryset(organization=organization), slugify(organization)
+        else:
+            queryset, name = export.export_queryset(user=request.user), slugify(request.user.username)
+
+        try:
+            queryset = self.filter_history(queryset, request.query_params)
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        write_behind.flush()
+        export_format = request.accepted_renderer.format
+        compress = request.query_params.get('gzip', '').lower() in ('1', 'true', 'yes')
+        filename = f"translations-{name}-{timezone.now():%Y%m%d}.{export_format}"
+        response = StreamingHttpResponse(
+            export.stream_export(queryset, export_format, compress),
+            content_type='application/gzip' if compress else f'{export.CONTENT_TYPES[export_format]}; charset=utf-8'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}{".gz" if compress else ""}"'
+        return response
+
+class TranslateStreamView(APIView):
+    """
+    API endpoint streaming a translation segment by segment.
+    Sends NDJSON by default, or Server-Sent Events for Accept: text/event-stream.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, EventStreamRenderer, JSONRenderer]
+
+    def post(self, request):
+        """
+        Translate text and stream one 'segment' event per sentence chunk as
+        soon as it is ready, each with its index. A leading 'start' event
+        carries the segment count and a final 'done' event the medical
+        suggestions and saved translation id.
+        """
+        text = request.data.get('text')
+        source_lang = request.data.get('source_lang')
+        target_lang = request.data.get('target_lang')
+
+        if not all([text, target_lang]):
+            return Response({
+                'error': 'Please provide text and target language'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        renderer = EventStreamRenderer if isinstance(request.accepted_renderer, EventStreamRenderer) \
+            else NDJSONRenderer
+        response = StreamingHttpResponse(
+            self.stream(request.user, text, source_lang, target_lang, renderer.event),
+            content_type=f"{renderer.media_type}; charset=utf-8"
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def stream(self, user, text, source_lang, target_lang, event):
+        try:
+            stored = services.lookup(text, source_lang, target_lang)
+            if stored:
+                chunks, separators = [text], ['', '']
+                source_lang = stored['source_language']
+            else:
+                if services.is_auto(source_lang):
+                    source_lang, confidence = detect_language(text)
+                chunks, separators = services.split_for_engine(text)
+
+            yield event({
+                'segments': len(chunks),
+                'detected_language': source_lang,
+                'leading_whitespace': separators[0]
+            }, 'start')
+
+            if stored:
+                results = iter([(0, stored)])
+            else:
+                results = services.iter_translations(
+                    [(chunk, source_lang, target_lang) for chunk in chunks],
+                    max_workers=settings.TEXT_CHUNKING['MAX_WORKERS']
+                )
+
+            translated = [None] * len(chunks)
+            errors = 0
+            for index, result in results:
+                if isinstance(result, Exception):
+                    errors += 1
+                    error = 'Translation service error' \
+                        if isinstance(result, (UpstreamError, TranslationServiceError)) else str(result)
+                    yield event({'index': index, 'error': error}, 'error')
+                    continue
+                translated[index] = result['translated_text']
+                yield event({
+                    'index': index,
+                    'translated_text': result['translated_text'],
+                    'trailing_whitespace': separators[index + 1],
+                    'from_cache': result['from_cache'],
+                    'from_memory': result['from_memory']
+                }, 'segment')
+
+            analysis = MedicalTerminologyValidator(source_lang).analyze(text)
+            translation_id = None
+            if not errors:
+                translated_text = join_chunks(translated, separators)
+                if not stored:
+                    services.remember(text, source_lang, target_lang, {
+                        'translated_text': translated_text,
+                        'source_language': source_lang
+                    })
+                # The done event carries the id, so this write cannot wait
+                translation_id = write_behind.record_translation(
+                    sync=True,
+                    user=user,
+                    original_text=text,
+                    translated_text=translated_text,
+                    source_language=source_lang,
+                    target_language=target_lang,
+                    medical_terms=analysis
+                ).id
+
+            yield event({
+                'translation_id': translation_id,
+                'medical_suggestions': analysis['suggestions'],
+                'errors': errors
+            }, 'done')
+
+        except Exception as e:
+            yield event({'error': str(e)}, 'error')
+
+class BatchTranslateView(APIView):
+    """
+    API endpoint for translating many segments in one request
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        """
+        Translate a list of segments. Each segment is a string or an object
+        with text and optional source_lang / target_lang overriding the
+        request-level ones. Results come back in input order.
+        """
+        segments = request.data.get('segments')
+        default_source = request.data.get('source_lang')
+        default_target = request.data.get('target_lang')
+        max_segments = settings.BATCH_TRANSLATION['MAX_SEGMENTS']
+
+        if not isinstance(segments, list) or not segments:
+            return Response({
+                'error': 'Please provide a list of segments'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(segments) > max_segments:
+            return Response({
+                'error': f'At most {max_segments} segments can be translated at once'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        items = []
+        errors = {}
+        for index, segment in enumerate(segments):
+            if isinstance(segment, str):
+                segment = {'text': segment}
+            if not isinstance(segment, dict):
+                errors[index] = 'Segment must be a string or an object'
+                continue
+            text = segment.get('text')
+            source_lang = segment.get('source_lang', default_source)
+            target_lang = segment.get('target_lang', default_target)
+            if not text or not isinstance(text, str) or not target_lang:
+                errors[index] = 'Please provide text and target language'
+                continue
+            items.append((index, (text, source_lang, target_lang)))
+
+        try:
+            translated = services.translate_many([segment for _, segment in items])
+            validators = {}  # one per source language
+
+            results = [None] * len(segments)
+            for index, error in errors.items():
+                results[index] = {'index': index, 'error': error}
+
+            records = {}
+            for (index, (text, _, target_lang)), result in zip(items, translated):
+                if isinstance(result, (UpstreamError, TranslationServiceError)):
+                    results[index] = {'index': index, 'error': 'Translation service error'}
+                    continue
+                if isinstance(result, Exception):
+                    results[index] = {'index': index, 'error': str(result)}
+                    continue
+                validator = validators.get(result['source_language'])
+                if validator is None:
+                    validator = validators[result['source_language']] = \
+                        MedicalTerminologyValidator(result['source_language'])
+                analysis = validator.analyze(text)
+                # One history record per distinct segment
+                records.setdefault((text, result['source_language'], target_lang), Translation(
+                    user=request.user,
+                    original_text=text,
+                    translated_text=result['translated_text'],
+                    source_language=result['source_language'],
+                    target_language=target_lang,
+                    medical_terms=analysis
+                ))
+                results[index] = {
+                    'index': index,
+                    'translated_text': result['translated_text'],
+                    'detected_language': result['source_language'],
+                    'medical_suggestions': analysis['suggestions'],
+                    'from_cache': result['from_cache'],
+                    'from_memory': result['from_memory']
+                }
+
+            term_usage.save_translations(records.values())
+
+            return Response({
+                'results': results,
+                'count': len(results),
+                'errors': sum(1 for result in results if 'error' in result)
+            })
+
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class TranslationFavoriteView(APIView):
     """
@@ -201,12 +505,142 @@ class TranslationFavoriteView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, translation_id):
-        try:
-            translation = Translation.objects.get(id=translation_id, user=request.user)
-            translation.is_favorite = not translation.is_favorite
-            translation.save()
-            return Response(TranslationSerializer(translation).data)
-        except Translation.DoesNotExist:
+        # Flipped in the database, so concurrent toggles never lose an update
+        updated = Translation.objects.filter(id=translation_id, user=request.user).update(
+            is_favorite=~F('is_favorite')
+        )
+        if not updated:
             return Response({
                 'error': 'Translation not found'
-            }, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({'updated': updated})
+
+class TranslationBulkView(APIView):
+    """
+    API endpoint favoriting, unfavoriting or deleting many of the current
+    user's translations at once, with one UPDATE or DELETE statement
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    bulk_action = None  # 'favorite', 'unfavorite' or 'delete', set in urls.py
+
+    def post(self, request):
+        """
+        Apply the action to the translations listed in ids, or matching
+        filters (the history filters: source_lang, target_lang, favorites,
+        created_after, created_before), or both. Returns the affected count.
+        """
+        ids = request.data.get('ids')
+        filters = request.data.get('filters')
+        max_ids = settings.TRANSLATION_BULK['MAX_IDS']
+
+        if ids is None and not filters:
+            # Without ids, at least one filter must narrow the selection
+            return Response({
+                'error': 'Please provide ids or filters'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if ids is not None and (not isinstance(ids, list) or not ids or
+                                not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+            return Response({
+                'error': 'ids must be a non-empty list of translation ids'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if ids is not None and len(ids) > max_ids:
+            return Response({
+                'error': f'At most {max_ids} translations can be changed at once'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if filters is not None and not isinstance(filters, dict):
+            return Response({
+                'error': 'filters must be an object'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # A filter that applies nothing would widen the selection
+            check_filters(filters or {})
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Buffered rows must be in the table for the statement to see them
+        write_behind.flush()
+        translations = Translation.objects.filter(user=request.user)
+        if ids is not None:
+            translations = translations.filter(id__in=ids)
+        translations = filter_history(translations, filters or {})
+
+        with metrics.timed('db'):
+            if self.bulk_action == 'delete':
+                deleted, _ = translations.delete()
+                return Response({'deleted': deleted})
+            favorite = self.bulk_action == 'favorite'
+            # Rows already in the wanted state are neither rewritten nor counted
+            updated = translations.filter(is_favorite=not favorite).update(is_favorite=favorite)
+        return Response({'updated': updated})
+
+class TermUsageView(APIView):
+    """
+    API endpoint listing the most mentioned medical terms of a language pair
+    over the last days, read from the daily term usage rollup
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        source_lang = request.query_params.get('source_lang')
+        target_lang = request.query_params.get('target_lang')
+        if not all([source_lang, target_lang]):
+            return Response({
+                'error': 'Please provide source and target language'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            days = int(request.query_params.get('days', 7))
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+            if days < 1 or limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({
+                'error': 'days and limit must be positive integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        until = timezone.localdate()
+        since = until - timedelta(days=days - 1)
+        return Response({
+            'source_language': source_lang,
+            'target_language': target_lang,
+            'since': since.isoformat(),
+            'until': until.isoformat(),
+            'terms': term_usage.top_terms(source_lang, target_lang, since, until, limit)
+        })
+
+class UpstreamStatusView(APIView):
+    """
+    API endpoint reporting this worker's view of the MyMemory upstream:
+    circuit breaker state, concurrency limit and request coalescing counters
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            **upstream.stats(),
+            'single_flight': singleflight.stats()
+        })
+
+class LexiconStatusView(APIView):
+    """
+    API endpoint reporting the medical lexicons this worker has loaded, with
+    their size and approximate memory per language
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_language_lexicons().stats())
+
+class MetricsView(APIView):
+    """
+    API endpoint exposing this worker's metrics in the Prometheus text format
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        if not metrics.enabled():
+            return Response({
+                'error': 'Metrics are disabled'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,158 @@
+import atexit
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import metrics, term_usage
+from .models import Translation
+
+
+class WriteBehindBuffer:
+    """
+    Bounded per-process buffer of unsaved model instances.
+
+    Instances are written with one bulk_create when the buffer holds
+    max_records of them, every flush_interval seconds from a background
+    thread once started, and on close(). A worker that dies without closing
+    loses what is still buffered: at most max_records rows or flush_interval
+    seconds of them. on_flush, if given, is called with each written batch.
+    """
+
+    def __init__(self, model, max_records: int = 500, flush_interval: float = 1.0, on_flush=None):
+        self.model = model
+        self.on_flush = on_flush
+        self.max_records = max(1, max_records)
+        self.flush_interval = flush_interval
+        self._records = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.flushed = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, instance):
+        """Buffer an unsaved instance; a full buffer is flushed by the caller"""
+        with self._lock:
+            self._records.append(instance)
+            full = len(self._records) >= self.max_records
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every buffered instance now. Returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                records, self._records = self._records, []
+            if not records:
+                return 0
+            try:
+                # on_flush runs in the transaction that wrote the batch
+                with transaction.atomic():
+                    self.model.objects.bulk_create(records, batch_size=self.max_records)
+                    if self.on_flush is not None:
+                        self.on_flush(records)
+            except Exception as e:
+                self.dropped += len(records)
+                print(f"Write-behind flush failed, {len(records)} records lost: {str(e)}")
+                return 0
+            self.flushes += 1
+            self.flushed += len(records)
+            return len(records)
+
+    def start(self):
+        """Start the background thread that flushes every flush_interval seconds"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            if self._records:
+                self.flush()
+                # The flush thread must not hold a connection between rounds
+                connection.close()
+
+    def close(self):
+        """Stop the background thread and write what is left"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            'buffered': len(self._records),
+            'max_records': self.max_records,
+            'flush_interval': self.flush_interval,
+            'flushes': self.flushes,
+            'flushed': self.flushed,
+            'dropped': self.dropped,
+        }
+
+
+_buffer = None
+_buffer_pid = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> WriteBehindBuffer:
+    """Return this worker's Translation buffer, creating it on first use (and after fork)"""
+    global _buffer, _buffer_pid
+    pid = os.getpid()
+    if _buffer is None or _buffer_pid != pid:
+        with _buffer_lock:
+            if _buffer is None or _buffer_pid != pid:
+                options = settings.WRITE_BEHIND
+                _buffer = WriteBehindBuffer(
+                    Translation,
+                    max_records=options['MAX_RECORDS'],
+                    flush_interval=options['FLUSH_INTERVAL'],
+                    on_flush=term_usage.record_usage
+                ).start()
+                _buffer_pid = pid
+                # Workers stop through SystemExit (gunicorn, uvicorn), which runs atexit
+                atexit.register(_buffer.close)
+    return _buffer
+
+
+def flush():
+    """Write this worker's buffered translations now, if there are any"""
+    if _buffer is not None and _buffer_pid == os.getpid():
+        return _buffer.flush()
+    return 0
+
+
+def reset_buffer():
+    """Flush and drop the buffer so the next call picks up new settings"""
+    global _buffer, _buffer_pid
+    with _buffer_lock:
+        if _buffer is not None and _buffer_pid == os.getpid():
+            atexit.unregister(_buffer.close)
+            _buffer.close()
+        _buffer = None
+        _buffer_pid = None
+
+
+def record_translation(sync: bool = False, **fields):
+    """
+    Save a Translation. With WRITE_BEHIND enabled it is buffered and None is
+    returned; pass sync=True when the caller needs the saved row (and its id).
+    Either way its medical terms are added to the term usage rollup once saved.
+    """
+    with metrics.timed('db'):
+        if sync or not settings.WRITE_BEHIND['ENABLED']:
+            with transaction.atomic():
+                translation = Translation.objects.create(**fields)
+                term_usage.record_usage([translation])
+            return translation
+        get_buffer().add(Translation(**fields))
+        return None